@@ -1,3 +1,4 @@
+import contextvars
 import json
 from django.contrib.admin.models import LogEntry, ADDITION, CHANGE, DELETION
 from django.contrib.contenttypes.models import ContentType
@@ -12,7 +13,7 @@ class AuditLogMiddleware(MiddlewareMixin):
     Middleware to capture request metadata for audit logging
     """
     def process_request(self, request):
-        """Store request metadata in thread-local storage"""
+        """Store request metadata on the request"""
         # Get session key safely
         session_key = None
         if hasattr(request, 'session') and request.session:
@@ -42,27 +43,37 @@ class AuditLogMiddleware(MiddlewareMixin):
         return ip
 
 
-# Signal handlers to create audit logs for all models
-_thread_locals = {}
+# Request being handled, for access in signals. A context variable keeps
+# concurrent requests apart under ASGI and follows work handed to threads
+# with asyncio.to_thread or apps.tenants.context.copy_context_to
+_current_request = contextvars.ContextVar('audit_log_request', default=None)
 
 
 def get_current_request():
-    """Get the current request from thread-local storage"""
-    import threading
-    return getattr(threading.current_thread(), 'request', None)
+    """Get the current request from the context"""
+    return _current_request.get()
 
 
 def set_current_request(request):
-    """Set the current request in thread-local storage"""
-    import threading
-    threading.current_thread().request = request
+    """Set the current request in the context, returning a token for reset_current_request"""
+    return _current_request.set(request)
 
 
-class AuditLogRequestMiddleware(MiddlewareMixin):
-    """Store request in thread-local storage for access in signals"""
-    def process_request(self, request):
-        set_current_request(request)
-        
-    def process_response(self, request, response):
-        set_current_request(None)
+def reset_current_request(token):
+    """Restore the request that was current before set_current_request returned `token`"""
+    _current_request.reset(token)
+
+
+class AuditLogRequestMiddleware:
+    """Store request in the context for access in signals"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = set_current_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_current_request(token)
         return response
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.2 on 2026-10-17 02:10
+
+from django.db import migrations
+
+from apps.tenants.partitioning import partition_from_settings
+
+
+def partition(apps, schema_editor):
+    """Partition the table by month of created_at and by tenant when settings.TENANT_PARTITIONING is set."""
+    partition_from_settings('audit_logs_auditlogentry', connection=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_logs', '0002_initial'),
+    ]
+
+    operations = [
+        # Unapplying leaves the table partitioned; the schema Django sees is unchanged
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
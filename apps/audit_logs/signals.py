@@ -27,9 +27,8 @@ TRACKED_MODELS = [
 ]
 
 
-def create_audit_log(user, obj, action_flag, change_message=''):
-    """Create an audit log entry with metadata"""
-    # Handle background tasks - get user from system user or tenant context
+def get_audit_user(user=None):
+    """Return the acting user, falling back to the tenant's system user in background tasks"""
     if not user:
         # Try to get tenant from context (background tasks)
         tenant = get_current_tenant()
@@ -45,6 +44,49 @@ def create_audit_log(user, obj, action_flag, change_message=''):
                     'is_active': False,
                 }
             )
+    return user
+
+
+def create_audit_metadata(log_entry):
+    """Attach request or background task metadata to a LogEntry"""
+    # Get request metadata or use background task defaults
+    request = get_current_request()
+    tenant = None
+    ip_address = None
+    user_agent = None
+    request_method = None
+    session_key = None
+    
+    if request and hasattr(request, 'audit_metadata'):
+        # Request context available
+        if hasattr(request, 'tenant'):
+            tenant = request.tenant
+        ip_address = request.audit_metadata.get('ip_address')
+        user_agent = request.audit_metadata.get('user_agent')
+        request_method = request.audit_metadata.get('request_method')
+        session_key = request.audit_metadata.get('session_key')
+    else:
+        # Background task context
+        tenant = get_current_tenant()
+        ip_address = '127.0.0.1'  # Local for background tasks
+        user_agent = 'Celery Background Task'
+        request_method = 'TASK'
+        
+    if tenant:
+        # Create extended audit log entry
+        AuditLogEntry.objects.create(
+            log_entry=log_entry,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            request_method=request_method,
+            session_key=session_key,
+            tenant=tenant
+        )
+
+
+def create_audit_log(user, obj, action_flag, change_message=''):
+    """Create an audit log entry with metadata"""
+    user = get_audit_user(user)
     
     if user and user.is_authenticated:
         # Skip audit logging if user doesn't have a tenant yet (during registration)
@@ -60,40 +102,33 @@ def create_audit_log(user, obj, action_flag, change_message=''):
             action_flag=action_flag,
             change_message=change_message
         )
-        
-        # Get request metadata or use background task defaults
-        request = get_current_request()
-        tenant = None
-        ip_address = None
-        user_agent = None
-        request_method = None
-        session_key = None
-        
-        if request and hasattr(request, 'audit_metadata'):
-            # Request context available
-            if hasattr(request, 'tenant'):
-                tenant = request.tenant
-            ip_address = request.audit_metadata.get('ip_address')
-            user_agent = request.audit_metadata.get('user_agent')
-            request_method = request.audit_metadata.get('request_method')
-            session_key = request.audit_metadata.get('session_key')
-        else:
-            # Background task context
-            tenant = get_current_tenant()
-            ip_address = '127.0.0.1'  # Local for background tasks
-            user_agent = 'Celery Background Task'
-            request_method = 'TASK'
+        create_audit_metadata(log_entry)
+
+
+def create_batch_audit_log(user, model, object_ids, change_message, action_flag=CHANGE):
+    """
+    Create a single audit log entry for a bulk change to many objects of
+    one model, such as a queryset update that bypasses post_save
+    """
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    
+    user = get_audit_user(user)
+    
+    if user and user.is_authenticated:
+        if hasattr(user, 'tenant') and not user.tenant:
+            return
             
-        if tenant:
-            # Create extended audit log entry
-            AuditLogEntry.objects.create(
-                log_entry=log_entry,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                request_method=request_method,
-                session_key=session_key,
-                tenant=tenant
-            )
+        log_entry = LogEntry.objects.create(
+            user=user,
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=None,
+            object_repr=f"{len(object_ids)} {model._meta.verbose_name_plural}"[:200],
+            action_flag=action_flag,
+            change_message=f"{change_message} (IDs: {', '.join(str(pk) for pk in object_ids)})"
+        )
+        create_audit_metadata(log_entry)
 
 
 @receiver(post_save)
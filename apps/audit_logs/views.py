@@ -28,7 +28,9 @@ def audit_log_list(request):
     """List all audit log entries with filtering"""
     
     # Get all log entries with related data
-    logs = LogEntry.objects.select_related(
+    logs = LogEntry.objects.filter(
+        audit_metadata__tenant=request.tenant
+    ).select_related(
         'user', 'content_type', 'audit_metadata'
     ).order_by('-action_time')
     
@@ -88,11 +90,12 @@ def audit_log_list(request):
     
     # Get filter options
     users = CustomUser.objects.filter(
+        tenant=request.tenant,
         is_active=True
     ).order_by('first_name', 'last_name')
     
     content_types = ContentType.objects.filter(
-        logentry__isnull=False
+        logentry__audit_metadata__tenant=request.tenant
     ).distinct().order_by('app_label', 'model')
     
     # Pagination
@@ -129,7 +132,9 @@ def export_audit_logs(request):
     """Export audit logs to CSV"""
     
     # Get the same filtered queryset as the list view
-    logs = LogEntry.objects.select_related(
+    logs = LogEntry.objects.filter(
+        audit_metadata__tenant=request.tenant
+    ).select_related(
         'user', 'content_type', 'audit_metadata'
     ).order_by('-action_time')
     
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_installations', '0003_initial'),
+        ('customer_subscriptions', '0003_customersubscription_is_first_subscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customerinstallation',
+            name='current_subscription',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Active subscription covering the current time', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='customer_subscriptions.customersubscription'),
+        ),
+        migrations.AddField(
+            model_name='customerinstallation',
+            name='paid_until',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text="Latest end date of the installation's subscriptions that were not cancelled", null=True),
+        ),
+    ]
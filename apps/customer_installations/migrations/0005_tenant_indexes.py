@@ -0,0 +1,20 @@
+# Generated by Django 5.2.2 on 2026-10-17 01:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking writes to the table
+    atomic = False
+
+    dependencies = [
+        ('customer_installations', '0004_installation_paid_status'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customerinstallation',
+            index=models.Index(fields=['tenant', 'nap', 'status'], name='customer_in_tenant__4e509b_idx'),
+        ),
+    ]
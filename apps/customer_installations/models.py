@@ -77,12 +77,33 @@ class CustomerInstallation(TenantAwareModel, GeoLocatedModel):
         help_text="Current status of the installation"
     )
     
+    # Paid-up state, maintained by apps.customer_subscriptions.services.refresh_paid_status
+    current_subscription = models.ForeignKey(
+        'customer_subscriptions.CustomerSubscription',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="Active subscription covering the current time"
+    )
+    paid_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="Latest end date of the installation's subscriptions that were not cancelled"
+    )
+    
     class Meta:
         ordering = ['-installation_date']
         verbose_name = "Customer Installation"
         verbose_name_plural = "Customer Installations"
         # Ensure unique port assignment per NAP
         unique_together = [['nap', 'nap_port']]
+        indexes = [
+            models.Index(fields=['tenant', 'nap', 'status']),
+        ]
         permissions = [
             ("view_installation_list", "Can view installation list"),
             ("view_installation_detail", "Can view installation details"),
@@ -97,21 +118,10 @@ class CustomerInstallation(TenantAwareModel, GeoLocatedModel):
     def __str__(self):
         return f"{self.customer.full_name} - Installation ({self.get_status_display()})"
     
-    @property
-    def current_subscription(self):
-        """Get the currently active subscription if any."""
-        from apps.customer_subscriptions.models import CustomerSubscription
-        now = timezone.now()
-        return self.subscriptions.filter(
-            status='ACTIVE',
-            start_date__lte=now,
-            end_date__gte=now
-        ).first()
-    
     @property
     def has_active_subscription(self):
         """Check if installation has an active subscription."""
-        return self.current_subscription is not None
+        return self.current_subscription_id is not None
     
     def update_status_based_on_subscription(self):
         """Update installation status based on subscription status."""
@@ -155,10 +165,62 @@ class CustomerInstallation(TenantAwareModel, GeoLocatedModel):
                 'nap': 'NAP is required when port number is specified'
             })
     
+    # Written only by refresh_paid_status, never from a possibly stale instance
+    PAID_STATUS_FIELDS = ('current_subscription', 'paid_until')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_paid_status = instance._paid_status()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        refreshed = self._paid_status()
+        if fields is not None:
+            refreshed = {
+                attname: value for attname, value in refreshed.items()
+                if attname in fields or attname.removesuffix('_id') in fields
+            }
+        self._loaded_paid_status = {**getattr(self, '_loaded_paid_status', {}), **refreshed}
+    
+    def _paid_status(self):
+        """Paid status values held by this instance, without loading deferred fields."""
+        attnames = (self._meta.get_field(name).attname for name in self.PAID_STATUS_FIELDS)
+        return {attname: self.__dict__.get(attname) for attname in attnames}
+    
     def save(self, *args, **kwargs):
-        """Validate before saving"""
+        """
+        Validate before saving.
+
+        Updates never write the paid status fields, which a stale instance
+        would otherwise roll back; changing them here raises ValueError
+        instead of being dropped, as only refresh_paid_status writes them.
+        """
         self.clean()
+        if self.pk and not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            loaded = getattr(self, '_loaded_paid_status', None) or self._paid_status()
+            changed = [
+                attname for attname, value in self._paid_status().items()
+                if value != loaded.get(attname)
+            ]
+            if update_fields is not None:
+                changed += [
+                    name for name in update_fields
+                    if name in self.PAID_STATUS_FIELDS or name in loaded
+                ]
+            if changed:
+                raise ValueError(
+                    f"{', '.join(sorted(set(changed)))} can only be changed by refresh_paid_status"
+                )
+            if update_fields is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.PAID_STATUS_FIELDS
+                ]
         super().save(*args, **kwargs)
+        self._loaded_paid_status = self._paid_status()
     
     @property
     def nap_connection_display(self):
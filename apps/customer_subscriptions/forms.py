@@ -3,8 +3,10 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 from .models import CustomerSubscription
+from . import pricing
 from apps.customer_installations.models import CustomerInstallation
 from apps.subscriptions.models import SubscriptionPlan
+from apps.barangays.models import Barangay
 
 
 class CustomerSubscriptionForm(forms.ModelForm):
@@ -103,12 +105,11 @@ class CustomerSubscriptionForm(forms.ModelForm):
         
         if all([customer_installation, subscription_type, amount, subscription_plan]):
             # Validate amount based on subscription type
-            if subscription_type == 'one_month':
-                cleaned_data['amount'] = subscription_plan.price
-            elif subscription_type == 'fifteen_days':
-                cleaned_data['amount'] = subscription_plan.price / 2
-            elif subscription_type == 'custom' and amount <= 0:
+            if subscription_type == 'custom' and amount <= 0:
                 raise ValidationError("Custom amount must be greater than 0")
+            cleaned_data['amount'] = pricing.quote(
+                subscription_plan.price, amount, subscription_type
+            ).amount
             
             # Automatically set start date based on existing subscription
             latest_sub = CustomerSubscription.get_latest_subscription(customer_installation)
@@ -128,3 +129,66 @@ class CustomerSubscriptionForm(forms.ModelForm):
         if commit:
             instance.save()
         return instance
+
+
+class ReceiptBatchForm(forms.Form):
+    """Form for requesting the receipts of a period as one PDF."""
+    
+    start_date = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'input input-bordered w-full', 'type': 'date'}),
+        label="From"
+    )
+    end_date = forms.DateField(
+        widget=forms.DateInput(attrs={'class': 'input input-bordered w-full', 'type': 'date'}),
+        label="To"
+    )
+    barangay = forms.ModelChoiceField(
+        queryset=Barangay.objects.none(),  # Will be filtered by tenant in __init__
+        required=False,
+        empty_label="All Barangays",
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'})
+    )
+    
+    def __init__(self, *args, **kwargs):
+        self.tenant = kwargs.pop('tenant', None)
+        super().__init__(*args, **kwargs)
+        
+        if self.tenant:
+            self.fields['barangay'].queryset = Barangay.objects.filter(tenant=self.tenant)
+        
+        today = timezone.localdate()
+        self.fields['start_date'].initial = today
+        self.fields['end_date'].initial = today
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        
+        if start_date and end_date and start_date > end_date:
+            raise ValidationError("Start date must be on or before end date")
+        
+        return cleaned_data
+
+
+class BulkPaymentRowForm(forms.Form):
+    """
+    One row of a bulk payment posting. Only checks the row's own values;
+    installations and plans are resolved for all rows at once by
+    services.post_payments.
+    """
+    
+    installation_id = forms.IntegerField(min_value=1)
+    plan_id = forms.IntegerField(min_value=1)
+    subscription_type = forms.ChoiceField(choices=CustomerSubscription.SUBSCRIPTION_TYPES)
+    amount = forms.DecimalField(max_digits=10, decimal_places=2, required=False)
+    notes = forms.CharField(required=False)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        amount = cleaned_data.get('amount')
+        
+        if cleaned_data.get('subscription_type') == 'custom' and (amount is None or amount <= 0):
+            self.add_error('amount', "Custom amount must be greater than 0")
+        
+        return cleaned_data
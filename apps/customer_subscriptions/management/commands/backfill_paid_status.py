@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.customer_installations.models import CustomerInstallation
+from apps.customer_subscriptions.services import refresh_paid_status
+from apps.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Populate current_subscription and paid_until on customer installations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Run for specific tenant ID only'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of installations updated per statement (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        tenant_id = options.get('tenant_id')
+        batch_size = options['batch_size']
+
+        tenants = Tenant.objects.all()
+        if tenant_id:
+            tenants = tenants.filter(id=tenant_id)
+            if not tenants.exists():
+                self.stdout.write(self.style.ERROR(f'Tenant {tenant_id} not found'))
+                return
+
+        now = timezone.now()
+        for tenant in tenants:
+            installations = CustomerInstallation.objects.filter(tenant=tenant)
+            ids = list(installations.order_by('id').values_list('id', flat=True))
+
+            updated = 0
+            # Batched by id range so each statement stays short on large tenants
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                with transaction.atomic():
+                    updated += refresh_paid_status(
+                        installations.filter(id__gte=batch[0], id__lte=batch[-1]),
+                        now
+                    )
+
+            self.stdout.write(
+                self.style.SUCCESS(f'Tenant {tenant.name}: Updated paid status of {updated} installations')
+            )
+
+        self.stdout.write(self.style.SUCCESS('Paid status backfill complete!'))
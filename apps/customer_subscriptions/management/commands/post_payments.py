@@ -0,0 +1,66 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.customer_subscriptions.services import post_payments, validate_payment_rows
+from apps.tenants.models import Tenant
+from apps.users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Post payments in bulk from a CSV file with the columns installation_id, plan_id, '
+        'subscription_type, amount and notes. Nothing is posted unless every row is valid.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the CSV file')
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            required=True,
+            help='Tenant the payments belong to'
+        )
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Username of the cashier recorded as creator of the payments'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only validate the rows'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Tenant.objects.get(id=options['tenant_id'], is_active=True)
+        except Tenant.DoesNotExist:
+            raise CommandError(f"Tenant {options['tenant_id']} not found or inactive") from None
+
+        try:
+            user = CustomUser.objects.get(username=options['user'], tenant=tenant)
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {options['user']} not found in tenant {tenant.name}") from None
+
+        with open(options['csv_file'], newline='', encoding='utf-8-sig') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+
+        if options['dry_run']:
+            valid, errors = validate_payment_rows(tenant, rows)
+        else:
+            valid, errors = post_payments(tenant, user, rows)
+
+        if errors:
+            for error in errors:
+                messages = '; '.join(
+                    f"{field}: {' '.join(field_errors)}" for field, field_errors in error['errors'].items()
+                )
+                # Row 1 of the data is line 2 of the file
+                self.stdout.write(self.style.ERROR(f"Line {error['row'] + 1}: {messages}"))
+            raise CommandError(f'{len(errors)} of {len(rows)} rows are invalid, no payments were posted')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'All {len(valid)} rows are valid'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Tenant {tenant.name}: Posted {len(valid)} payments'))
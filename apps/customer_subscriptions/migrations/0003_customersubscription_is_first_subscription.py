@@ -0,0 +1,44 @@
+# Generated by Django 5.2.2 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+def flag_first_subscriptions(apps, schema_editor):
+    """Mark the earliest subscription of every installation."""
+    from django.db.models import F, Window
+    from django.db.models.functions import RowNumber
+
+    CustomerSubscription = apps.get_model('customer_subscriptions', 'CustomerSubscription')
+
+    first_ids = CustomerSubscription.objects.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('customer_installation_id')],
+            order_by=[F('created_at').asc(), F('id').asc()]
+        )
+    ).filter(position=1).values_list('id', flat=True)
+
+    batch = []
+    for subscription_id in first_ids.iterator():
+        batch.append(subscription_id)
+        if len(batch) >= 1000:
+            CustomerSubscription.objects.filter(id__in=batch).update(is_first_subscription=True)
+            batch = []
+    if batch:
+        CustomerSubscription.objects.filter(id__in=batch).update(is_first_subscription=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_subscriptions', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customersubscription',
+            name='is_first_subscription',
+            field=models.BooleanField(default=False, editable=False, help_text="Whether this was the installation's first subscription"),
+        ),
+        migrations.RunPython(flag_first_subscriptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:18
+
+import apps.customer_subscriptions.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barangays', '0002_initial'),
+        ('customer_subscriptions', '0003_customersubscription_is_first_subscription'),
+        ('tenants', '0003_remove_tenant_name_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customersubscription',
+            name='receipt_file',
+            field=models.FileField(blank=True, editable=False, help_text='Stored receipt PDF', upload_to=apps.customer_subscriptions.models.receipt_upload_to),
+        ),
+        migrations.AddField(
+            model_name='customersubscription',
+            name='receipt_number',
+            field=models.CharField(blank=True, editable=False, help_text='Acknowledgment receipt number, assigned on first print', max_length=30),
+        ),
+        migrations.CreateModel(
+            name='ReceiptBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('start_date', models.DateField(help_text='First payment date included')),
+                ('end_date', models.DateField(help_text='Last payment date included')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILURE', 'Failure')], default='PENDING', max_length=10)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('file', models.FileField(blank=True, upload_to=apps.customer_subscriptions.models.receipt_upload_to)),
+                ('receipt_count', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('barangay', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='receipt_batches', to='barangays.barangay')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='receipt_batches', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
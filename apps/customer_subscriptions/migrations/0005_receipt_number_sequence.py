@@ -0,0 +1,73 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def number_existing_receipts(apps, schema_editor):
+    """
+    Number existing payments in the order they were recorded on each local
+    day, which matches the numbers previously printed on their receipts,
+    and start each day's receipt sequence after them.
+    """
+    from django.db.models import F, Window
+    from django.db.models.functions import RowNumber, TruncDate
+
+    CustomerSubscription = apps.get_model('customer_subscriptions', 'CustomerSubscription')
+    TenantSequence = apps.get_model('tenants', 'TenantSequence')
+
+    numbered = CustomerSubscription.objects.annotate(
+        day=TruncDate('created_at'),
+        position=Window(
+            RowNumber(),
+            partition_by=[F('tenant_id'), TruncDate('created_at')],
+            order_by=[F('created_at').asc(), F('id').asc()]
+        )
+    ).values_list('id', 'tenant_id', 'day', 'position', 'receipt_number')
+
+    last_values = {}
+    batch = []
+    for subscription_id, tenant_id, day, position, receipt_number in numbered.iterator():
+        last_values[(tenant_id, day)] = max(last_values.get((tenant_id, day), 0), position)
+        if not receipt_number:
+            batch.append(CustomerSubscription(
+                id=subscription_id,
+                receipt_number=f"AR-{day.isoformat()}-{position:04d}"
+            ))
+        if len(batch) >= 1000:
+            CustomerSubscription.objects.bulk_update(batch, ['receipt_number'])
+            batch = []
+    if batch:
+        CustomerSubscription.objects.bulk_update(batch, ['receipt_number'])
+
+    TenantSequence.objects.bulk_create(
+        [
+            TenantSequence(tenant_id=tenant_id, name='receipt', period=day.isoformat(), last_value=last_value)
+            for (tenant_id, day), last_value in last_values.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_installations', '0004_installation_paid_status'),
+        ('customer_subscriptions', '0004_receipts'),
+        ('subscriptions', '0002_initial'),
+        ('tenants', '0004_tenantsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customersubscription',
+            name='receipt_number',
+            field=models.CharField(blank=True, editable=False, help_text='Acknowledgment receipt number, assigned when the payment is recorded', max_length=30),
+        ),
+        migrations.RunPython(number_existing_receipts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customersubscription',
+            constraint=models.UniqueConstraint(condition=models.Q(('receipt_number', ''), _negated=True), fields=('tenant', 'receipt_number'), name='unique_receipt_number_per_tenant'),
+        ),
+    ]
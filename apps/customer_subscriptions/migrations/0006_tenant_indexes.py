@@ -0,0 +1,33 @@
+# Generated by Django 5.2.2 on 2026-10-17 01:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built and dropped without locking writes to the table;
+    # the tenant-leading replacements are in place before the old ones go
+    atomic = False
+
+    dependencies = [
+        ('customer_subscriptions', '0005_receipt_number_sequence'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customersubscription',
+            index=models.Index(fields=['tenant', 'start_date', 'end_date'], name='customer_su_tenant__c4d89e_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customersubscription',
+            index=models.Index(fields=['tenant', 'status', 'end_date'], name='customer_su_tenant__d48c1a_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customersubscription',
+            index=models.Index(fields=['tenant', 'created_at'], name='customer_su_tenant__abf937_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='customersubscription',
+            name='customer_su_start_d_6a3866_idx',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.2 on 2026-10-17 02:10
+
+from django.db import migrations
+
+from apps.tenants.partitioning import partition_from_settings
+
+
+def partition(apps, schema_editor):
+    """Partition the table by tenant when settings.TENANT_PARTITIONING is set."""
+    partition_from_settings('customer_subscriptions_customersubscription', connection=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_subscriptions', '0006_tenant_indexes'),
+        ('customer_installations', '0005_tenant_indexes'),
+    ]
+
+    operations = [
+        # Unapplying leaves the table partitioned; the schema Django sees is unchanged
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,16 @@
-from decimal import Decimal
-from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from apps.utils.models import TenantAwareModel
+from apps.tenants.sequences import next_value
 from apps.customer_installations.models import CustomerInstallation
 from apps.subscriptions.models import SubscriptionPlan
+from . import pricing
+
+
+def receipt_upload_to(instance, filename):
+    """Store receipt PDFs per tenant."""
+    return f"receipts/{instance.tenant_id}/{filename}"
 
 
 class CustomerSubscription(TenantAwareModel):
@@ -67,6 +72,13 @@ class CustomerSubscription(TenantAwareModel):
         default='ACTIVE'
     )
     
+    # First payment for the installation (new customer vs renewal)
+    is_first_subscription = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Whether this was the installation's first subscription"
+    )
+    
     # Additional fields
     notes = models.TextField(blank=True)
     
@@ -77,11 +89,34 @@ class CustomerSubscription(TenantAwareModel):
         related_name='subscriptions_created'
     )
     
+    # Official receipt, rendered once on first print (see receipts.py)
+    receipt_number = models.CharField(
+        max_length=30,
+        blank=True,
+        editable=False,
+        help_text="Acknowledgment receipt number, assigned when the payment is recorded"
+    )
+    receipt_file = models.FileField(
+        upload_to=receipt_upload_to,
+        blank=True,
+        editable=False,
+        help_text="Stored receipt PDF"
+    )
+    
     class Meta:
         ordering = ['-start_date']
         indexes = [
             models.Index(fields=['customer_installation', 'status']),
-            models.Index(fields=['start_date', 'end_date']),
+            models.Index(fields=['tenant', 'start_date', 'end_date']),
+            models.Index(fields=['tenant', 'status', 'end_date']),
+            models.Index(fields=['tenant', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'receipt_number'],
+                condition=~models.Q(receipt_number=''),
+                name='unique_receipt_number_per_tenant'
+            ),
         ]
         permissions = [
             ("view_subscription_list", "Can view subscription list"),
@@ -107,39 +142,51 @@ class CustomerSubscription(TenantAwareModel):
     
     def save(self, *args, **kwargs):
         """Override save to calculate end_date and days_added."""
-        if not self.pk:  # Only on creation
+        from apps.customer_subscriptions.services import schedule_expiry
+        
+        is_new = not self.pk
+        if is_new:  # Only on creation
             self.calculate_subscription_details()
+            self.is_first_subscription = not CustomerSubscription.objects.filter(
+                customer_installation_id=self.customer_installation_id
+            ).exists()
         
         # Update status if expired
         self.update_status()
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if is_new and not self.receipt_number:
+                self.receipt_number = self.generate_receipt_number()
+            
+            super().save(*args, **kwargs)
+            
+            # Update installation status
+            self.update_installation_status()
         
-        # Update installation status
-        self.update_installation_status()
+        # Expire exactly at end_date instead of waiting for the periodic scan
+        if is_new:
+            schedule_expiry(self)
+    
+    def generate_receipt_number(self, receipt_date=None):
+        """Generate a unique receipt number in format AR-YYYY-MM-DD-NNNN."""
+        receipt_date = receipt_date or timezone.localdate()
+        new_number = next_value(self.tenant_id, 'receipt', receipt_date.isoformat())
+        return self.format_receipt_number(receipt_date, new_number)
+    
+    @staticmethod
+    def format_receipt_number(receipt_date, number):
+        return f"AR-{receipt_date.isoformat()}-{number:04d}"
     
     def calculate_subscription_details(self):
         """Calculate days_added and end_date based on subscription type and amount."""
-        plan_price = self.subscription_plan.price
-        
-        if self.subscription_type == 'one_month':
-            self.days_added = Decimal('30')
-            self.amount = plan_price
-        elif self.subscription_type == 'fifteen_days':
-            self.days_added = Decimal('15')
-            self.amount = plan_price / 2
-        else:  # custom
-            # Formula: (amount / plan_price) * 30 = days_added
-            self.days_added = (self.amount / plan_price) * 30
-        
-        # Calculate end_date with time precision
-        # Convert days_added to timedelta
-        days = int(self.days_added)
-        hours = (self.days_added - days) * 24
-        minutes = (hours - int(hours)) * 60
-        
-        time_to_add = timedelta(days=days, hours=int(hours), minutes=int(minutes))
-        self.end_date = self.start_date + time_to_add
+        quote = pricing.quote(self.subscription_plan.price, self.amount, self.subscription_type)
+        self.apply_quote(quote)
+    
+    def apply_quote(self, quote):
+        """Set amount, days_added and end_date from a pricing quote."""
+        self.amount = quote.amount
+        self.days_added = quote.days_added
+        self.end_date = quote.end_date(self.start_date)
     
     @property
     def is_active(self):
@@ -196,15 +243,15 @@ class CustomerSubscription(TenantAwareModel):
             self.status = 'EXPIRED'
     
     def update_installation_status(self):
-        """Update the installation status based on active subscriptions."""
+        """Update the installation's paid status and its status from it."""
+        from apps.customer_subscriptions.services import refresh_paid_status
+        
         installation = self.customer_installation
         
-        # Check if there are any active subscriptions
-        active_subs = installation.subscriptions.filter(
-            status='ACTIVE',
-            start_date__lte=timezone.now(),
-            end_date__gte=timezone.now()
-        ).exists()
+        # Recompute the current subscription and paid-until date
+        refresh_paid_status(CustomerInstallation.objects.filter(pk=installation.pk))
+        installation.refresh_from_db(fields=CustomerInstallation.PAID_STATUS_FIELDS)
+        active_subs = installation.has_active_subscription
         
         # Update installation status
         if not active_subs and installation.status == 'ACTIVE':
@@ -227,22 +274,64 @@ class CustomerSubscription(TenantAwareModel):
         Calculate preview of days that will be added.
         Returns a dictionary with days, hours, minutes.
         """
-        if subscription_type == 'one_month':
-            days_added = Decimal('30')
-        elif subscription_type == 'fifteen_days':
-            days_added = Decimal('15')
-        else:  # custom
-            days_added = (Decimal(str(amount)) / plan_price) * 30
-        
-        # Convert to days, hours, minutes
-        days = int(days_added)
-        hours = (days_added - days) * 24
-        minutes = (hours - int(hours)) * 60
-        
-        return {
-            'total_days': float(days_added),
-            'days': days,
-            'hours': int(hours),
-            'minutes': int(minutes),
-            'display': f"{days} days, {int(hours)} hours, {int(minutes)} minutes"
-        }
+        return pricing.quote(plan_price, amount, subscription_type).as_preview()
+
+
+
+class ReceiptBatch(TenantAwareModel):
+    """
+    Receipts of a date range, optionally for one barangay, rendered into a
+    single PDF by the `render_receipt_batch` task for field collectors.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Success'),
+        ('FAILURE', 'Failure'),
+    ]
+    
+    start_date = models.DateField(help_text="First payment date included")
+    end_date = models.DateField(help_text="Last payment date included")
+    barangay = models.ForeignKey(
+        'barangays.Barangay',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='receipt_batches'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    task_id = models.CharField(max_length=255, blank=True)
+    file = models.FileField(upload_to=receipt_upload_to, blank=True)
+    receipt_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        'users.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='receipt_batches'
+    )
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Receipts {self.start_date} - {self.end_date} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('SUCCESS', 'FAILURE')
+    
+    def subscriptions(self):
+        """Subscriptions whose receipts belong in this batch."""
+        subscriptions = CustomerSubscription.objects.filter(
+            tenant=self.tenant,
+            created_at__date__gte=self.start_date,
+            created_at__date__lte=self.end_date
+        )
+        if self.barangay_id:
+            subscriptions = subscriptions.filter(
+                customer_installation__customer__barangay_id=self.barangay_id
+            )
+        return subscriptions
@@ -0,0 +1,126 @@
+"""
+Subscription pricing and service time arithmetic.
+
+Every payment buys service time in proportion to the plan price: a full
+price buys 30 days, half price 15 days, and custom amounts the matching
+fraction of 30 days. Quotes are computed with Decimal arithmetic and the
+service time is kept to the second, so the end date of a custom payment
+is exact rather than truncated to the minute.
+
+Quotes depend only on (plan price, amount, subscription type), so batches
+such as bulk postings or a plans x amounts preview matrix compute each
+distinct input once.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+DAYS_PER_MONTH = Decimal('30')
+SECONDS_PER_DAY = 86400
+
+# Service days and share of the plan price of the fixed subscription types
+FIXED_TYPES = {
+    'one_month': (DAYS_PER_MONTH, Decimal('1')),
+    'fifteen_days': (Decimal('15'), Decimal('0.5')),
+}
+
+# Amounts previewed for custom payments when none are given
+COMMON_AMOUNTS = (Decimal('100'), Decimal('200'), Decimal('300'), Decimal('500'), Decimal('1000'))
+
+
+@dataclass(frozen=True)
+class Quote:
+    """What a payment costs and how much service time it buys."""
+    amount: Decimal
+    days_added: Decimal
+    duration: timedelta
+
+    @property
+    def days(self):
+        return self.duration.days
+
+    @property
+    def hours(self):
+        return self.duration.seconds // 3600
+
+    @property
+    def minutes(self):
+        return self.duration.seconds % 3600 // 60
+
+    @property
+    def display(self):
+        return f"{self.days} days, {self.hours} hours, {self.minutes} minutes"
+
+    def end_date(self, start_date):
+        return start_date + self.duration
+
+    def as_preview(self):
+        """JSON-ready preview as returned by the calculate-preview API."""
+        return {
+            'total_days': float(self.days_added),
+            'days': self.days,
+            'hours': self.hours,
+            'minutes': self.minutes,
+            'total_seconds': int(self.duration.total_seconds()),
+            'display': self.display,
+            'amount': float(self.amount),
+        }
+
+
+def _decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _quote(plan_price, amount, subscription_type):
+    if subscription_type in FIXED_TYPES:
+        days_added, price_share = FIXED_TYPES[subscription_type]
+        amount = plan_price * price_share
+    else:  # custom
+        # Formula: (amount / plan_price) * 30 = days_added
+        days_added = (amount / plan_price) * DAYS_PER_MONTH
+
+    seconds = (days_added * SECONDS_PER_DAY).to_integral_value(rounding=ROUND_HALF_UP)
+    return Quote(amount=amount, days_added=days_added, duration=timedelta(seconds=int(seconds)))
+
+
+def quote(plan_price, amount, subscription_type):
+    """
+    Quote one payment. `amount` is only used for custom payments; fixed
+    types are charged their share of the plan price.
+    """
+    plan_price = _decimal(plan_price)
+    amount = _decimal(amount or 0)
+    if subscription_type in FIXED_TYPES:
+        # The amount entered does not change a fixed-type quote
+        amount = Decimal('0')
+    return _quote(plan_price, amount, subscription_type)
+
+
+def quote_many(inputs):
+    """Quote many (plan price, amount, subscription type) inputs at once."""
+    return [quote(plan_price, amount, subscription_type) for plan_price, amount, subscription_type in inputs]
+
+
+def preview_matrix(plans, amounts=COMMON_AMOUNTS):
+    """
+    Previews of every fixed type and every custom amount for each plan,
+    keyed by plan id:
+
+        {plan_id: {'one_month': preview, 'fifteen_days': preview,
+                   'custom': {'500.00': preview, ...}}}
+    """
+    amounts = [_decimal(amount).quantize(Decimal('0.01')) for amount in amounts]
+    matrix = {}
+    for plan in plans:
+        previews = {
+            subscription_type: quote(plan.price, None, subscription_type).as_preview()
+            for subscription_type in FIXED_TYPES
+        }
+        previews['custom'] = {
+            str(amount): quote(plan.price, amount, 'custom').as_preview()
+            for amount in amounts
+        }
+        matrix[plan.id] = previews
+    return matrix
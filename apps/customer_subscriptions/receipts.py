@@ -0,0 +1,177 @@
+"""
+Official receipt rendering and storage.
+
+A receipt is rendered to PDF once, the first time it is printed, and stored
+through the default STORAGES backend together with its receipt number.
+Reprints are served from storage without touching WeasyPrint. Receipts of a
+whole day or barangay are rendered into one PDF by a Celery task.
+"""
+import logging
+import secrets
+import uuid
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from weasyprint import HTML
+
+from .models import CustomerSubscription, ReceiptBatch
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_TEMPLATE = 'customer_subscriptions/receipts/official_receipt.html'
+BATCH_TEMPLATE = 'customer_subscriptions/receipts/batch_receipts.html'
+
+COMPANY_DETAILS = {
+    'company_name': 'Your ISP Company Name',
+    'company_address': '123 Main Street, Cagayan de Oro City',
+    'company_phone': '(088) 123-4567',
+    'company_email': 'billing@yourisp.com',
+}
+
+RECEIPT_RELATED = (
+    'customer_installation__customer__barangay',
+    'customer_installation__nap__splitter__lcp',
+    'subscription_plan',
+    'created_by',
+)
+
+
+def _random_filename(prefix):
+    """PDF file name that cannot be guessed from the receipt number."""
+    return f"{prefix}_{secrets.token_hex(8)}.pdf"
+
+
+def assign_receipt_number(subscription):
+    """
+    Return the subscription's receipt number (format: AR-YYYY-MM-DD-XXXX).
+
+    Numbers are assigned when a payment is saved; subscriptions recorded
+    before that get the next number of their payment date on first print.
+    """
+    if subscription.receipt_number:
+        return subscription.receipt_number
+
+    with transaction.atomic():
+        receipt_number = subscription.generate_receipt_number(
+            timezone.localdate(subscription.created_at)
+        )
+        updated = CustomerSubscription.objects.filter(
+            pk=subscription.pk, receipt_number=''
+        ).update(receipt_number=receipt_number)
+        if not updated:
+            # Numbered concurrently; roll back so the number is not used up
+            transaction.set_rollback(True)
+    if not updated:
+        receipt_number = CustomerSubscription.objects.values_list(
+            'receipt_number', flat=True
+        ).get(pk=subscription.pk)
+
+    subscription.receipt_number = receipt_number
+    return subscription.receipt_number
+
+
+def receipt_context(subscription):
+    """Template context for one receipt."""
+    return {
+        'subscription': subscription,
+        'receipt_number': assign_receipt_number(subscription),
+        'print_datetime': timezone.now(),
+        **COMPANY_DETAILS,
+    }
+
+
+def get_receipt_file(subscription):
+    """
+    Return the stored receipt PDF of a subscription, rendering and storing
+    it first if this is the first print.
+    """
+    if subscription.receipt_file:
+        return subscription.receipt_file
+
+    with transaction.atomic():
+        # Lock the row so concurrent first prints render only once
+        locked = CustomerSubscription.objects.select_for_update(of=('self',)).select_related(
+            *RECEIPT_RELATED
+        ).get(pk=subscription.pk)
+
+        if not locked.receipt_file:
+            html_string = render_to_string(RECEIPT_TEMPLATE, receipt_context(locked))
+            pdf = HTML(string=html_string).write_pdf()
+            locked.receipt_file.save(
+                _random_filename(f"receipt_{locked.receipt_number}"),
+                ContentFile(pdf),
+                save=False
+            )
+            # Queryset update so saving a receipt has none of save()'s side effects
+            CustomerSubscription.objects.filter(pk=locked.pk).update(
+                receipt_file=locked.receipt_file.name
+            )
+            logger.info(f"Stored receipt {locked.receipt_number} for subscription {locked.pk}")
+
+    subscription.receipt_number = locked.receipt_number
+    subscription.receipt_file = locked.receipt_file
+    return subscription.receipt_file
+
+
+def render_receipt_batch(batch, progress=None):
+    """
+    Render every receipt of a ReceiptBatch into one PDF stored on the batch.
+    Returns the number of receipts rendered.
+    """
+    subscriptions = batch.subscriptions().select_related(*RECEIPT_RELATED).order_by('created_at', 'pk')
+    total = subscriptions.count()
+
+    receipts = []
+    for index, subscription in enumerate(subscriptions.iterator(chunk_size=500), start=1):
+        receipts.append({
+            'subscription': subscription,
+            'receipt_number': assign_receipt_number(subscription),
+        })
+        if progress and index % 50 == 0:
+            progress.set_progress(index, total + 1, 'Collecting receipts')
+
+    if progress:
+        progress.set_progress(total, total + 1, 'Rendering PDF')
+
+    html_string = render_to_string(BATCH_TEMPLATE, {
+        'receipts': receipts,
+        'print_datetime': timezone.now(),
+        **COMPANY_DETAILS,
+    })
+    pdf = HTML(string=html_string).write_pdf()
+
+    name = f"receipts_{batch.start_date}_{batch.end_date}"
+    if batch.barangay_id:
+        name += f"_barangay{batch.barangay_id}"
+    batch.file.save(_random_filename(name), ContentFile(pdf), save=False)
+    batch.receipt_count = len(receipts)
+    return batch.receipt_count
+
+
+def queue_receipt_batch(tenant, start_date, end_date, barangay=None, user=None):
+    """
+    Create a pending ReceiptBatch and queue the task that renders it.
+
+    The task is sent once the surrounding transaction commits so the worker
+    always finds the batch row.
+    """
+    from apps.customer_subscriptions.tasks import render_receipt_batch_for_tenant
+
+    batch = ReceiptBatch.objects.create(
+        tenant=tenant,
+        start_date=start_date,
+        end_date=end_date,
+        barangay=barangay,
+        task_id=str(uuid.uuid4()),
+        requested_by=user
+    )
+    transaction.on_commit(
+        lambda: render_receipt_batch_for_tenant.apply_async(
+            args=[tenant.id, batch.id],
+            task_id=batch.task_id
+        )
+    )
+    logger.info(f"Tenant {tenant.name}: queued receipt batch {batch.id}")
+    return batch
@@ -0,0 +1,424 @@
+"""
+Set-based subscription maintenance.
+
+Expiring subscriptions one by one through save() costs several queries per
+row (status update, installation status check and audit signal). The
+functions here do the same work with a fixed number of queries per tenant.
+
+Expiry is scheduled rather than polled: every new subscription queues a run
+of the expiry task at its end_date when that falls before the next periodic
+scan, and each scan queues the runs for subscriptions ending before the one
+after it. The periodic scan itself is only a safety net for missed runs.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.admin.models import ADDITION
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from apps.audit_logs.signals import create_batch_audit_log
+from apps.customer_installations.models import CustomerInstallation
+from apps.customer_subscriptions import pricing
+from apps.customer_subscriptions.forms import BulkPaymentRowForm
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.notifications.models import NotificationOutbox
+from apps.notifications.services import queue_notifications
+from apps.reports.cache import bump_report_version
+from apps.reports.services import apply_revenue_delta, subscription_rollup_key
+from apps.subscriptions.models import SubscriptionPlan
+from apps.tenants.sequences import reserve_values
+
+logger = logging.getLogger(__name__)
+
+# How far ahead expiry runs are queued. Longer than the interval of the
+# periodic scan so consecutive scans overlap.
+EXPIRY_SCHEDULE_HORIZON = timedelta(
+    seconds=getattr(settings, 'SUBSCRIPTION_EXPIRY_SCHEDULE_HORIZON', 35 * 60)
+)
+
+# Customers are reminded when their subscription ends within this window
+EXPIRATION_REMINDER_DAYS = getattr(settings, 'EXPIRATION_REMINDER_DAYS', 3)
+EXPIRATION_REMINDER_CHANNELS = getattr(settings, 'EXPIRATION_REMINDER_CHANNELS', ('sms', 'email'))
+
+
+def refresh_paid_status(installations, now=None):
+    """
+    Recompute current_subscription and paid_until for a queryset of
+    installations with a single UPDATE.
+
+    current_subscription is the ACTIVE subscription covering `now` (the
+    latest started one if several do) and paid_until the latest end date
+    of any subscription that was not cancelled.
+    """
+    now = now or timezone.now()
+    subscriptions = CustomerSubscription.objects.filter(
+        customer_installation=OuterRef('pk')
+    ).exclude(status='CANCELLED')
+    return installations.update(
+        current_subscription=Subquery(
+            subscriptions.filter(
+                status='ACTIVE',
+                start_date__lte=now,
+                end_date__gte=now
+            ).order_by('-start_date').values('pk')[:1]
+        ),
+        paid_until=Subquery(
+            subscriptions.order_by('-end_date').values('end_date')[:1]
+        )
+    )
+
+
+def expire_subscriptions(tenant, now=None):
+    """
+    Mark every ACTIVE subscription of a tenant that ended before `now` as
+    EXPIRED, refresh the paid status of their installations and set the
+    ones left without a current subscription to INACTIVE.
+
+    Returns a tuple of (expired subscription count, deactivated installation count).
+    """
+    now = now or timezone.now()
+
+    expired = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        status='ACTIVE',
+        end_date__lt=now
+    )
+
+    with transaction.atomic():
+        expired_ids = list(expired.select_for_update().values_list('id', flat=True))
+        if not expired_ids:
+            return 0, 0
+
+        # Installations are resolved before the subscriptions flip so the
+        # lapsing subscriptions still identify which ones are affected
+        affected_ids = list(
+            CustomerInstallation.objects.filter(tenant=tenant).filter(
+                Exists(expired.filter(customer_installation=OuterRef('pk')))
+            ).values_list('id', flat=True)
+        )
+
+        updated = expired.update(status='EXPIRED', updated_at=now)
+
+        installations = CustomerInstallation.objects.filter(id__in=affected_ids)
+        refresh_paid_status(installations, now)
+
+        lapsed = installations.filter(status='ACTIVE', current_subscription__isnull=True)
+        installation_ids = list(lapsed.values_list('id', flat=True))
+        deactivated = lapsed.update(status='INACTIVE', updated_at=now)
+
+        # Queryset updates skip post_save, so audit and cache invalidation
+        # are done here once for the whole batch
+        create_batch_audit_log(
+            None, CustomerSubscription, expired_ids, 'Expired subscriptions'
+        )
+        create_batch_audit_log(
+            None, CustomerInstallation, installation_ids,
+            'Set installations to INACTIVE - no active subscriptions'
+        )
+        transaction.on_commit(lambda: bump_report_version(tenant.id))
+
+    return updated, deactivated
+
+
+def _expiry_eta(end_date):
+    """Round an end date up to the next minute so runs are shared per minute."""
+    return end_date.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+
+def _queue_expiry(tenant_id, eta):
+    """Queue one expiry run for a tenant at `eta` unless one is already queued."""
+    from apps.customer_subscriptions.tasks import update_expired_subscriptions_for_tenant
+
+    key = f'subscriptions:expiry:{tenant_id}:{int(eta.timestamp())}'
+    if not cache.add(key, True, timeout=int(EXPIRY_SCHEDULE_HORIZON.total_seconds()) + 60):
+        return
+    try:
+        update_expired_subscriptions_for_tenant.apply_async(
+            args=[tenant_id],
+            kwargs={'schedule_upcoming': False},
+            eta=eta
+        )
+    except Exception as e:
+        # The periodic scan still expires the subscription
+        cache.delete(key)
+        logger.warning(f"Could not schedule expiry for tenant {tenant_id} at {eta}: {e}")
+
+
+def schedule_expiry(subscription, now=None):
+    """
+    Queue the expiry of a subscription at its end date, once the current
+    transaction commits, if that is before the next periodic scan.
+    """
+    now = now or timezone.now()
+    if subscription.status != 'ACTIVE' or not now <= subscription.end_date < now + EXPIRY_SCHEDULE_HORIZON:
+        return
+    tenant_id = subscription.tenant_id
+    eta = _expiry_eta(subscription.end_date)
+    transaction.on_commit(lambda: _queue_expiry(tenant_id, eta))
+
+
+def schedule_upcoming_expiries(tenant, now=None):
+    """
+    Queue expiry runs for every ACTIVE subscription of a tenant ending
+    before the next periodic scan. Returns the number of runs queued.
+    """
+    now = now or timezone.now()
+    end_dates = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        status='ACTIVE',
+        end_date__gte=now,
+        end_date__lt=now + EXPIRY_SCHEDULE_HORIZON
+    ).values_list('end_date', flat=True).distinct()
+
+    etas = sorted({_expiry_eta(end_date) for end_date in end_dates})
+    for eta in etas:
+        _queue_expiry(tenant.id, eta)
+    return len(etas)
+
+
+def _expiration_reminders(tenant, row):
+    """Outbox rows reminding the customer of one expiring subscription."""
+    end_date = timezone.localtime(row['end_date'])
+    expires = f"{end_date:%b %d, %Y %I:%M %p}"
+    first_name = row['customer_installation__customer__first_name']
+    plan = row['subscription_plan__name']
+    common = {
+        'tenant': tenant,
+        'kind': 'expiration_reminder',
+        # One reminder per subscription and reminder window
+        'dedupe_key': f"expiration_reminder:{row['id']}:{EXPIRATION_REMINDER_DAYS}d",
+        'customer_id': row['customer_installation__customer_id'],
+    }
+
+    reminders = []
+    phone = row['customer_installation__customer__phone_primary']
+    if 'sms' in EXPIRATION_REMINDER_CHANNELS and phone:
+        reminders.append(NotificationOutbox(
+            channel='sms',
+            recipient=phone,
+            body=(
+                f"Hi {first_name}, your {plan} internet subscription expires on {expires}. "
+                f"Please renew to avoid interruption. - {tenant.name}"
+            ),
+            **common
+        ))
+    email = row['customer_installation__customer__email']
+    if 'email' in EXPIRATION_REMINDER_CHANNELS and email:
+        reminders.append(NotificationOutbox(
+            channel='email',
+            recipient=email,
+            subject=f"Your internet subscription expires on {end_date:%b %d, %Y}",
+            body=(
+                f"Hi {first_name},\n\n"
+                f"Your {plan} internet subscription expires on {expires}. "
+                f"Please renew before then to avoid interruption of your service.\n\n"
+                f"{tenant.name}"
+            ),
+            **common
+        ))
+    return reminders
+
+
+def queue_expiration_reminders(tenant, now=None):
+    """
+    Queue reminders for every ACTIVE subscription of a tenant ending within
+    EXPIRATION_REMINDER_DAYS whose customer has not renewed yet. Reminders
+    already queued for a subscription are skipped, so daily runs send each
+    one once. Returns the number of subscriptions reminded.
+    """
+    now = now or timezone.now()
+    expiring = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        status='ACTIVE',
+        end_date__gt=now,
+        end_date__lt=now + timedelta(days=EXPIRATION_REMINDER_DAYS)
+    ).exclude(
+        # Renewed: paid beyond this subscription
+        customer_installation__paid_until__gt=F('end_date')
+    ).values(
+        'id',
+        'end_date',
+        'subscription_plan__name',
+        'customer_installation__customer_id',
+        'customer_installation__customer__first_name',
+        'customer_installation__customer__phone_primary',
+        'customer_installation__customer__email',
+    ).order_by('id')
+
+    reminders = []
+    for row in expiring.iterator(chunk_size=2000):
+        reminders.extend(_expiration_reminders(tenant, row))
+
+    queued = queue_notifications(tenant, reminders)
+    return len({reminder.dedupe_key for reminder in queued})
+
+
+# Installations that can be paid for in bulk; lapsed (INACTIVE) ones are
+# reactivated by the payment
+PAYABLE_INSTALLATION_STATUSES = ('ACTIVE', 'INACTIVE')
+
+
+def validate_payment_rows(tenant, rows):
+    """
+    Validate bulk payment rows together, resolving every installation and
+    plan with one query each.
+
+    Returns a tuple of (valid rows, errors). Valid rows are dicts with
+    `row` (1-based position), `installation`, `plan`, `subscription_type`,
+    `amount` and `notes`; errors are dicts with `row` and a mapping of
+    field name to error messages.
+    """
+    forms = [BulkPaymentRowForm(row) for row in rows]
+    cleaned = [form.cleaned_data for form in forms if form.is_valid()]
+
+    installations = CustomerInstallation.objects.filter(
+        tenant=tenant,
+        id__in={data['installation_id'] for data in cleaned}
+    ).select_related('customer').in_bulk()
+    plans = SubscriptionPlan.objects.filter(
+        tenant=tenant,
+        id__in={data['plan_id'] for data in cleaned}
+    ).in_bulk()
+
+    valid, errors = [], []
+    for position, form in enumerate(forms, start=1):
+        if not form.is_valid():
+            errors.append({
+                'row': position,
+                'errors': {field: list(messages) for field, messages in form.errors.items()}
+            })
+            continue
+
+        data = form.cleaned_data
+        row_errors = {}
+        installation = installations.get(data['installation_id'])
+        plan = plans.get(data['plan_id'])
+        if installation is None:
+            row_errors['installation_id'] = ["Installation not found"]
+        elif installation.status not in PAYABLE_INSTALLATION_STATUSES:
+            row_errors['installation_id'] = [f"Installation is {installation.get_status_display().lower()}"]
+        if plan is None:
+            row_errors['plan_id'] = ["Plan not found"]
+        elif not plan.is_active:
+            row_errors['plan_id'] = ["Plan is not active"]
+
+        if row_errors:
+            errors.append({'row': position, 'errors': row_errors})
+            continue
+
+        valid.append({
+            'row': position,
+            'installation': installation,
+            'plan': plan,
+            'subscription_type': data['subscription_type'],
+            'amount': data['amount'] or Decimal('0'),
+            'notes': data['notes'],
+        })
+
+    return valid, errors
+
+
+def post_payments(tenant, user, rows, now=None):
+    """
+    Post many payments at once, e.g. from a collector sheet.
+
+    Rows are dicts with installation_id, plan_id, subscription_type and,
+    for custom payments, amount (notes is optional). Nothing is posted
+    unless every row is valid. Each payment starts when the installation's
+    paid time ends (or now), so several rows for one installation chain.
+
+    Returns a tuple of (created subscriptions, errors), see
+    validate_payment_rows for the error format.
+    """
+    now = now or timezone.now()
+    valid, errors = validate_payment_rows(tenant, rows)
+    if errors or not valid:
+        return [], errors
+
+    installation_ids = {row['installation'].id for row in valid}
+    installations = CustomerInstallation.objects.filter(id__in=installation_ids)
+
+    with transaction.atomic():
+        # Serialize with other postings for the same installations so the
+        # start dates chain from committed end dates
+        list(installations.select_for_update().values_list('id', flat=True))
+
+        paid_until = {}
+        has_subscriptions = set()
+        latest = CustomerSubscription.objects.filter(
+            customer_installation_id__in=installation_ids
+        ).values('customer_installation_id').annotate(
+            latest_end_date=Max('end_date', filter=~Q(status='CANCELLED'))
+        ).order_by()
+        for item in latest:
+            has_subscriptions.add(item['customer_installation_id'])
+            if item['latest_end_date']:
+                paid_until[item['customer_installation_id']] = item['latest_end_date']
+
+        receipt_date = timezone.localdate(now)
+        receipt_numbers = iter(reserve_values(tenant.id, 'receipt', receipt_date.isoformat(), len(valid)))
+
+        quotes = pricing.quote_many(
+            (row['plan'].price, row['amount'], row['subscription_type']) for row in valid
+        )
+
+        subscriptions = []
+        for row, quote in zip(valid, quotes, strict=True):
+            installation = row['installation']
+            subscription = CustomerSubscription(
+                tenant=tenant,
+                customer_installation=installation,
+                subscription_plan=row['plan'],
+                subscription_type=row['subscription_type'],
+                amount=row['amount'],
+                start_date=max(paid_until.get(installation.id, now), now),
+                notes=row['notes'],
+                created_by=user,
+                is_first_subscription=installation.id not in has_subscriptions,
+                receipt_number=CustomerSubscription.format_receipt_number(
+                    receipt_date, next(receipt_numbers)
+                ),
+            )
+            subscription.apply_quote(quote)
+            paid_until[installation.id] = subscription.end_date
+            has_subscriptions.add(installation.id)
+            subscriptions.append(subscription)
+
+        CustomerSubscription.objects.bulk_create(subscriptions)
+
+        refresh_paid_status(installations, now)
+        reactivated = installations.filter(status='INACTIVE', current_subscription__isnull=False)
+        reactivated_ids = list(reactivated.values_list('id', flat=True))
+        reactivated.update(status='ACTIVE', updated_at=now)
+
+        # bulk_create skips post_save, so the revenue rollup, audit log and
+        # report cache are updated here once for the whole batch
+        buckets = defaultdict(lambda: [0, Decimal('0')])
+        for subscription in subscriptions:
+            key = tuple(sorted(subscription_rollup_key(subscription).items()))
+            buckets[key][0] += 1
+            buckets[key][1] += subscription.amount
+        for key, (count, amount) in buckets.items():
+            apply_revenue_delta(dict(key), count, amount)
+
+        create_batch_audit_log(
+            user, CustomerSubscription, [subscription.pk for subscription in subscriptions],
+            'Posted payments in bulk', action_flag=ADDITION
+        )
+        create_batch_audit_log(
+            user, CustomerInstallation, reactivated_ids,
+            'Set installations to ACTIVE - payment posted'
+        )
+
+        for subscription in subscriptions:
+            schedule_expiry(subscription, now)
+        transaction.on_commit(lambda: bump_report_version(tenant.id))
+
+    logger.info(f"Tenant {tenant.name}: Posted {len(subscriptions)} payments in bulk")
+    return subscriptions, []
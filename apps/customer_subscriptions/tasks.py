@@ -1,7 +1,15 @@
 from celery import shared_task
+from celery_progress.backend import BaseProgressRecorder, ProgressRecorder
+from django.db import transaction
 from django.utils import timezone
-from apps.customer_subscriptions.models import CustomerSubscription
-from apps.customer_installations.models import CustomerInstallation
+from apps.customer_subscriptions.models import ReceiptBatch
+from apps.customer_subscriptions.receipts import render_receipt_batch
+from apps.customer_subscriptions.services import (
+    expire_subscriptions,
+    queue_expiration_reminders,
+    schedule_upcoming_expiries,
+)
+from apps.notifications.services import queue_dispatch
 from apps.tenants.tasks import TenantAwareTask
 from apps.tenants.context import get_current_tenant
 import logging
@@ -12,36 +20,27 @@ logger = logging.getLogger(__name__)
 class UpdateExpiredSubscriptionsTask(TenantAwareTask):
     """Tenant-aware task to update expired subscriptions."""
     
-    def run(self):
+    def run(self, schedule_upcoming=True):
         """
         Update expired subscriptions for the current tenant.
+        
+        Runs queued for a subscription's end date pass schedule_upcoming=False;
+        the periodic scan also queues runs for subscriptions ending before the
+        next scan.
         """
         tenant = get_current_tenant()
         if not tenant:
             logger.error("No tenant context available for update_expired_subscriptions")
             return "Error: No tenant context"
             
-        now = timezone.now()
+        updated_count, deactivated_count = expire_subscriptions(tenant)
         
-        # Find all active subscriptions that should be expired for this tenant
-        expired_subscriptions = CustomerSubscription.objects.filter(
-            tenant=tenant,
-            status='ACTIVE',
-            end_date__lt=now
-        )
+        if schedule_upcoming:
+            scheduled_count = schedule_upcoming_expiries(tenant)
+            logger.info(f"Tenant {tenant.name}: Scheduled {scheduled_count} upcoming expiry runs")
         
-        updated_count = 0
-        for subscription in expired_subscriptions:
-            subscription.status = 'EXPIRED'
-            subscription.save()
-            updated_count += 1
-            
-            # Check if installation should be set to INACTIVE
-            installation = subscription.customer_installation
-            if not installation.has_active_subscription:
-                installation.status = 'INACTIVE'
-                installation.save()
-                logger.info(f"Installation {installation.id} set to INACTIVE - no active subscriptions")
+        if deactivated_count:
+            logger.info(f"Tenant {tenant.name}: Set {deactivated_count} installations to INACTIVE - no active subscriptions")
         
         logger.info(f"Tenant {tenant.name}: Updated {updated_count} expired subscriptions")
         return f"Tenant {tenant.name}: Updated {updated_count} expired subscriptions"
@@ -56,72 +55,116 @@ class SendExpirationRemindersTask(TenantAwareTask):
     
     def run(self):
         """
-        Send reminders for subscriptions expiring soon for the current tenant.
+        Queue reminders for subscriptions expiring soon for the current tenant
+        and dispatch them through the notification outbox.
         """
-        from datetime import timedelta
-        
         tenant = get_current_tenant()
         if not tenant:
             logger.error("No tenant context available for send_expiration_reminders")
             return "Error: No tenant context"
         
-        now = timezone.now()
+        with transaction.atomic():
+            reminders_queued = queue_expiration_reminders(tenant)
+            if reminders_queued:
+                queue_dispatch(tenant.id)
         
-        # Find subscriptions expiring in next 3 days for this tenant
-        expiring_soon = CustomerSubscription.objects.filter(
-            tenant=tenant,
-            status='ACTIVE',
-            end_date__gt=now,
-            end_date__lt=now + timedelta(days=3)
-        )
-        
-        reminders_sent = 0
-        for subscription in expiring_soon:
-            # TODO: Implement SMS/Email notification
-            # For now, just log
-            days_left = (subscription.end_date - now).days
-            logger.info(
-                f"Tenant {tenant.name}: Subscription {subscription.id} for "
-                f"{subscription.customer_installation.customer.full_name} "
-                f"expires in {days_left} days"
-            )
-            reminders_sent += 1
-        
-        logger.info(f"Tenant {tenant.name}: Sent {reminders_sent} expiration reminders")
-        return f"Tenant {tenant.name}: Sent {reminders_sent} expiration reminders"
+        logger.info(f"Tenant {tenant.name}: Queued {reminders_queued} expiration reminders")
+        return f"Tenant {tenant.name}: Queued {reminders_queued} expiration reminders"
 
 
 # Create the shared task instance
 send_expiration_reminders = SendExpirationRemindersTask()
 
 
+class RenderReceiptBatchTask(TenantAwareTask):
+    """Tenant-aware task that renders a batch of receipts into one PDF."""
+
+    def run(self, batch_id, progress_recorder=None):
+        """
+        Render the receipts of a ReceiptBatch for the current tenant and
+        store the PDF on the batch.
+        """
+        tenant = get_current_tenant()
+        if not tenant:
+            logger.error("No tenant context available for render_receipt_batch")
+            return "Error: No tenant context"
+
+        try:
+            batch = ReceiptBatch.objects.get(id=batch_id, tenant=tenant)
+        except ReceiptBatch.DoesNotExist:
+            logger.error(f"Tenant {tenant.name}: Receipt batch {batch_id} not found")
+            return f"Error: Receipt batch {batch_id} not found"
+
+        progress = progress_recorder or BaseProgressRecorder()
+
+        batch.status = 'RUNNING'
+        batch.save(update_fields=['status', 'updated_at'])
+        progress.set_progress(0, 1, 'Collecting receipts')
+
+        try:
+            receipt_count = render_receipt_batch(batch, progress)
+        except Exception as e:
+            logger.error(f"Tenant {tenant.name}: Failed to render receipt batch {batch.id}: {e}")
+            batch.status = 'FAILURE'
+            batch.error = str(e)
+            batch.completed_at = timezone.now()
+            batch.save(update_fields=['status', 'error', 'completed_at', 'updated_at'])
+            raise
+
+        batch.status = 'SUCCESS'
+        batch.completed_at = timezone.now()
+        batch.save(update_fields=['status', 'file', 'receipt_count', 'completed_at', 'updated_at'])
+        progress.set_progress(1, 1, 'Done')
+
+        logger.info(f"Tenant {tenant.name}: Rendered {receipt_count} receipts in batch {batch.id}")
+        return f"Tenant {tenant.name}: Rendered {receipt_count} receipts in batch {batch.id}"
+
+
+# Create the shared task instance
+render_receipt_batch_task = RenderReceiptBatchTask()
+
+
 # Backward compatibility wrapper functions
 @shared_task
 def update_expired_subscriptions_all_tenants():
     """
-    Run update_expired_subscriptions for all active tenants.
+    Run update_expired_subscriptions for all active tenants, one Celery task per tenant.
     This replaces the old task that ran across all tenants.
     """
-    return update_expired_subscriptions.run_for_all_tenants()
+    return update_expired_subscriptions.fan_out_to_all_tenants(update_expired_subscriptions_for_tenant)
 
 
 @shared_task
 def send_expiration_reminders_all_tenants():
     """
-    Run send_expiration_reminders for all active tenants.
+    Run send_expiration_reminders for all active tenants, one Celery task per tenant.
     This replaces the old task that ran across all tenants.
     """
-    return send_expiration_reminders.run_for_all_tenants()
+    return send_expiration_reminders.fan_out_to_all_tenants(send_expiration_reminders_for_tenant)
 
 
 # For specific tenant execution (useful for testing or manual runs)
 @shared_task
-def update_expired_subscriptions_for_tenant(tenant_id: int):
-    """Run update_expired_subscriptions for a specific tenant."""
-    return update_expired_subscriptions.run_for_tenant(tenant_id)
+def update_expired_subscriptions_for_tenant(tenant_id: int, schedule_upcoming: bool = True):
+    """
+    Run update_expired_subscriptions for a specific tenant.
+    
+    Also queued with an ETA at subscription end dates (see services.schedule_expiry).
+    """
+    return update_expired_subscriptions.run_for_tenant(tenant_id, schedule_upcoming=schedule_upcoming)
 
 
 @shared_task
 def send_expiration_reminders_for_tenant(tenant_id: int):
     """Run send_expiration_reminders for a specific tenant."""
-    return send_expiration_reminders.run_for_tenant(tenant_id)
\ No newline at end of file
+    return send_expiration_reminders.run_for_tenant(tenant_id)
+
+
+@shared_task(bind=True)
+def render_receipt_batch_for_tenant(self, tenant_id: int, batch_id: int):
+    """Run render_receipt_batch for a specific tenant, reporting progress to celery_progress."""
+    return render_receipt_batch_task.run_for_tenant(
+        tenant_id,
+        batch_id,
+        progress_recorder=ProgressRecorder(self)
+    )
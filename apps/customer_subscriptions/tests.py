@@ -1,15 +1,43 @@
-from django.test import TestCase
-from apps.utils.test_base import TenantTestCase
-from django.utils import timezone
-from decimal import Decimal
+import json
+import os
+import shutil
+import tempfile
 from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-from apps.users.models import CustomUser
-from apps.customers.models import Customer
 from apps.barangays.models import Barangay
-from apps.subscriptions.models import SubscriptionPlan
 from apps.customer_installations.models import CustomerInstallation
-from .models import CustomerSubscription
+from apps.customers.models import Customer
+from apps.notifications.models import NotificationOutbox
+from apps.reports.models import DailyRevenueRollup
+from apps.subscriptions.models import SubscriptionPlan
+from apps.tenants.context import tenant_context
+from apps.users.models import CustomUser
+from apps.utils.pagination import encode_cursor
+from apps.utils.test_base import TenantTestCase
+
+from . import pricing
+from .models import CustomerSubscription, ReceiptBatch
+from .services import (
+    _expiry_eta,
+    expire_subscriptions,
+    post_payments,
+    queue_expiration_reminders,
+    schedule_upcoming_expiries,
+)
+from .tasks import render_receipt_batch_for_tenant, render_receipt_batch_task
 
 
 class CustomerSubscriptionModelTest(TenantTestCase):
@@ -110,3 +138,766 @@ class CustomerSubscriptionModelTest(TenantTestCase):
         self.assertEqual(preview['days'], 4)
         self.assertEqual(preview['hours'], 12)
         self.assertEqual(preview['minutes'], 0)
+
+
+class ExpiryFixturesMixin:
+    """Shared fixtures for subscription expiry tests."""
+
+    def setUp(self):
+        super().setUp()
+        self.barangay = Barangay.objects.create(name='Expiry Barangay', tenant=self.tenant)
+        self.plan = SubscriptionPlan.objects.create(
+            name='Expiry Plan',
+            speed=10,
+            price=Decimal('1000.00'),
+            tenant=self.tenant
+        )
+
+    def create_installation(self, name, tenant=None):
+        tenant = tenant or self.tenant
+        customer = Customer.objects.create(
+            first_name=name,
+            last_name='Customer',
+            email=f'{name.lower()}@example.com',
+            phone_primary='09123456789',
+            street_address='1 Expiry St',
+            barangay=self.barangay,
+            tenant=tenant
+        )
+        return CustomerInstallation.objects.create(
+            customer=customer,
+            installation_date=timezone.now().date(),
+            installation_technician=self.user,
+            status='ACTIVE',
+            tenant=tenant
+        )
+
+    def create_subscription(self, installation, start_date, plan=None):
+        return CustomerSubscription.objects.create(
+            customer_installation=installation,
+            subscription_plan=plan or self.plan,
+            subscription_type='one_month',
+            start_date=start_date,
+            created_by=self.user,
+            tenant=installation.tenant
+        )
+
+    def lapse(self, subscription):
+        """Move a subscription's end date into the past without touching its status."""
+        CustomerSubscription.objects.filter(pk=subscription.pk).update(
+            end_date=timezone.now() - timedelta(hours=1)
+        )
+
+
+class ExpireSubscriptionsTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test the set-based subscription expiry engine."""
+
+    def test_expires_lapsed_subscriptions_and_installations(self):
+        """Lapsed subscriptions expire and installations without cover go INACTIVE."""
+        lapsed = self.create_installation('Lapsed')
+        lapsed_sub = self.create_subscription(lapsed, timezone.now() - timedelta(days=1))
+        self.lapse(lapsed_sub)
+
+        renewed = self.create_installation('Renewed')
+        old_sub = self.create_subscription(renewed, timezone.now() - timedelta(days=1))
+        self.lapse(old_sub)
+        self.create_subscription(renewed, timezone.now() - timedelta(minutes=30))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            updated, deactivated = expire_subscriptions(self.tenant)
+
+        self.assertEqual((updated, deactivated), (2, 1))
+        self.assertEqual(CustomerSubscription.objects.get(pk=lapsed_sub.pk).status, 'EXPIRED')
+        self.assertEqual(CustomerSubscription.objects.get(pk=old_sub.pk).status, 'EXPIRED')
+        lapsed.refresh_from_db()
+        renewed.refresh_from_db()
+        self.assertEqual(lapsed.status, 'INACTIVE')
+        self.assertEqual(renewed.status, 'ACTIVE')
+
+    def test_other_tenants_untouched(self):
+        """Only the given tenant's subscriptions are expired."""
+        other_plan = SubscriptionPlan.objects.create(
+            name='Other Plan', speed=10, price=Decimal('1000.00'), tenant=self.other_tenant
+        )
+        other = self.create_installation('Other', tenant=self.other_tenant)
+        other_sub = self.create_subscription(other, timezone.now() - timedelta(days=1), plan=other_plan)
+        self.lapse(other_sub)
+
+        self.assertEqual(expire_subscriptions(self.tenant), (0, 0))
+        self.assertEqual(CustomerSubscription.objects.get(pk=other_sub.pk).status, 'ACTIVE')
+
+    def test_single_batched_audit_record(self):
+        """The whole batch is audited with one log entry per model."""
+        for index in range(3):
+            subscription = self.create_subscription(
+                self.create_installation(f'Batch{index}'), timezone.now() - timedelta(days=1)
+            )
+            self.lapse(subscription)
+
+        with tenant_context(self.tenant):
+            before = LogEntry.objects.count()
+            with CaptureQueriesContext(connection) as queries:
+                expire_subscriptions(self.tenant)
+
+        entries = LogEntry.objects.order_by('-id')[:LogEntry.objects.count() - before]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(
+            {entry.object_repr for entry in entries},
+            {'3 customer subscriptions', '3 Customer Installations'}
+        )
+        self.assertLess(len(queries), 20)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ScheduleExpiryTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test that expiry runs are queued for subscription end dates."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.installation = self.create_installation('Scheduled')
+
+    def create_short_subscription(self, minutes):
+        """A custom subscription ending `minutes` from now."""
+        return CustomerSubscription.objects.create(
+            customer_installation=self.installation,
+            subscription_plan=self.plan,
+            subscription_type='custom',
+            amount=self.plan.price * Decimal(minutes) / (30 * 24 * 60),
+            start_date=timezone.now(),
+            created_by=self.user,
+            tenant=self.tenant
+        )
+
+    @patch('apps.customer_subscriptions.tasks.update_expired_subscriptions_for_tenant.apply_async')
+    def test_new_subscription_queues_run_at_end_date(self, apply_async):
+        """A subscription ending before the next scan queues a run for its end date."""
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = self.create_short_subscription(10)
+
+        apply_async.assert_called_once()
+        eta = apply_async.call_args.kwargs['eta']
+        self.assertGreater(eta, subscription.end_date)
+        self.assertLessEqual(eta - subscription.end_date, timedelta(minutes=1))
+        self.assertEqual(apply_async.call_args.kwargs['args'], [self.tenant.id])
+
+    @patch('apps.customer_subscriptions.tasks.update_expired_subscriptions_for_tenant.apply_async')
+    def test_long_subscription_left_to_scan(self, apply_async):
+        """Subscriptions ending after the next scan are not queued yet."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_subscription(self.installation, timezone.now())
+
+        apply_async.assert_not_called()
+
+    @patch('apps.customer_subscriptions.tasks.update_expired_subscriptions_for_tenant.apply_async')
+    def test_scan_queues_each_minute_once(self, apply_async):
+        """The scan queues one run per end-date minute and skips runs already queued."""
+        first = self.create_short_subscription(10)
+        second = self.create_short_subscription(20)
+
+        self.assertEqual(schedule_upcoming_expiries(self.tenant), 2)
+        self.assertEqual(
+            sorted(call.kwargs['eta'] for call in apply_async.call_args_list),
+            sorted(_expiry_eta(sub.end_date) for sub in (first, second))
+        )
+
+        apply_async.reset_mock()
+        schedule_upcoming_expiries(self.tenant)
+        apply_async.assert_not_called()
+
+
+class SubscriptionListViewTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test the read-only, keyset-paginated subscription list."""
+
+    def setUp(self):
+        super().setUp()
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='view_subscription_list')
+        )
+        self.client.force_login(self.user)
+        self.installation = self.create_installation('Listed')
+
+    def test_expired_status_derived_without_writes(self):
+        """A lapsed ACTIVE subscription shows as expired and the GET writes nothing."""
+        subscription = self.create_subscription(self.installation, timezone.now() - timedelta(days=1))
+        self.lapse(subscription)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('customer_subscriptions:subscription_list'), {'status': 'EXPIRED'}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([sub.pk for sub in response.context['subscriptions']], [subscription.pk])
+        self.assertEqual(CustomerSubscription.objects.get(pk=subscription.pk).status, 'ACTIVE')
+        writes = [q['sql'] for q in queries if q['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT', 'DELETE'))]
+        writes = [sql for sql in writes if 'django_session' not in sql]
+        self.assertEqual(writes, [])
+
+    def test_only_current_tenant(self):
+        """Subscriptions of other tenants are not listed."""
+        other_plan = SubscriptionPlan.objects.create(
+            name='Other Plan', speed=10, price=Decimal('1000.00'), tenant=self.other_tenant
+        )
+        other = self.create_installation('Other', tenant=self.other_tenant)
+        self.create_subscription(other, timezone.now(), plan=other_plan)
+        mine = self.create_subscription(self.installation, timezone.now())
+
+        response = self.client.get(reverse('customer_subscriptions:subscription_list'))
+
+        self.assertEqual([sub.pk for sub in response.context['subscriptions']], [mine.pk])
+
+    def test_keyset_pages_cover_every_row_once(self):
+        """Following next and previous cursors walks the list in order."""
+        start = timezone.now() - timedelta(days=10)
+        created = [
+            self.create_subscription(self.installation, start + timedelta(hours=index % 3))
+            for index in range(60)
+        ]
+        expected = [sub.pk for sub in sorted(created, key=lambda sub: (sub.start_date, sub.pk), reverse=True)]
+
+        url = reverse('customer_subscriptions:subscription_list')
+        seen = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append(response.context['page'])
+            seen.extend(sub.pk for sub in response.context['subscriptions'])
+            url = response.context['next_url']
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+
+        response = self.client.get(reverse('customer_subscriptions:subscription_list'), {
+            'before': pages[2].previous_cursor,
+        })
+        self.assertEqual([sub.pk for sub in response.context['subscriptions']], expected[25:50])
+
+    def test_malformed_cursor_shows_first_page(self):
+        """A cursor with the wrong number of values is rejected, not truncated."""
+        subscription = self.create_subscription(self.installation, timezone.now())
+
+        for values in ([subscription.start_date], [subscription.start_date, subscription.pk, 1]):
+            response = self.client.get(
+                reverse('customer_subscriptions:subscription_list'), {'after': encode_cursor(values)}
+            )
+            self.assertEqual([sub.pk for sub in response.context['subscriptions']], [subscription.pk])
+            self.assertIsNone(response.context['page'].previous_cursor)
+
+
+class PaidStatusTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test the maintained current_subscription and paid_until columns."""
+
+    def setUp(self):
+        super().setUp()
+        self.installation = self.create_installation('Paid')
+
+    def test_creating_and_cancelling_subscriptions(self):
+        """The pointer follows new and cancelled subscriptions."""
+        first = self.create_subscription(self.installation, timezone.now() - timedelta(days=1))
+        renewal = self.create_subscription(self.installation, first.end_date)
+
+        self.installation.refresh_from_db()
+        self.assertEqual(self.installation.current_subscription, first)
+        self.assertEqual(self.installation.paid_until, renewal.end_date)
+
+        first.status = 'CANCELLED'
+        first.save()
+
+        self.installation.refresh_from_db()
+        self.assertIsNone(self.installation.current_subscription)
+        self.assertFalse(self.installation.has_active_subscription)
+        self.assertEqual(self.installation.status, 'INACTIVE')
+        self.assertEqual(self.installation.paid_until, renewal.end_date)
+
+    def test_expiry_moves_pointer_to_renewal(self):
+        """Expiring a subscription hands over to the renewal that covers now."""
+        first = self.create_subscription(self.installation, timezone.now() - timedelta(days=1))
+        self.lapse(first)
+        renewal = self.create_subscription(self.installation, timezone.now() - timedelta(minutes=30))
+        CustomerInstallation.objects.filter(pk=self.installation.pk).update(current_subscription=first)
+
+        expire_subscriptions(self.tenant)
+
+        self.installation.refresh_from_db()
+        self.assertEqual(self.installation.current_subscription, renewal)
+        self.assertEqual(self.installation.status, 'ACTIVE')
+
+    def test_stale_instance_does_not_overwrite_pointer(self):
+        """Saving an installation loaded before a payment keeps the new pointer."""
+        stale = CustomerInstallation.objects.get(pk=self.installation.pk)
+        subscription = self.create_subscription(self.installation, timezone.now())
+
+        stale.installation_notes = 'Moved router'
+        stale.save()
+
+        self.installation.refresh_from_db()
+        self.assertEqual(self.installation.current_subscription, subscription)
+        self.assertEqual(self.installation.installation_notes, 'Moved router')
+
+    def test_changing_paid_status_on_instance_raises(self):
+        """Paid status is only written by refresh_paid_status, never dropped silently."""
+        installation = CustomerInstallation.objects.get(pk=self.installation.pk)
+        installation.paid_until = timezone.now()
+
+        with self.assertRaises(ValueError):
+            installation.save()
+        with self.assertRaises(ValueError):
+            self.installation.save(update_fields=['paid_until'])
+
+    def test_backfill_command(self):
+        """The backfill command populates existing installations."""
+        subscription = self.create_subscription(self.installation, timezone.now())
+        CustomerInstallation.objects.filter(pk=self.installation.pk).update(
+            current_subscription=None, paid_until=None
+        )
+
+        call_command('backfill_paid_status', tenant_id=self.tenant.id, batch_size=1, stdout=StringIO())
+
+        self.installation.refresh_from_db()
+        self.assertEqual(self.installation.current_subscription, subscription)
+        self.assertEqual(self.installation.paid_until, subscription.end_date)
+
+
+class ActiveSubscriptionsViewTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test the SQL-filtered, paginated active subscriptions page."""
+
+    def setUp(self):
+        super().setUp()
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='view_subscription_list')
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('customer_subscriptions:active_subscriptions')
+
+    def get_names(self, response):
+        return [data['installation'].customer.first_name for data in response.context['installations_data']]
+
+    def test_latest_subscription_search_and_sort(self):
+        """Rows show the latest-ending subscription, filtered and sorted in SQL."""
+        short = self.create_installation('Shorty')
+        self.create_subscription(short, timezone.now() - timedelta(days=20))
+        long = self.create_installation('Longo')
+        first = self.create_subscription(long, timezone.now() - timedelta(days=1))
+        renewal = self.create_subscription(long, first.end_date)
+
+        response = self.client.get(self.url, {'sort': 'expiring'})
+        self.assertEqual(self.get_names(response), ['Shorty', 'Longo'])
+        self.assertEqual(response.context['installations_data'][1]['current_subscription'], renewal)
+
+        response = self.client.get(self.url, {'sort': '-expiring'})
+        self.assertEqual(self.get_names(response), ['Longo', 'Shorty'])
+
+        response = self.client.get(self.url, {'search': 'shor'})
+        self.assertEqual(self.get_names(response), ['Shorty'])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """A page costs the same number of queries however many rows exist."""
+        self.create_subscription(self.create_installation('Only'), timezone.now())
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(self.url)
+
+        for index in range(30):
+            self.create_subscription(self.create_installation(f'Many{index}'), timezone.now())
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.context['installations_data']), 25)
+        self.assertEqual(response.context['page_obj'].paginator.count, 31)
+        self.assertEqual(len(many), len(baseline))
+
+
+class ReceiptTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test stored receipt PDFs and background receipt batches."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        html = patch('apps.customer_subscriptions.receipts.HTML')
+        self.html = html.start()
+        self.addCleanup(html.stop)
+        self.html.return_value.write_pdf.return_value = b'%PDF-1.4 receipt'
+
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='generate_receipt')
+        )
+        self.client.force_login(self.user)
+        self.subscription = self.create_subscription(
+            self.create_installation('Receipted'), timezone.now()
+        )
+
+    def test_receipt_rendered_once(self):
+        """The first print stores the PDF and its number; reprints are served from storage."""
+        url = reverse('customer_subscriptions:generate_receipt', args=[self.subscription.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 receipt')
+
+        self.subscription.refresh_from_db()
+        receipt_date = timezone.localtime(self.subscription.created_at).strftime('%Y-%m-%d')
+        self.assertEqual(self.subscription.receipt_number, f'AR-{receipt_date}-0001')
+        self.assertTrue(self.subscription.receipt_file.name.startswith(f'receipts/{self.tenant.id}/'))
+        self.assertIn(self.subscription.receipt_number, response['Content-Disposition'])
+
+        response = self.client.get(url)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 receipt')
+        self.assertEqual(self.html.call_count, 1)
+
+    def test_receipt_numbers_assigned_per_tenant_and_day(self):
+        """Payments are numbered as they are recorded, restarting per tenant."""
+        second = self.create_subscription(self.create_installation('Second'), timezone.now())
+        other = self.create_subscription(
+            self.create_installation('Foreign', tenant=self.other_tenant), timezone.now()
+        )
+
+        prefix = f"AR-{timezone.localdate().isoformat()}"
+        self.assertEqual(self.subscription.receipt_number, f'{prefix}-0001')
+        self.assertEqual(second.receipt_number, f'{prefix}-0002')
+        self.assertEqual(other.receipt_number, f'{prefix}-0001')
+
+    def test_receipt_of_other_tenant_not_found(self):
+        """Receipts of another tenant's subscriptions are not served."""
+        other = self.create_subscription(
+            self.create_installation('Foreign', tenant=self.other_tenant), timezone.now()
+        )
+        response = self.client.get(
+            reverse('customer_subscriptions:generate_receipt', args=[other.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.html.assert_not_called()
+
+    def test_batch_renders_one_pdf(self):
+        """A batch renders every receipt of the period into one stored PDF."""
+        self.create_subscription(self.create_installation('Second'), timezone.now())
+        today = timezone.localdate()
+
+        with (
+            patch.object(render_receipt_batch_for_tenant, 'apply_async') as apply_async,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            response = self.client.post(
+                reverse('customer_subscriptions:receipt_batch_create'),
+                {'start_date': today, 'end_date': today}
+            )
+
+        batch = ReceiptBatch.objects.get(tenant=self.tenant)
+        self.assertRedirects(
+            response, reverse('customer_subscriptions:receipt_batch_detail', args=[batch.pk])
+        )
+        apply_async.assert_called_once_with(args=[self.tenant.id, batch.id], task_id=batch.task_id)
+
+        render_receipt_batch_task.run_for_tenant(self.tenant.id, batch.id)
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'SUCCESS')
+        self.assertEqual(batch.receipt_count, 2)
+        self.assertEqual(self.html.call_count, 1)
+        self.assertEqual(
+            CustomerSubscription.objects.filter(tenant=self.tenant, receipt_number='').count(), 0
+        )
+
+        response = self.client.get(
+            reverse('customer_subscriptions:receipt_batch_download', args=[batch.pk])
+        )
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 receipt')
+
+
+class ExpirationReminderTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test queueing expiration reminders into the notification outbox."""
+
+    def expiring(self, name, tenant=None):
+        """A subscription of a new installation ending in two days."""
+        installation = self.create_installation(name, tenant=tenant)
+        return self.create_subscription(installation, timezone.now() - timedelta(days=28))
+
+    def test_reminders_queued_once_per_subscription(self):
+        """Each expiring subscription gets one SMS and one email, even when the run repeats."""
+        subscription = self.expiring('Soon')
+        self.create_subscription(self.create_installation('Later'), timezone.now())
+        self.expiring('Foreign', tenant=self.other_tenant)
+
+        self.assertEqual(queue_expiration_reminders(self.tenant), 1)
+        reminders = NotificationOutbox.objects.filter(tenant=self.tenant)
+        self.assertEqual(
+            sorted(reminders.values_list('channel', 'recipient')),
+            [('email', 'soon@example.com'), ('sms', '09123456789')]
+        )
+        self.assertTrue(all(str(subscription.pk) in reminder.dedupe_key for reminder in reminders))
+        self.assertIn('Expiry Plan', reminders.get(channel='sms').body)
+
+        self.assertEqual(queue_expiration_reminders(self.tenant), 0)
+        self.assertEqual(NotificationOutbox.objects.filter(tenant=self.tenant).count(), 2)
+
+    def test_renewed_customers_not_reminded(self):
+        """A subscription followed by a renewal does not trigger a reminder."""
+        subscription = self.expiring('Renewed')
+        self.create_subscription(subscription.customer_installation, subscription.end_date)
+
+        self.assertEqual(queue_expiration_reminders(self.tenant), 0)
+
+    def test_recipients_selected_in_one_query(self):
+        """Selecting recipients costs the same queries however many expire."""
+        self.expiring('First')
+        with CaptureQueriesContext(connection) as few:
+            queue_expiration_reminders(self.tenant)
+
+        for index in range(10):
+            self.expiring(f'Many{index}')
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(queue_expiration_reminders(self.tenant), 10)
+
+        self.assertEqual(len(many), len(few))
+
+
+class BulkPostPaymentsTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test posting many payments at once."""
+
+    def row(self, installation, subscription_type='one_month', **kwargs):
+        return {
+            'installation_id': installation.pk,
+            'plan_id': self.plan.pk,
+            'subscription_type': subscription_type,
+            **kwargs
+        }
+
+    def test_payments_chain_from_latest_end_date(self):
+        """Rows start where the installation's paid time ends and chain within the batch."""
+        paying = self.create_installation('Paying')
+        existing = self.create_subscription(paying, timezone.now())
+        lapsed = self.create_installation('Lapsed')
+        CustomerInstallation.objects.filter(pk=lapsed.pk).update(status='INACTIVE')
+
+        subscriptions, errors = post_payments(self.tenant, self.user, [
+            self.row(paying),
+            self.row(paying, 'custom', amount='500'),
+            self.row(lapsed, 'fifteen_days'),
+        ])
+
+        self.assertEqual(errors, [])
+        first, second, third = subscriptions
+        self.assertEqual(first.start_date, existing.end_date)
+        self.assertEqual(second.start_date, first.end_date)
+        self.assertEqual(second.days_added, Decimal('15'))
+        self.assertEqual(third.amount, Decimal('500.00'))
+        self.assertFalse(first.is_first_subscription)
+        self.assertTrue(third.is_first_subscription)
+
+        prefix = f"AR-{timezone.localdate().isoformat()}"
+        self.assertEqual(
+            [subscription.receipt_number for subscription in subscriptions],
+            [f'{prefix}-0002', f'{prefix}-0003', f'{prefix}-0004']
+        )
+
+        paying.refresh_from_db()
+        lapsed.refresh_from_db()
+        self.assertEqual(paying.paid_until, second.end_date)
+        self.assertEqual(lapsed.status, 'ACTIVE')
+        self.assertEqual(lapsed.current_subscription_id, third.pk)
+
+        rollup = DailyRevenueRollup.objects.get(tenant=self.tenant, subscription_type='one_month')
+        self.assertEqual(rollup.subscription_count, 2)
+        self.assertEqual(rollup.total_amount, Decimal('2000.00'))
+
+    def test_invalid_rows_reported_and_nothing_posted(self):
+        """Any invalid row rejects the whole batch with errors per row."""
+        installation = self.create_installation('Valid')
+        foreign = self.create_installation('Foreign', tenant=self.other_tenant)
+
+        subscriptions, errors = post_payments(self.tenant, self.user, [
+            self.row(installation),
+            self.row(installation, 'weekly'),
+            self.row(foreign),
+            self.row(installation, 'custom'),
+        ])
+
+        self.assertEqual(subscriptions, [])
+        self.assertEqual([error['row'] for error in errors], [2, 3, 4])
+        self.assertIn('subscription_type', errors[0]['errors'])
+        self.assertEqual(errors[1]['errors'], {'installation_id': ['Installation not found']})
+        self.assertIn('amount', errors[2]['errors'])
+        self.assertFalse(CustomerSubscription.objects.filter(tenant=self.tenant).exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Posting costs the same number of queries however many rows are posted."""
+        installations = [self.create_installation(f'Bulk{index}') for index in range(13)]
+        # The first posting of the day also creates the counter and rollup rows
+        post_payments(self.tenant, self.user, [self.row(installations[0])])
+
+        with CaptureQueriesContext(connection) as few:
+            post_payments(self.tenant, self.user, [self.row(installation) for installation in installations[1:3]])
+        with CaptureQueriesContext(connection) as many:
+            subscriptions, errors = post_payments(
+                self.tenant, self.user, [self.row(installation) for installation in installations[3:]]
+            )
+
+        self.assertEqual(len(subscriptions), 10)
+        self.assertEqual(len(many), len(few))
+
+    def test_bulk_payments_api(self):
+        """The API posts the rows and returns the created payments."""
+        self.user.user_permissions.add(Permission.objects.get(codename='create_subscription'))
+        self.client.force_login(self.user)
+        installation = self.create_installation('Api')
+        url = reverse('customer_subscriptions:api_bulk_post_payments')
+
+        response = self.client.post(
+            url, json.dumps({'rows': [self.row(installation), self.row(installation)]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(data['subscriptions'][1]['start_date'], data['subscriptions'][0]['end_date'])
+
+        response = self.client.post(
+            url, json.dumps({'rows': [self.row(installation, plan_id=0)]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['row'], 1)
+
+    def test_post_payments_command(self):
+        """The command posts a CSV file and refuses it when a row is invalid."""
+        installation = self.create_installation('Sheet')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'payments.csv')
+
+        with open(path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write('installation_id,plan_id,subscription_type,amount,notes\n')
+            csv_file.write(f'{installation.pk},{self.plan.pk},one_month,,\n')
+            csv_file.write(f'{installation.pk},{self.plan.pk},custom,,\n')
+        with self.assertRaises(CommandError):
+            call_command('post_payments', path, tenant_id=self.tenant.id, user='testuser', stdout=StringIO())
+        self.assertFalse(CustomerSubscription.objects.filter(tenant=self.tenant).exists())
+
+        with open(path, 'w', encoding='utf-8') as csv_file:
+            csv_file.write('installation_id,plan_id,subscription_type,amount,notes\n')
+            csv_file.write(f'{installation.pk},{self.plan.pk},one_month,,Collector sheet 12\n')
+        out = StringIO()
+        call_command('post_payments', path, tenant_id=self.tenant.id, user='testuser', stdout=out)
+        self.assertIn('Posted 1 payments', out.getvalue())
+        self.assertEqual(CustomerSubscription.objects.get(tenant=self.tenant).notes, 'Collector sheet 12')
+
+
+def legacy_quote(plan_price, amount, subscription_type, start_date):
+    """The per-row calculation the pricing engine replaced, kept as the reference."""
+    if subscription_type == 'one_month':
+        days_added = Decimal('30')
+        amount = plan_price
+    elif subscription_type == 'fifteen_days':
+        days_added = Decimal('15')
+        amount = plan_price / 2
+    else:
+        days_added = (amount / plan_price) * 30
+
+    days = int(days_added)
+    hours = (days_added - days) * 24
+    minutes = (hours - int(hours)) * 60
+    end_date = start_date + timedelta(days=days, hours=int(hours), minutes=int(minutes))
+    display = f"{days} days, {int(hours)} hours, {int(minutes)} minutes"
+    return amount, days_added, end_date, display
+
+
+class PricingTest(ExpiryFixturesMixin, TenantTestCase):
+    """Test the shared pricing engine against the per-row calculation."""
+
+    PRICES = [Decimal('999.00'), Decimal('1000.00'), Decimal('1299.50'), Decimal('2500.00')]
+    AMOUNTS = [Decimal('0.01'), Decimal('1.00'), Decimal('33.33'), Decimal('150.00'),
+               Decimal('499.99'), Decimal('1000.00'), Decimal('3750.25')]
+
+    def test_matches_per_row_calculation(self):
+        """Amounts, days and display agree with the per-row logic; end dates only gain the seconds."""
+        start_date = timezone.now()
+        inputs = [
+            (price, amount, subscription_type)
+            for price in self.PRICES
+            for amount in self.AMOUNTS
+            for subscription_type in ('one_month', 'fifteen_days', 'custom')
+        ]
+
+        for (price, amount, subscription_type), quote in zip(inputs, pricing.quote_many(inputs), strict=True):
+            with self.subTest(price=price, amount=amount, subscription_type=subscription_type):
+                legacy_amount, days_added, end_date, display = legacy_quote(
+                    price, amount, subscription_type, start_date
+                )
+                self.assertEqual(quote.amount, legacy_amount)
+                self.assertEqual(quote.days_added, days_added)
+                self.assertEqual(quote.display, display)
+                self.assertGreaterEqual(quote.end_date(start_date), end_date)
+                self.assertLess(quote.end_date(start_date) - end_date, timedelta(minutes=1))
+
+    def test_custom_end_date_keeps_seconds(self):
+        """A custom payment buys service time to the second."""
+        quote = pricing.quote(Decimal('1000.00'), Decimal('1.00'), 'custom')
+        # 1/1000 of 30 days is 43 minutes 12 seconds
+        self.assertEqual(quote.duration, timedelta(minutes=43, seconds=12))
+
+    def test_fixed_types_ignore_amount(self):
+        self.assertEqual(
+            pricing.quote(Decimal('1000.00'), Decimal('1.00'), 'fifteen_days'),
+            pricing.quote(Decimal('1000.00'), None, 'fifteen_days')
+        )
+
+    def test_model_uses_engine(self):
+        installation = self.create_installation('Priced')
+        start_date = timezone.now()
+        subscription = CustomerSubscription.objects.create(
+            customer_installation=installation,
+            subscription_plan=self.plan,
+            subscription_type='custom',
+            amount=Decimal('333.33'),
+            start_date=start_date,
+            created_by=self.user,
+            tenant=self.tenant
+        )
+        quote = pricing.quote(self.plan.price, Decimal('333.33'), 'custom')
+        self.assertEqual(subscription.end_date, quote.end_date(start_date))
+
+    def test_preview_matrix(self):
+        """The matrix previews every type of every plan and each custom amount."""
+        other_plan = SubscriptionPlan.objects.create(
+            name='Matrix Plan', speed=50, price=Decimal('1500.00'), tenant=self.tenant
+        )
+        matrix = pricing.preview_matrix([self.plan, other_plan], amounts=[Decimal('500')])
+
+        self.assertEqual(set(matrix), {self.plan.id, other_plan.id})
+        previews = matrix[other_plan.id]
+        self.assertEqual(previews['one_month']['amount'], 1500.0)
+        self.assertEqual(previews['fifteen_days']['amount'], 750.0)
+        self.assertEqual(previews['custom']['500.00']['display'], '10 days, 0 hours, 0 minutes')
+        self.assertEqual(
+            previews['custom']['500.00'],
+            CustomerSubscription.calculate_preview(other_plan.price, Decimal('500'), 'custom')
+        )
+
+    def test_preview_matrix_api(self):
+        self.user.user_permissions.add(Permission.objects.get(codename='create_subscription'))
+        self.client.force_login(self.user)
+        url = reverse('customer_subscriptions:api_preview_matrix')
+
+        response = self.client.get(url, {'amounts': '250,500'})
+        self.assertEqual(response.status_code, 200)
+        previews = response.json()['plans'][str(self.plan.id)]
+        self.assertEqual(set(previews['custom']), {'250.00', '500.00'})
+        self.assertEqual(previews['custom']['250.00']['total_seconds'], 7 * 86400 + 12 * 3600)
+
+        for amounts in ('abc', '-5', 'NaN'):
+            with self.subTest(amounts=amounts):
+                response = self.client.get(url, {'amounts': amounts})
+                self.assertEqual(response.status_code, 400)
+
+    def test_preview_matrix_api_scoped_to_tenant(self):
+        other_plan = SubscriptionPlan.objects.create(
+            name='Other Plan', speed=10, price=Decimal('1000.00'), tenant=self.other_tenant
+        )
+        self.user.user_permissions.add(Permission.objects.get(codename='create_subscription'))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('customer_subscriptions:api_preview_matrix'))
+        self.assertNotIn(str(other_plan.id), response.json()['plans'])
@@ -11,10 +11,15 @@ urlpatterns = [
     path('<int:pk>/', views.subscription_detail, name='subscription_detail'),
     path('<int:pk>/cancel/', views.subscription_cancel, name='subscription_cancel'),
     path('<int:subscription_id>/receipt/', views.generate_receipt, name='generate_receipt'),
+    path('receipts/', views.receipt_batch_create, name='receipt_batch_create'),
+    path('receipts/<int:pk>/', views.receipt_batch_detail, name='receipt_batch_detail'),
+    path('receipts/<int:pk>/download/', views.receipt_batch_download, name='receipt_batch_download'),
     path('customer/<int:customer_id>/history/', views.customer_payment_history, name='payment_history'),
     
     # API endpoints
     path('api/latest-subscription/', views.api_get_latest_subscription, name='api_latest_subscription'),
     path('api/calculate-preview/', views.api_calculate_preview, name='api_calculate_preview'),
     path('api/plan-price/', views.api_get_plan_price, name='api_plan_price'),
+    path('api/preview-matrix/', views.api_preview_matrix, name='api_preview_matrix'),
+    path('api/bulk-payments/', views.api_bulk_post_payments, name='api_bulk_post_payments'),
 ]
@@ -1,18 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, JsonResponse
 from django.utils import timezone
-from django.db.models import Q, Prefetch
-from django.template.loader import render_to_string
+from django.core.paginator import Paginator
+from django.views.decorators.http import require_POST
+from django.db.models import Case, CharField, F, OuterRef, Prefetch, Q, Subquery, Value, When
 from decimal import Decimal
 import json
-from weasyprint import HTML
 import tempfile
 from apps.tenants.mixins import tenant_required
+from apps.utils.pagination import keyset_paginate
 
-from .models import CustomerSubscription
-from .forms import CustomerSubscriptionForm
+from .models import CustomerSubscription, ReceiptBatch
+from .forms import CustomerSubscriptionForm, ReceiptBatchForm
+from .receipts import get_receipt_file, queue_receipt_batch
+from .services import post_payments
+from . import pricing
 from apps.customer_installations.models import CustomerInstallation
 from apps.subscriptions.models import SubscriptionPlan
 
@@ -22,11 +26,20 @@ from apps.subscriptions.models import SubscriptionPlan
 @permission_required('customer_subscriptions.view_subscription_list', raise_exception=True)
 def subscription_list(request):
     """List all customer subscriptions with filtering."""
-    subscriptions = CustomerSubscription.objects.select_related(
+    # Expired status is derived when reading; the expiry task persists it
+    subscriptions = CustomerSubscription.objects.filter(
+        tenant=request.tenant
+    ).select_related(
         'customer_installation__customer',
         'subscription_plan',
         'created_by'
-    ).order_by('-start_date')
+    ).annotate(
+        current_status=Case(
+            When(status='ACTIVE', end_date__lt=timezone.now(), then=Value('EXPIRED')),
+            default=F('status'),
+            output_field=CharField()
+        )
+    )
     
     # Search functionality
     search_query = request.GET.get('search', '')
@@ -40,21 +53,27 @@ def subscription_list(request):
     # Filter by status
     status_filter = request.GET.get('status', '')
     if status_filter:
-        subscriptions = subscriptions.filter(status=status_filter)
+        subscriptions = subscriptions.filter(current_status=status_filter)
     
     # Filter by subscription type
     type_filter = request.GET.get('subscription_type', '')
     if type_filter:
         subscriptions = subscriptions.filter(subscription_type=type_filter)
     
-    # Update expired subscriptions
-    for sub in subscriptions:
-        sub.update_status()
-        if sub.status == 'EXPIRED':
-            sub.save()
+    # Keyset pagination, newest first
+    page = keyset_paginate(
+        subscriptions,
+        ('-start_date', '-id'),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        per_page=25
+    )
     
     context = {
-        'subscriptions': subscriptions,
+        'subscriptions': page,
+        'page': page,
+        'next_url': _page_url(request, after=page.next_cursor) if page.has_next else None,
+        'previous_url': _page_url(request, before=page.previous_cursor) if page.has_previous else None,
         'search_query': search_query,
         'status_filter': status_filter,
         'type_filter': type_filter,
@@ -66,6 +85,15 @@ def subscription_list(request):
     return render(request, 'customer_subscriptions/subscription_list.html', context)
 
 
+def _page_url(request, **cursor):
+    """URL of the current list with the filters kept and the given page cursor."""
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    query.update(cursor)
+    return f'{request.path}?{query.urlencode()}'
+
+
 @login_required
 @tenant_required
 @permission_required('customer_subscriptions.create_subscription', raise_exception=True)
@@ -103,8 +131,15 @@ def subscription_create(request):
     else:
         form = CustomerSubscriptionForm(initial=initial, user=request.user, tenant=request.tenant)
     
+    # Previews of all plans, so the form only asks the server for custom amounts
+    preview_matrix = pricing.preview_matrix(
+        SubscriptionPlan.objects.filter(tenant=request.tenant, is_active=True),
+        amounts=()
+    )
+    
     context = {
         'form': form,
+        'preview_matrix': preview_matrix,
         'title': 'Create Subscription',
         'submit_text': 'Create Subscription',
         'active_tab': 'subscriptions',
@@ -213,20 +248,8 @@ def api_calculate_preview(request):
             tenant=request.tenant
         )
         
-        # Calculate preview
-        preview = CustomerSubscription.calculate_preview(
-            plan.price,
-            amount,
-            subscription_type
-        )
-        
-        # Add formatted amount based on type
-        if subscription_type == 'one_month':
-            preview['amount'] = float(plan.price)
-        elif subscription_type == 'fifteen_days':
-            preview['amount'] = float(plan.price / 2)
-        else:
-            preview['amount'] = float(amount)
+        # Calculate preview, including the amount charged for the type
+        preview = pricing.quote(plan.price, amount, subscription_type).as_preview()
         
         return JsonResponse(preview)
         
@@ -236,6 +259,74 @@ def api_calculate_preview(request):
         return JsonResponse({'error': str(e)}, status=400)
 
 
+# Custom amounts one preview matrix request may ask for
+MAX_PREVIEW_AMOUNTS = 50
+
+
+@login_required
+@tenant_required
+@permission_required('customer_subscriptions.create_subscription', raise_exception=True)
+def api_preview_matrix(request):
+    """
+    Previews of every payment type for all active plans in one response,
+    with custom payments previewed for the comma-separated `amounts`.
+    """
+    amounts = pricing.COMMON_AMOUNTS
+    if request.GET.get('amounts'):
+        try:
+            amounts = [Decimal(amount) for amount in request.GET['amounts'].split(',')]
+        except ArithmeticError:
+            return JsonResponse({'error': 'Invalid amounts'}, status=400)
+        if len(amounts) > MAX_PREVIEW_AMOUNTS:
+            return JsonResponse({'error': f'At most {MAX_PREVIEW_AMOUNTS} amounts can be previewed'}, status=400)
+        if any(not amount.is_finite() or amount <= 0 for amount in amounts):
+            return JsonResponse({'error': 'Amounts must be greater than 0'}, status=400)
+    
+    plans = SubscriptionPlan.objects.filter(tenant=request.tenant, is_active=True)
+    return JsonResponse({'plans': pricing.preview_matrix(plans, amounts)})
+
+
+@login_required
+@tenant_required
+@permission_required('customer_subscriptions.create_subscription', raise_exception=True)
+@require_POST
+def api_bulk_post_payments(request):
+    """
+    Post many payments at once from a JSON body of the form
+    {"rows": [{"installation_id", "plan_id", "subscription_type", "amount", "notes"}, ...]}.
+    
+    Nothing is posted unless every row is valid; errors are reported per row.
+    """
+    try:
+        rows = json.loads(request.body).get('rows')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    
+    if not isinstance(rows, list) or not rows:
+        return JsonResponse({'error': 'No rows provided'}, status=400)
+    if not all(isinstance(row, dict) for row in rows):
+        return JsonResponse({'error': 'Every row must be an object'}, status=400)
+    
+    subscriptions, errors = post_payments(request.tenant, request.user, rows)
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+    
+    return JsonResponse({
+        'created': len(subscriptions),
+        'subscriptions': [
+            {
+                'row': position,
+                'id': subscription.pk,
+                'receipt_number': subscription.receipt_number,
+                'amount': float(subscription.amount),
+                'start_date': subscription.start_date.isoformat(),
+                'end_date': subscription.end_date.isoformat(),
+            }
+            for position, subscription in enumerate(subscriptions, start=1)
+        ]
+    }, status=201)
+
+
 @login_required
 @tenant_required
 @permission_required('customer_subscriptions.view_subscription_list', raise_exception=True)
@@ -261,62 +352,82 @@ def api_get_plan_price(request):
         return JsonResponse({'error': 'Plan not found'}, status=404)
 
 
+# Orderings offered on the active subscriptions page
+ACTIVE_SUBSCRIPTION_SORTS = {
+    'installed': ('-installation_date', '-pk'),
+    'expiring': ('latest_end_date', 'pk'),
+    '-expiring': ('-latest_end_date', '-pk'),
+}
+
+
 @login_required
 @tenant_required
 @permission_required('customer_subscriptions.view_subscription_list', raise_exception=True)
 def active_subscriptions(request):
     """View all active subscriptions per customer."""
-    # Get all active installations with current active subscriptions
+    # Latest-ending active subscription of each installation
+    latest_subscription = CustomerSubscription.objects.filter(
+        customer_installation=OuterRef('pk'),
+        status='ACTIVE'
+    ).order_by('-end_date', '-pk')
+    
     active_installations = CustomerInstallation.objects.filter(
         tenant=request.tenant, 
         status='ACTIVE'
+    ).annotate(
+        latest_end_date=Subquery(latest_subscription.values('end_date')[:1]),
+        latest_subscription_id=Subquery(latest_subscription.values('pk')[:1])
+    ).filter(
+        latest_end_date__isnull=False
     ).select_related(
         'customer',
         'installation_technician',
         'nap__splitter__lcp'
-    ).prefetch_related(
-        Prefetch(
-            'subscriptions',
-            queryset=CustomerSubscription.objects.filter(
-                tenant=request.tenant, 
-                status='ACTIVE'
-            ).select_related('subscription_plan').order_by('-end_date'),
-            to_attr='active_subscriptions'
-        )
     )
     
-    # Build list of installations with active subscriptions
-    installations_data = []
-    for installation in active_installations:
-        if installation.active_subscriptions:
-            # Get the current active subscription (latest end date)
-            current_sub = installation.active_subscriptions[0]
-            
-            # Use the model's time_remaining_display property
-            days_remaining = current_sub.days_remaining
-            
-            installations_data.append({
-                'installation': installation,
-                'current_subscription': current_sub,
-                'days_remaining': days_remaining,
-                'days_remaining_display': current_sub.time_remaining_display
-            })
-    
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        filtered_data = []
-        for data in installations_data:
-            customer = data['installation'].customer
-            if (search_query.lower() in customer.first_name.lower() or
-                search_query.lower() in customer.last_name.lower() or
-                search_query.lower() in customer.email.lower()):
-                filtered_data.append(data)
-        installations_data = filtered_data
+        active_installations = active_installations.filter(
+            Q(customer__first_name__icontains=search_query) |
+            Q(customer__last_name__icontains=search_query) |
+            Q(customer__email__icontains=search_query)
+        )
+    
+    # Sorting, by remaining time or installation date
+    sort = request.GET.get('sort', '')
+    if sort not in ACTIVE_SUBSCRIPTION_SORTS:
+        sort = 'installed'
+    active_installations = active_installations.order_by(*ACTIVE_SUBSCRIPTION_SORTS[sort])
+    
+    # Pagination
+    paginator = Paginator(active_installations, 25)
+    page_obj = paginator.get_page(request.GET.get('page', 1))
+    
+    # Load the subscriptions shown on this page in one query
+    subscriptions = CustomerSubscription.objects.select_related('subscription_plan').in_bulk(
+        [installation.latest_subscription_id for installation in page_obj]
+    )
+    
+    installations_data = []
+    for installation in page_obj:
+        current_sub = subscriptions[installation.latest_subscription_id]
+        installations_data.append({
+            'installation': installation,
+            'current_subscription': current_sub,
+            'days_remaining': current_sub.days_remaining,
+            'days_remaining_display': current_sub.time_remaining_display
+        })
+    
+    query = request.GET.copy()
+    query.pop('page', None)
     
     context = {
         'installations_data': installations_data,
+        'page_obj': page_obj,
         'search_query': search_query,
+        'sort': sort,
+        'page_query': query.urlencode(),
         'active_tab': 'active_subscriptions',
         'current_time': timezone.now(),
     }
@@ -376,44 +487,83 @@ def customer_payment_history(request, customer_id):
 @tenant_required
 @permission_required('customer_subscriptions.generate_receipt', raise_exception=True)
 def generate_receipt(request, subscription_id):
-    """Generate official receipt for a subscription payment."""
+    """
+    Serve the official receipt for a subscription payment.
+    
+    The PDF is rendered on first print and served from storage afterwards.
+    """
     subscription = get_object_or_404(
-        CustomerSubscription.objects.select_related(
-            'customer_installation__customer',
-            'customer_installation__nap__splitter__lcp',
-            'subscription_plan',
-            'created_by'
-        ),
-        id=subscription_id
+        CustomerSubscription,
+        id=subscription_id,
+        tenant=request.tenant
     )
     
-    # Generate receipt number (format: AR-YYYY-MMDD-XXXX)
-    receipt_date = subscription.created_at
-    receipt_count = CustomerSubscription.objects.filter(tenant=request.tenant, 
-        created_at__date=receipt_date.date(),
-        created_at__lt=receipt_date
-    ).count() + 1
-    receipt_number = f"AR-{receipt_date.strftime('%Y-%m-%d')}-{receipt_count:04d}"
+    receipt_file = get_receipt_file(subscription)
+    return FileResponse(
+        receipt_file.open('rb'),
+        content_type='application/pdf',
+        as_attachment=False,
+        filename=f"receipt_{subscription.receipt_number}.pdf"
+    )
+
+
+@login_required
+@tenant_required
+@permission_required('customer_subscriptions.generate_receipt', raise_exception=True)
+def receipt_batch_create(request):
+    """Request the receipts of a period, optionally for one barangay, as one PDF."""
+    if request.method == 'POST':
+        form = ReceiptBatchForm(request.POST, tenant=request.tenant)
+        if form.is_valid():
+            batch = queue_receipt_batch(
+                request.tenant,
+                form.cleaned_data['start_date'],
+                form.cleaned_data['end_date'],
+                barangay=form.cleaned_data['barangay'],
+                user=request.user
+            )
+            return redirect('customer_subscriptions:receipt_batch_detail', pk=batch.pk)
+    else:
+        form = ReceiptBatchForm(tenant=request.tenant)
     
     context = {
-        'subscription': subscription,
-        'receipt_number': receipt_number,
-        'company_name': 'Your ISP Company Name',
-        'company_address': '123 Main Street, Cagayan de Oro City',
-        'company_phone': '(088) 123-4567',
-        'company_email': 'billing@yourisp.com',
-        'print_datetime': timezone.now(),  # Add current datetime for printing
+        'form': form,
+        'batches': ReceiptBatch.objects.filter(
+            tenant=request.tenant
+        ).select_related('barangay', 'requested_by')[:10],
+        'active_tab': 'subscriptions',
     }
+    return render(request, 'customer_subscriptions/receipt_batch_form.html', context)
+
+
+@login_required
+@tenant_required
+@permission_required('customer_subscriptions.generate_receipt', raise_exception=True)
+def receipt_batch_detail(request, pk):
+    """Show the progress of a receipt batch and link to its PDF when done."""
+    batch = get_object_or_404(
+        ReceiptBatch.objects.select_related('barangay'),
+        pk=pk,
+        tenant=request.tenant
+    )
     
-    # Generate PDF
-    html_string = render_to_string('customer_subscriptions/receipts/official_receipt.html', context)
-    html = HTML(string=html_string)
-    
-    # Create a temporary file
-    result = html.write_pdf()
-    
-    # Create the HTTP response
-    response = HttpResponse(result, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="receipt_{receipt_number}.pdf"'
-    
-    return response
+    context = {
+        'batch': batch,
+        'active_tab': 'subscriptions',
+    }
+    return render(request, 'customer_subscriptions/receipt_batch_detail.html', context)
+
+
+@login_required
+@tenant_required
+@permission_required('customer_subscriptions.generate_receipt', raise_exception=True)
+def receipt_batch_download(request, pk):
+    """Download the PDF of a finished receipt batch."""
+    batch = get_object_or_404(ReceiptBatch, pk=pk, tenant=request.tenant, status='SUCCESS')
+    
+    return FileResponse(
+        batch.file.open('rb'),
+        content_type='application/pdf',
+        as_attachment=True,
+        filename=f"receipts_{batch.start_date}_{batch.end_date}.pdf"
+    )
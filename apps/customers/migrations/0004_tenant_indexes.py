@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-17 01:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built and dropped without locking writes to the table;
+    # the tenant-leading replacements are in place before the old ones go
+    atomic = False
+
+    dependencies = [
+        ('customers', '0003_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customer',
+            index=models.Index(fields=['tenant', 'status'], name='customers_c_tenant__d5e64f_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customer',
+            index=models.Index(fields=['tenant', 'created_at'], name='customers_c_tenant__7bbedf_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='customer',
+            name='customers_c_status_ce44cf_idx',
+        ),
+    ]
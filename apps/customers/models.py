@@ -65,8 +65,9 @@ class Customer(TenantAwareModel, GeoLocatedModel):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["email"]),
-            models.Index(fields=["status"]),
+            models.Index(fields=["tenant", "status"]),
             models.Index(fields=["last_name", "first_name"]),
+            models.Index(fields=["tenant", "created_at"]),
         ]
         permissions = [
             # View permissions
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import NotificationOutbox
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'channel', 'kind', 'status', 'attempts', 'created_at', 'sent_at', 'tenant']
+    list_filter = ['status', 'channel', 'kind', 'tenant']
+    search_fields = ['recipient', 'dedupe_key', 'customer__first_name', 'customer__last_name']
+    readonly_fields = ['dedupe_key', 'attempts', 'last_error', 'sent_at', 'created_at', 'updated_at']
+    raw_id_fields = ['customer']
@@ -0,0 +1,99 @@
+"""
+Delivery backends for the notification outbox.
+
+Each channel is sent through the backend named in
+settings.NOTIFICATION_BACKENDS. A backend receives a batch of outbox rows
+and returns the errors of the ones it could not deliver, keyed by row id;
+rows missing from the result were sent.
+
+Plug in an SMS gateway by subclassing BaseNotificationBackend and pointing
+the `sms` entry of NOTIFICATION_BACKENDS at it.
+"""
+import sys
+import threading
+
+from django.conf import settings
+from django.core import mail
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class BaseNotificationBackend:
+    """Sends messages one at a time; override send_messages to batch."""
+
+    def send(self, message):
+        """Deliver one outbox row, raising an exception on failure."""
+        raise NotImplementedError('Notification backends must implement send()')
+
+    def send_messages(self, messages):
+        errors = {}
+        for message in messages:
+            try:
+                self.send(message)
+            except Exception as e:
+                errors[message.id] = str(e)
+        return errors
+
+
+class ConsoleBackend(BaseNotificationBackend):
+    """Writes messages to stdout; for development."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.RLock()
+
+    def format(self, message):
+        lines = [
+            f"[{message.get_channel_display()}] To: {message.recipient}",
+        ]
+        if message.subject:
+            lines.append(f"Subject: {message.subject}")
+        lines.extend([message.body, '-' * 79])
+        return '\n'.join(lines) + '\n'
+
+    def send(self, message):
+        with self._lock:
+            self.stream.write(self.format(message))
+            self.stream.flush()
+
+
+class FileBackend(ConsoleBackend):
+    """Appends messages to settings.NOTIFICATION_FILE_PATH; for testing."""
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path or getattr(settings, 'NOTIFICATION_FILE_PATH', 'notifications.log')
+
+    def send_messages(self, messages):
+        with self._lock, open(self.path, 'a', encoding='utf-8') as stream:
+            stream.write(f"# {timezone.now().isoformat()}\n")
+            for message in messages:
+                stream.write(self.format(message))
+        return {}
+
+
+class EmailBackend(BaseNotificationBackend):
+    """Sends email through Django's EMAIL_BACKEND over one connection per batch."""
+
+    def send_messages(self, messages):
+        errors = {}
+        with mail.get_connection() as connection:
+            for message in messages:
+                email = mail.EmailMessage(
+                    subject=f"{settings.EMAIL_SUBJECT_PREFIX}{message.subject}",
+                    body=message.body,
+                    to=[message.recipient],
+                    connection=connection
+                )
+                try:
+                    email.send()
+                except Exception as e:
+                    errors[message.id] = str(e)
+        return errors
+
+
+def get_backend(channel):
+    """Instantiate the backend configured for a channel."""
+    backends = getattr(settings, 'NOTIFICATION_BACKENDS', {})
+    path = backends.get(channel, 'apps.notifications.backends.ConsoleBackend')
+    return import_string(path)()
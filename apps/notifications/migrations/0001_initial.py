@@ -0,0 +1,42 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('customers', '0003_initial'),
+        ('tenants', '0004_tenantsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('channel', models.CharField(choices=[('sms', 'SMS'), ('email', 'Email')], max_length=10)),
+                ('kind', models.CharField(help_text='What the message is about, e.g. expiration_reminder', max_length=50)),
+                ('dedupe_key', models.CharField(help_text='Identifies the message per channel so producers can re-run without sending twice', max_length=100)),
+                ('recipient', models.CharField(help_text='Phone number or email address', max_length=254)),
+                ('subject', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='customers.customer')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['tenant', 'status', 'id'], name='notificatio_tenant__c125bd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'channel', 'dedupe_key'), name='unique_notification_per_channel')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import models
+
+from apps.utils.models import TenantAwareModel
+
+
+class NotificationOutbox(TenantAwareModel):
+    """
+    Outgoing SMS and email messages. Producers insert rows in bulk and the
+    dispatcher (apps.notifications.services.send_pending_notifications) sends
+    pending rows in batches through the backend configured for each channel.
+    Rows being sent are SENDING, so a crashed run does not send them again
+    until their lease runs out.
+    """
+    CHANNEL_CHOICES = [
+        ('sms', 'SMS'),
+        ('email', 'Email'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    kind = models.CharField(max_length=50, help_text="What the message is about, e.g. expiration_reminder")
+    dedupe_key = models.CharField(
+        max_length=100,
+        help_text="Identifies the message per channel so producers can re-run without sending twice"
+    )
+    customer = models.ForeignKey(
+        'customers.Customer',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notifications'
+    )
+    recipient = models.CharField(max_length=254, help_text="Phone number or email address")
+    subject = models.CharField(max_length=200, blank=True)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', 'status', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'channel', 'dedupe_key'],
+                name='unique_notification_per_channel'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_channel_display()} to {self.recipient} ({self.status})"
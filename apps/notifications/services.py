@@ -0,0 +1,150 @@
+"""
+Queueing and dispatch of outgoing notifications.
+
+Producers build NotificationOutbox rows and hand them to queue_notifications,
+which inserts them in bulk and skips messages already queued for the same
+channel and dedupe key. send_pending_notifications drains a tenant's outbox
+in batches; rows are claimed with SKIP LOCKED and marked SENDING before they
+are sent, so several dispatchers can run at once without sending a message
+twice and a dispatcher that dies mid-batch does not resend what went out.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.notifications.backends import get_backend
+from apps.notifications.models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_BATCH_SIZE = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 500)
+
+# A message is given up on after this many failed attempts
+NOTIFICATION_MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 3)
+
+# Seconds after which a message left SENDING by a run that died is claimed again
+NOTIFICATION_LEASE_SECONDS = getattr(settings, 'NOTIFICATION_LEASE_SECONDS', 900)
+
+
+def queue_notifications(tenant, notifications, batch_size=1000):
+    """
+    Insert outbox rows for a tenant, skipping ones whose channel and
+    dedupe key are already queued. Returns the rows inserted.
+    """
+    queued = []
+    for start in range(0, len(notifications), batch_size):
+        batch = notifications[start:start + batch_size]
+        existing = set(
+            NotificationOutbox.objects.filter(
+                tenant=tenant,
+                dedupe_key__in={notification.dedupe_key for notification in batch}
+            ).values_list('channel', 'dedupe_key')
+        )
+        new = [
+            notification for notification in batch
+            if (notification.channel, notification.dedupe_key) not in existing
+        ]
+        # ignore_conflicts covers producers racing on the same keys
+        NotificationOutbox.objects.bulk_create(new, ignore_conflicts=True)
+        queued.extend(new)
+    return queued
+
+
+def queue_dispatch(tenant_id):
+    """Dispatch a tenant's outbox in the background once the current transaction commits."""
+    from apps.notifications.tasks import dispatch_notifications_for_tenant
+
+    transaction.on_commit(lambda: dispatch_notifications_for_tenant.delay(tenant_id))
+
+
+def _deliver(channel, messages):
+    """Send messages through a channel's backend, returning errors keyed by row id."""
+    try:
+        return get_backend(channel).send_messages(messages)
+    except Exception as e:
+        logger.error(f"Notification backend for {channel} failed: {e}")
+        return {message.id: str(e) for message in messages}
+
+
+def _claim(tenant, last_id, batch_size):
+    """
+    Claim the next batch of a tenant's messages in a short transaction,
+    marking them SENDING and counting the attempt before anything is sent.
+    Messages left SENDING by a run that died are claimed again once their
+    lease runs out, or failed if they have no attempts left.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=NOTIFICATION_LEASE_SECONDS)
+    with transaction.atomic():
+        # Moving past the last batch keeps failed rows for the next run
+        batch = list(
+            NotificationOutbox.objects.filter(tenant=tenant, id__gt=last_id)
+            .filter(Q(status='PENDING') | Q(status='SENDING', updated_at__lt=stale))
+            .select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        for message in batch:
+            message.updated_at = now
+            if message.status == 'SENDING' and message.attempts >= NOTIFICATION_MAX_ATTEMPTS:
+                message.status = 'FAILED'
+                message.last_error = 'Sending was interrupted'
+            else:
+                message.status = 'SENDING'
+                message.attempts += 1
+        NotificationOutbox.objects.bulk_update(batch, ['status', 'attempts', 'last_error', 'updated_at'])
+    return batch
+
+
+def send_pending_notifications(tenant, batch_size=None):
+    """
+    Send a tenant's pending notifications in batches.
+
+    Each batch is claimed, sent outside of any transaction and then
+    recorded, so no row locks are held while the backends talk to the
+    gateway and messages that went out are not rolled back to PENDING.
+    Failed messages stay pending for the next run until they reach
+    NOTIFICATION_MAX_ATTEMPTS. Returns a tuple of (sent count, failed count).
+    """
+    batch_size = batch_size or NOTIFICATION_BATCH_SIZE
+
+    sent = failed = 0
+    last_id = 0
+    while True:
+        batch = _claim(tenant, last_id, batch_size)
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        by_channel = defaultdict(list)
+        for message in batch:
+            if message.status == 'SENDING':
+                by_channel[message.channel].append(message)
+
+        for channel, messages in by_channel.items():
+            errors = _deliver(channel, messages)
+            now = timezone.now()
+            for message in messages:
+                message.updated_at = now
+                error = errors.get(message.id)
+                if error is None:
+                    message.status = 'SENT'
+                    message.sent_at = now
+                    message.last_error = ''
+                    sent += 1
+                else:
+                    message.last_error = error
+                    message.status = 'FAILED' if message.attempts >= NOTIFICATION_MAX_ATTEMPTS else 'PENDING'
+                    failed += 1
+
+            # Record each channel as soon as it is sent
+            with transaction.atomic():
+                NotificationOutbox.objects.bulk_update(
+                    messages, ['status', 'last_error', 'sent_at', 'updated_at']
+                )
+
+    return sent, failed
@@ -0,0 +1,44 @@
+import logging
+
+from celery import shared_task
+
+from apps.notifications.services import send_pending_notifications
+from apps.tenants.context import get_current_tenant
+from apps.tenants.tasks import TenantAwareTask
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchNotificationsTask(TenantAwareTask):
+    """Tenant-aware task that sends pending notifications from the outbox."""
+
+    def run(self):
+        """Send the current tenant's pending notifications."""
+        tenant = get_current_tenant()
+        if not tenant:
+            logger.error("No tenant context available for dispatch_notifications")
+            return "Error: No tenant context"
+
+        sent_count, failed_count = send_pending_notifications(tenant)
+
+        if failed_count:
+            logger.warning(f"Tenant {tenant.name}: {failed_count} notifications failed to send")
+
+        logger.info(f"Tenant {tenant.name}: Sent {sent_count} notifications")
+        return f"Tenant {tenant.name}: Sent {sent_count} notifications"
+
+
+# Create the shared task instance
+dispatch_notifications = DispatchNotificationsTask()
+
+
+@shared_task
+def dispatch_notifications_all_tenants():
+    """Run dispatch_notifications for all active tenants in parallel, retrying failed sends."""
+    return dispatch_notifications.fan_out_to_all_tenants(dispatch_notifications_for_tenant)
+
+
+@shared_task
+def dispatch_notifications_for_tenant(tenant_id: int):
+    """Run dispatch_notifications for a specific tenant."""
+    return dispatch_notifications.run_for_tenant(tenant_id)
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import override_settings
+
+from apps.notifications.backends import BaseNotificationBackend
+from apps.notifications.models import NotificationOutbox
+from apps.notifications.services import queue_notifications, send_pending_notifications
+from apps.utils.test_base import TenantTestCase
+
+
+class FailingBackend(BaseNotificationBackend):
+    def send(self, message):
+        raise ConnectionError('Gateway unavailable')
+
+
+class WorkerKilled(BaseException):
+    """Stands in for the worker process dying, which no except Exception catches."""
+
+
+class InterruptedBackend(BaseNotificationBackend):
+    """Sends three messages and then dies."""
+    sent = []
+
+    def send(self, message):
+        if len(self.sent) == 3:
+            raise WorkerKilled()
+        self.sent.append(message.dedupe_key)
+
+
+class NotificationOutboxTest(TenantTestCase):
+    """Test queueing and dispatching outbox notifications."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, 'notifications.log')
+
+    def notification(self, channel, key, tenant=None, **kwargs):
+        return NotificationOutbox(
+            tenant=tenant or self.tenant,
+            channel=channel,
+            kind='test',
+            dedupe_key=key,
+            recipient=kwargs.pop('recipient', '09123456789' if channel == 'sms' else 'a@example.com'),
+            body=kwargs.pop('body', f'Message {key}'),
+            **kwargs
+        )
+
+    def test_queue_skips_duplicates(self):
+        """Messages already queued for a channel and key are not queued again."""
+        queued = queue_notifications(self.tenant, [
+            self.notification('sms', 'one'),
+            self.notification('email', 'one'),
+        ])
+        self.assertEqual(len(queued), 2)
+
+        queued = queue_notifications(self.tenant, [
+            self.notification('sms', 'one'),
+            self.notification('sms', 'two'),
+        ])
+        self.assertEqual([notification.dedupe_key for notification in queued], ['two'])
+
+        # Keys are scoped to the tenant
+        queued = queue_notifications(self.other_tenant, [
+            self.notification('sms', 'one', tenant=self.other_tenant),
+        ])
+        self.assertEqual(len(queued), 1)
+        self.assertEqual(NotificationOutbox.objects.count(), 4)
+
+    def test_dispatch_sends_through_channel_backends(self):
+        """Pending messages are sent in batches through each channel's backend."""
+        queue_notifications(self.tenant, [
+            self.notification('sms', f'sms-{index}') for index in range(5)
+        ] + [
+            self.notification('email', 'email-0', subject='Reminder', recipient='customer@example.com'),
+        ])
+        queue_notifications(self.other_tenant, [
+            self.notification('sms', 'foreign', tenant=self.other_tenant),
+        ])
+
+        with override_settings(
+            NOTIFICATION_BACKENDS={
+                'sms': 'apps.notifications.backends.FileBackend',
+                'email': 'apps.notifications.backends.EmailBackend',
+            },
+            NOTIFICATION_FILE_PATH=self.path,
+        ):
+            self.assertEqual(send_pending_notifications(self.tenant, batch_size=2), (6, 0))
+
+        with open(self.path, encoding='utf-8') as log:
+            content = log.read()
+        self.assertEqual(content.count('[SMS] To: 09123456789'), 5)
+        self.assertNotIn('foreign', content)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['customer@example.com'])
+        self.assertTrue(mail.outbox[0].subject.endswith('Reminder'))
+
+        self.assertFalse(NotificationOutbox.objects.filter(tenant=self.tenant, status='PENDING').exists())
+        self.assertTrue(NotificationOutbox.objects.filter(tenant=self.other_tenant, status='PENDING').exists())
+
+    @override_settings(NOTIFICATION_BACKENDS={'sms': 'apps.notifications.tests.FailingBackend'})
+    def test_failed_messages_retried_until_max_attempts(self):
+        """A failing message stays pending for the next run until it runs out of attempts."""
+        queue_notifications(self.tenant, [self.notification('sms', 'one')])
+
+        with patch('apps.notifications.services.NOTIFICATION_MAX_ATTEMPTS', 2):
+            self.assertEqual(send_pending_notifications(self.tenant), (0, 1))
+            message = NotificationOutbox.objects.get()
+            self.assertEqual(message.status, 'PENDING')
+            self.assertEqual(message.last_error, 'Gateway unavailable')
+
+            self.assertEqual(send_pending_notifications(self.tenant), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual(message.status, 'FAILED')
+            self.assertEqual(message.attempts, 2)
+
+            self.assertEqual(send_pending_notifications(self.tenant), (0, 0))
+
+
+    @override_settings(NOTIFICATION_BACKENDS={'sms': 'apps.notifications.tests.InterruptedBackend'})
+    def test_backend_dying_mid_batch(self):
+        """Messages sent before a dispatcher dies stay sent; its claimed batch waits for the lease."""
+        queue_notifications(self.tenant, [self.notification('sms', f'sms-{index}') for index in range(5)])
+        InterruptedBackend.sent = []
+
+        with self.assertRaises(WorkerKilled):
+            send_pending_notifications(self.tenant, batch_size=2)
+        self.assertEqual(InterruptedBackend.sent, ['sms-0', 'sms-1', 'sms-2'])
+
+        statuses = dict(NotificationOutbox.objects.values_list('dedupe_key', 'status'))
+        self.assertEqual(statuses, {
+            'sms-0': 'SENT', 'sms-1': 'SENT', 'sms-2': 'SENDING', 'sms-3': 'SENDING', 'sms-4': 'PENDING',
+        })
+
+        # The interrupted batch is left alone until its lease runs out
+        InterruptedBackend.sent = []
+        self.assertEqual(send_pending_notifications(self.tenant), (1, 0))
+        self.assertEqual(InterruptedBackend.sent, ['sms-4'])
+
+        with patch('apps.notifications.services.NOTIFICATION_LEASE_SECONDS', -1):
+            self.assertEqual(send_pending_notifications(self.tenant), (2, 0))
+        self.assertEqual(InterruptedBackend.sent, ['sms-4', 'sms-2', 'sms-3'])
+        self.assertEqual(NotificationOutbox.objects.get(dedupe_key='sms-2').attempts, 2)
+        self.assertFalse(NotificationOutbox.objects.exclude(status='SENT').exists())
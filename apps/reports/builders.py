@@ -0,0 +1,1254 @@
+"""
+Report parameter parsing and context building.
+
+Every report is split into a parameter parser, which turns request GET data
+into a small JSON-serializable dict, and a context builder, which computes
+the template context for a tenant from those parameters. Views, Celery tasks
+and exports all go through the REPORTS registry so a report is computed the
+same way whether it runs inside the request or in the background, and
+cached_report_context() serves repeated requests from the report cache.
+"""
+import json
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import (
+    Aggregate,
+    Avg,
+    Case,
+    Count,
+    DateTimeField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Max,
+    Min,
+    Q,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import (
+    Extract,
+    ExtractWeekDay,
+    Floor,
+    Lag,
+    TruncDate,
+    TruncMonth,
+)
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from apps.barangays.models import Barangay
+from apps.customer_installations.models import CustomerInstallation
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.customers.models import Customer
+from apps.lcp.models import NAP
+from apps.reports.cache import REPORT_CACHE_TIMEOUT, report_cache_key
+from apps.reports.models import DailyRevenueRollup
+from apps.reports.services import revenue_rollups
+from apps.tickets.models import Ticket
+from apps.users.models import CustomUser
+
+
+class Percentile(Aggregate):
+    """PostgreSQL PERCENTILE_CONT ordered-set aggregate."""
+    function = 'PERCENTILE_CONT'
+    name = 'Percentile'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=percentile, **extra)
+
+
+def sla_deadline():
+    """Expression for the time an open ticket breaches its priority's SLA."""
+    sla = Case(
+        *[
+            When(priority=priority, then=Value(timedelta(hours=hours)))
+            for priority, hours in Ticket.SLA_HOURS.items()
+        ],
+        default=Value(timedelta(hours=Ticket.DEFAULT_SLA_HOURS)),
+        output_field=DurationField()
+    )
+    return ExpressionWrapper(F('created_at') + sla, output_field=DateTimeField())
+
+
+def _hours(duration):
+    """Convert a duration to hours rounded for display."""
+    return round(duration.total_seconds() / 3600, 1) if duration is not None else None
+
+
+def _int_param(data, name, default, minimum=None, maximum=None):
+    """Read an integer GET parameter, falling back to `default` when invalid."""
+    try:
+        value = int(data.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    if minimum is not None and value < minimum:
+        return default
+    if maximum is not None and value > maximum:
+        return default
+    return value
+
+
+def _date_param(data, name):
+    """Read a YYYY-MM-DD GET parameter, falling back to today."""
+    try:
+        return datetime.strptime(data.get(name, ''), '%Y-%m-%d').date()
+    except ValueError:
+        return timezone.localdate()
+
+
+def _optional_id_param(data, name):
+    """Read an optional object id GET parameter."""
+    return _int_param(data, name, None, minimum=1)
+
+
+def _days_params(data, default):
+    """Parameters shared by the reports covering the last N days."""
+    return {
+        'days': _int_param(data, 'days', default, minimum=1),
+        'end_date': timezone.localdate().isoformat(),
+    }
+
+
+# Daily collection
+
+def daily_collection_params(data):
+    return {'date': _date_param(data, 'date').isoformat()}
+
+
+def daily_collection_context(tenant, params):
+    """Daily collection report showing the day's payments."""
+    report_date = date.fromisoformat(params['date'])
+
+    # Get subscriptions created on this date
+    subscriptions = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        created_at__date=report_date
+    ).select_related(
+        'customer_installation__customer',
+        'subscription_plan',
+        'created_by'
+    )
+
+    # Totals and breakdowns come from the pre-aggregated rollup
+    rollups = revenue_rollups(tenant, report_date, report_date)
+    totals = rollups.aggregate(
+        total=Sum('total_amount'),
+        count=Sum('subscription_count')
+    )
+    total_amount = totals['total'] or Decimal('0')
+    total_count = totals['count'] or 0
+
+    # Breakdown by subscription type
+    type_breakdown = rollups.values('subscription_type').annotate(
+        count=Sum('subscription_count'),
+        total=Sum('total_amount')
+    ).order_by('subscription_type')
+
+    # Breakdown by plan
+    plan_breakdown = rollups.values(
+        'subscription_plan__name',
+        'subscription_plan__speed'
+    ).annotate(
+        count=Sum('subscription_count'),
+        total=Sum('total_amount')
+    ).order_by('-total')
+
+    # Yesterday and last week same day for comparison
+    yesterday = report_date - timedelta(days=1)
+    last_week = report_date - timedelta(days=7)
+    comparison = DailyRevenueRollup.objects.filter(
+        tenant=tenant,
+        date__in=[yesterday, last_week]
+    ).aggregate(
+        yesterday=Sum('total_amount', filter=Q(date=yesterday)),
+        last_week=Sum('total_amount', filter=Q(date=last_week))
+    )
+    yesterday_total = comparison['yesterday'] or Decimal('0')
+    last_week_total = comparison['last_week'] or Decimal('0')
+
+    return {
+        'report_date': report_date,
+        'subscriptions': subscriptions,
+        'total_amount': total_amount,
+        'total_count': total_count,
+        'type_breakdown': type_breakdown,
+        'plan_breakdown': plan_breakdown,
+        'yesterday_total': yesterday_total,
+        'last_week_total': last_week_total,
+        'yesterday_change': ((total_amount - yesterday_total) / yesterday_total * 100) if yesterday_total else 0,
+        'last_week_change': ((total_amount - last_week_total) / last_week_total * 100) if last_week_total else 0,
+    }
+
+
+# Subscription expiry
+
+def subscription_expiry_params(data):
+    return {
+        'barangay': _optional_id_param(data, 'barangay'),
+        'date': timezone.localdate().isoformat(),
+    }
+
+
+def subscription_expiry_context(tenant, params):
+    """Report showing subscriptions due to expire."""
+    today = timezone.now()
+
+    # Get different expiry groups
+    # Due in 3 days (urgent)
+    due_3_days = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        status='ACTIVE',
+        end_date__date__gt=today.date(),
+        end_date__date__lte=(today + timedelta(days=3)).date()
+    ).select_related(
+        'customer_installation__customer',
+        'customer_installation__nap__splitter__lcp',
+        'subscription_plan'
+    ).order_by('end_date')
+
+    # Due in 7 days (regular)
+    due_7_days = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        status='ACTIVE',
+        end_date__date__gt=(today + timedelta(days=3)).date(),
+        end_date__date__lte=(today + timedelta(days=7)).date()
+    ).select_related(
+        'customer_installation__customer',
+        'customer_installation__nap__splitter__lcp',
+        'subscription_plan'
+    ).order_by('end_date')
+
+    # Expired yesterday
+    expired_yesterday = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        status='EXPIRED',
+        end_date__date=(today - timedelta(days=1)).date()
+    ).select_related(
+        'customer_installation__customer',
+        'customer_installation__nap__splitter__lcp',
+        'subscription_plan'
+    ).order_by('customer_installation__customer__barangay__name')
+
+    # Expired 3+ days (disconnection candidates)
+    expired_3_plus = CustomerSubscription.objects.filter(tenant=tenant,
+        status='EXPIRED',
+        end_date__date__lte=(today - timedelta(days=3)).date(),
+        end_date__date__gte=(today - timedelta(days=30)).date()  # Last 30 days only
+    ).select_related(
+        'customer_installation__customer',
+        'customer_installation__nap__splitter__lcp',
+        'subscription_plan'
+    ).order_by('-end_date')
+
+    # Group by barangay for field visits
+    barangay_filter = params['barangay']
+    if barangay_filter:
+        due_3_days = due_3_days.filter(
+            customer_installation__customer__barangay_id=barangay_filter
+        )
+        due_7_days = due_7_days.filter(
+            customer_installation__customer__barangay_id=barangay_filter
+        )
+        expired_yesterday = expired_yesterday.filter(
+            customer_installation__customer__barangay_id=barangay_filter
+        )
+        expired_3_plus = expired_3_plus.filter(
+            customer_installation__customer__barangay_id=barangay_filter
+        )
+
+    # Get all barangays for filter
+    barangays = Barangay.objects.filter(tenant=tenant, is_active=True).order_by('name')
+
+    return {
+        'due_3_days': due_3_days,
+        'due_7_days': due_7_days,
+        'expired_yesterday': expired_yesterday,
+        'expired_3_plus': expired_3_plus,
+        'barangays': barangays,
+        'selected_barangay': str(barangay_filter) if barangay_filter else None,
+        'current_time': today,
+    }
+
+
+# Monthly revenue
+
+def monthly_revenue_params(data):
+    today = timezone.localdate()
+    return {
+        'month': _int_param(data, 'month', today.month, minimum=1, maximum=12),
+        'year': _int_param(data, 'year', today.year, minimum=2000, maximum=9998),
+    }
+
+
+def monthly_revenue_context(tenant, params):
+    """Monthly revenue analysis report."""
+    month = params['month']
+    year = params['year']
+
+    # Calculate date range
+    start_date = date(year, month, 1)
+    if month == 12:
+        end_date = date(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        end_date = date(year, month + 1, 1) - timedelta(days=1)
+
+    # Get subscriptions for this month
+    subscriptions = CustomerSubscription.objects.filter(tenant=tenant,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date)
+    rollups = revenue_rollups(tenant, start_date, end_date)
+
+    # Get previous month range
+    if month == 1:
+        prev_month = 12
+        prev_year = year - 1
+    else:
+        prev_month = month - 1
+        prev_year = year
+
+    prev_start = date(prev_year, prev_month, 1)
+    if prev_month == 12:
+        prev_end = date(prev_year + 1, 1, 1) - timedelta(days=1)
+    else:
+        prev_end = date(prev_year, prev_month + 1, 1) - timedelta(days=1)
+
+    # Last year same month
+    last_year_start = date(year - 1, month, 1)
+    last_year_end = (last_year_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+    # Current, previous month and last year totals in one rollup scan
+    this_month = Q(date__gte=start_date, date__lte=end_date)
+    previous_month = Q(date__gte=prev_start, date__lte=prev_end)
+    same_month_last_year = Q(date__gte=last_year_start, date__lte=last_year_end)
+    totals = DailyRevenueRollup.objects.filter(
+        this_month | previous_month | same_month_last_year,
+        tenant=tenant
+    ).aggregate(
+        total=Sum('total_amount', filter=this_month),
+        count=Sum('subscription_count', filter=this_month),
+        prev=Sum('total_amount', filter=previous_month),
+        last_year=Sum('total_amount', filter=same_month_last_year)
+    )
+
+    # Calculate totals
+    total_revenue = totals['total'] or Decimal('0')
+    total_subscriptions = totals['count'] or 0
+    prev_revenue = totals['prev'] or Decimal('0')
+    last_year_revenue = totals['last_year'] or Decimal('0')
+
+    # Calculate MoM growth
+    mom_growth = ((total_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue else 0
+
+    # Calculate YoY growth
+    yoy_growth = ((total_revenue - last_year_revenue) / last_year_revenue * 100) if last_year_revenue else 0
+
+    # Revenue by plan
+    plan_revenue = rollups.values(
+        'subscription_plan__name',
+        'subscription_plan__speed',
+        'subscription_plan__price'
+    ).annotate(
+        count=Sum('subscription_count'),
+        total=Sum('total_amount')
+    ).order_by('-total')
+
+    # Add percentage to plan revenue
+    for plan in plan_revenue:
+        plan['percentage'] = float(plan['total']) / float(total_revenue) * 100 if total_revenue else 0
+
+    # Revenue by barangay
+    barangay_revenue = rollups.values(
+        'barangay__name'
+    ).annotate(
+        count=Sum('subscription_count'),
+        total=Sum('total_amount')
+    ).order_by('-total')[:10]  # Top 10 barangays
+
+    # Add percentage to barangay revenue
+    for barangay in barangay_revenue:
+        barangay['percentage'] = float(barangay['total']) / float(total_revenue) * 100 if total_revenue else 0
+
+    # Daily revenue for chart
+    revenue_by_day = dict(
+        rollups.values('date').annotate(total=Sum('total_amount')).values_list('date', 'total')
+    )
+    daily_revenue = []
+    for day in range(1, end_date.day + 1):
+        day_date = date(year, month, day)
+        daily_revenue.append({
+            'day': day,
+            'date': day_date,
+            'revenue': float(revenue_by_day.get(day_date, 0))
+        })
+
+    # New vs Renewal revenue
+    # A customer's first subscription counts as new, everything after is a renewal
+    new_revenue = subscriptions.filter(
+        is_first_subscription=True
+    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+
+    renewal_revenue = total_revenue - new_revenue
+
+    # Average revenue per customer
+    unique_customers = subscriptions.values('customer_installation__customer').distinct().count()
+    arpu = total_revenue / unique_customers if unique_customers else 0
+
+    return {
+        'month': month,
+        'year': year,
+        'month_name': date(year, month, 1).strftime('%B'),
+        'total_revenue': total_revenue,
+        'total_subscriptions': total_subscriptions,
+        'prev_revenue': prev_revenue,
+        'mom_growth': mom_growth,
+        'yoy_growth': yoy_growth,
+        'plan_revenue': plan_revenue,
+        'barangay_revenue': barangay_revenue,
+        'daily_revenue': daily_revenue,
+        'new_revenue': new_revenue,
+        'renewal_revenue': renewal_revenue,
+        'arpu': arpu,
+        'unique_customers': unique_customers,
+    }
+
+
+# Ticket analysis
+
+def ticket_analysis_params(data):
+    return _days_params(data, 30)
+
+
+def ticket_analysis_context(tenant, params):
+    """Ticket analysis report for service quality insights."""
+    # Get date range
+    end_date = date.fromisoformat(params['end_date'])
+    days = params['days']
+    start_date = end_date - timedelta(days=days)
+
+    # Get tickets in date range
+    tickets = Ticket.objects.filter(tenant=tenant,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date)
+
+    # Overall statistics
+    totals = tickets.aggregate(
+        total=Count('id'),
+        resolved=Count('id', filter=Q(status='resolved')),
+        pending=Count('id', filter=Q(status='pending')),
+        in_progress=Count('id', filter=Q(status__in=['assigned', 'in_progress'])),
+        cancelled=Count('id', filter=Q(status='cancelled'))
+    )
+    total_tickets = totals['total']
+    resolved_tickets = totals['resolved']
+
+    # Calculate resolution rate
+    resolution_rate = (resolved_tickets / total_tickets * 100) if total_tickets else 0
+
+    # Tickets by category
+    category_stats = tickets.values('category').annotate(
+        count=Count('id'),
+        resolved=Count('id', filter=Q(status='resolved')),
+        pending=Count('id', filter=Q(status='pending'))
+    ).order_by('-count')
+
+    # Add display names and calculate resolution rates
+    for stat in category_stats:
+        stat['display_name'] = dict(Ticket.CATEGORY_CHOICES).get(stat['category'], stat['category'])
+        stat['resolution_rate'] = (stat['resolved'] / stat['count'] * 100) if stat['count'] else 0
+
+    # Tickets by priority with resolution time statistics
+    resolution_time = F('resolved_at') - F('created_at')
+    is_resolved = Q(status='resolved', resolved_at__isnull=False)
+    priority_stats = tickets.values('priority').annotate(
+        count=Count('id'),
+        avg_resolution=Avg(resolution_time, filter=is_resolved),
+        median_resolution=Percentile(resolution_time, 0.5, filter=is_resolved),
+        p90_resolution=Percentile(resolution_time, 0.9, filter=is_resolved)
+    ).order_by('priority')
+
+    # Add display names
+    priority_order = {'urgent': 1, 'high': 2, 'medium': 3, 'low': 4}
+    priority_stats = sorted(priority_stats, key=lambda x: priority_order.get(x['priority'], 5))
+
+    for stat in priority_stats:
+        stat['display_name'] = dict(Ticket.PRIORITY_CHOICES).get(stat['priority'], stat['priority'])
+        stat['avg_resolution_hours'] = _hours(stat['avg_resolution'])
+        stat['median_resolution_hours'] = _hours(stat['median_resolution'])
+        stat['p90_resolution_hours'] = _hours(stat['p90_resolution'])
+
+    # Tickets by barangay (top 10)
+    barangay_stats = tickets.values(
+        'customer_installation__customer__barangay__name'
+    ).annotate(
+        count=Count('id')
+    ).order_by('-count')[:10]
+
+    # Tickets by technician performance
+    technician_stats = tickets.filter(
+        assigned_to__isnull=False
+    ).values(
+        'assigned_to__first_name',
+        'assigned_to__last_name',
+        'assigned_to__email'
+    ).annotate(
+        total=Count('id'),
+        resolved=Count('id', filter=Q(status='resolved')),
+        pending=Count('id', filter=Q(status__in=['pending', 'assigned', 'in_progress']))
+    ).order_by('-total')
+
+    # Calculate resolution rate and format names
+    for stat in technician_stats:
+        stat['name'] = f"{stat['assigned_to__first_name']} {stat['assigned_to__last_name']}"
+        stat['resolution_rate'] = (stat['resolved'] / stat['total'] * 100) if stat['total'] else 0
+
+    # Common issues (most frequent tickets by customer)
+    repeat_customers = tickets.values(
+        'customer__id',
+        'customer__first_name',
+        'customer__last_name'
+    ).annotate(
+        ticket_count=Count('id')
+    ).filter(ticket_count__gt=1).order_by('-ticket_count')[:10]
+
+    # Format customer names
+    for customer in repeat_customers:
+        customer['name'] = f"{customer['customer__first_name']} {customer['customer__last_name']}"
+
+    # Daily ticket trend for chart
+    trend = {
+        row['day']: row
+        for row in tickets.annotate(day=TruncDate('created_at')).values('day').annotate(
+            total=Count('id'),
+            resolved=Count('id', filter=Q(status='resolved'))
+        ).order_by()
+    }
+    daily_tickets = []
+    for i in range(days + 1):
+        day_date = start_date + timedelta(days=i)
+        day = trend.get(day_date, {})
+        daily_tickets.append({
+            'date': day_date.strftime('%Y-%m-%d'),
+            'total': day.get('total', 0),
+            'resolved': day.get('resolved', 0)
+        })
+
+    # Response time analysis (urgent tickets)
+    urgent = next((stat for stat in priority_stats if stat['priority'] == 'urgent'), None)
+    avg_urgent_response = (urgent and urgent['avg_resolution_hours']) or 0
+
+    # Overdue tickets (based on SLA)
+    overdue = tickets.filter(
+        status__in=['pending', 'assigned', 'in_progress']
+    ).annotate(
+        sla_deadline=sla_deadline()
+    ).filter(sla_deadline__lt=timezone.now())
+
+    return {
+        'days': days,
+        'start_date': start_date,
+        'end_date': end_date,
+        'total_tickets': total_tickets,
+        'resolved_tickets': resolved_tickets,
+        'pending_tickets': totals['pending'],
+        'in_progress_tickets': totals['in_progress'],
+        'cancelled_tickets': totals['cancelled'],
+        'resolution_rate': resolution_rate,
+        'category_stats': category_stats,
+        'priority_stats': priority_stats,
+        'barangay_stats': barangay_stats,
+        'technician_stats': technician_stats,
+        'repeat_customers': repeat_customers,
+        'daily_tickets': json.dumps(daily_tickets),  # Convert to JSON for JavaScript
+        'avg_urgent_response': avg_urgent_response,
+        'overdue_tickets': overdue.select_related('customer').order_by('sla_deadline')[:10],  # Most overdue first
+        'overdue_count': overdue.count(),
+    }
+
+
+# Technician performance
+
+def technician_performance_params(data):
+    return _days_params(data, 30)
+
+
+def technician_performance_context(tenant, params):
+    """Technician performance report for staff efficiency tracking."""
+    # Get date range
+    end_date = date.fromisoformat(params['end_date'])
+    days = params['days']
+    start_date = end_date - timedelta(days=days)
+
+    # Get all staff users in the same tenant
+    technicians = CustomUser.objects.filter(
+        tenant=tenant,
+        is_staff=True
+    ).order_by('first_name', 'last_name')
+
+    installations = CustomerInstallation.objects.filter(
+        tenant=tenant,
+        installation_date__gte=start_date,
+        installation_date__lte=end_date
+    )
+    tickets = Ticket.objects.filter(
+        tenant=tenant,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date
+    )
+
+    # Installations completed per technician
+    installation_counts = dict(
+        installations.filter(
+            installation_technician__isnull=False
+        ).values('installation_technician').annotate(
+            count=Count('id')
+        ).values_list('installation_technician', 'count')
+    )
+
+    # Ticket counts and average resolution time per technician
+    ticket_stats = {
+        row['assigned_to']: row
+        for row in tickets.filter(
+            assigned_to__isnull=False
+        ).values('assigned_to').annotate(
+            total=Count('id'),
+            resolved=Count('id', filter=Q(status='resolved')),
+            pending=Count('id', filter=Q(status__in=['pending', 'assigned', 'in_progress'])),
+            avg_resolution=Avg(
+                F('resolved_at') - F('created_at'),
+                filter=Q(status='resolved', resolved_at__isnull=False)
+            )
+        )
+    }
+
+    # Areas covered (unique barangays across installations and tickets)
+    area_pairs = installations.filter(
+        installation_technician__isnull=False,
+        customer__barangay__isnull=False
+    ).values_list(
+        'installation_technician', 'customer__barangay__name'
+    ).union(
+        tickets.filter(
+            assigned_to__isnull=False,
+            customer_installation__customer__barangay__isnull=False
+        ).values_list(
+            'assigned_to', 'customer_installation__customer__barangay__name'
+        )
+    )
+    areas_by_technician = defaultdict(set)
+    for technician_id, area in area_pairs:
+        areas_by_technician[technician_id].add(area)
+
+    technician_stats = []
+    for tech in technicians:
+        stats = ticket_stats.get(tech.id, {})
+        total = stats.get('total', 0)
+        resolved = stats.get('resolved', 0)
+        avg_resolution = stats.get('avg_resolution')
+        areas_covered = areas_by_technician.get(tech.id, set())
+
+        technician_stats.append({
+            'technician': tech,
+            'installations_completed': installation_counts.get(tech.id, 0),
+            'tickets_assigned': total,
+            'tickets_resolved': resolved,
+            'tickets_pending': stats.get('pending', 0),
+            'resolution_rate': (resolved / total * 100) if total else 0,
+            'avg_resolution_time': avg_resolution.total_seconds() / 3600 if avg_resolution else 0,
+            'areas_covered': len(areas_covered),
+            'area_names': sorted(areas_covered)
+        })
+
+    # Sort by total activity
+    technician_stats.sort(key=lambda x: x['installations_completed'] + x['tickets_resolved'], reverse=True)
+
+    # Daily activity chart data, one grouped query per source
+    installations_by_day = dict(
+        installations.values('installation_date').annotate(
+            count=Count('id')
+        ).values_list('installation_date', 'count')
+    )
+    tickets_by_day = dict(
+        tickets.annotate(day=TruncDate('created_at')).values('day').annotate(
+            count=Count('id')
+        ).values_list('day', 'count')
+    )
+
+    daily_activity = []
+    for i in range(days + 1):
+        day_date = start_date + timedelta(days=i)
+        daily_activity.append({
+            'date': day_date.strftime('%Y-%m-%d'),
+            'installations': installations_by_day.get(day_date, 0),
+            'tickets': tickets_by_day.get(day_date, 0)
+        })
+
+    return {
+        'technician_stats': technician_stats,
+        'start_date': start_date,
+        'end_date': end_date,
+        'days': days,
+        'daily_activity': json.dumps(daily_activity),
+    }
+
+
+# Customer acquisition
+
+def customer_acquisition_params(data):
+    return {'year': _int_param(data, 'year', timezone.localdate().year, minimum=2000, maximum=9998)}
+
+
+def customer_acquisition_context(tenant, params):
+    """Customer acquisition report for growth tracking."""
+    year = params['year']
+
+    # Monthly acquisition data, one month-grouped query per series
+    def by_month(queryset, field, count=None):
+        rows = queryset.annotate(month=TruncMonth(field)).values('month').annotate(
+            count=count or Count('id')
+        ).order_by().values_list('month', 'count')
+        return {month.month: total for month, total in rows}
+
+    # New customers per month
+    new_customers = by_month(
+        Customer.objects.filter(tenant=tenant, created_at__year=year), 'created_at'
+    )
+
+    # Installations per month
+    new_installations = by_month(
+        CustomerInstallation.objects.filter(tenant=tenant, installation_date__year=year),
+        'installation_date'
+    )
+
+    # First subscriptions (activation)
+    activations = by_month(
+        CustomerSubscription.objects.filter(tenant=tenant,
+            created_at__year=year,
+            is_first_subscription=True),
+        'created_at',
+        Count('customer_installation__customer', distinct=True)
+    )
+
+    monthly_data = []
+    for month in range(1, 13):
+        monthly_data.append({
+            'month': month,
+            'month_name': date(year, month, 1).strftime('%B'),
+            'new_customers': new_customers.get(month, 0),
+            'new_installations': new_installations.get(month, 0),
+            'activations': activations.get(month, 0)
+        })
+
+    # Cumulative growth
+    cumulative_customers = 0
+    for data in monthly_data:
+        cumulative_customers += data['new_customers']
+        data['cumulative'] = cumulative_customers
+
+    # Acquisition by barangay
+    barangay_data = Customer.objects.filter(
+        tenant=tenant,
+        created_at__year=year
+    ).values(
+        'barangay__name'
+    ).annotate(count=Count('id')).order_by('-count')[:10]
+
+    # Popular plans for new customers
+    # Get first subscription for each customer in the year
+    new_customer_ids = Customer.objects.filter(tenant=tenant, created_at__year=year).values_list('id', flat=True)
+
+    first_plans = CustomerSubscription.objects.filter(tenant=tenant, customer_installation__customer__in=new_customer_ids).values(
+        'customer_installation__customer',
+        'subscription_plan__name',
+        'subscription_plan__speed'
+    ).distinct().values(
+        'subscription_plan__name',
+        'subscription_plan__speed'
+    ).annotate(
+        count=Count('customer_installation__customer')
+    ).order_by('-count')
+
+    # Installation to activation time, in days, over every installation of the year
+    avg_activation_time = CustomerInstallation.objects.filter(
+        tenant=tenant,
+        installation_date__year=year
+    ).annotate(
+        first_sub=Min('subscriptions__created_at')
+    ).filter(first_sub__isnull=False).aggregate(
+        avg=Avg(TruncDate('first_sub') - F('installation_date'))
+    )['avg']
+    avg_activation_time = avg_activation_time.total_seconds() / 86400 if avg_activation_time else 0
+
+    # Year over year comparison
+    year_counts = Customer.objects.filter(
+        tenant=tenant,
+        created_at__year__in=[year - 1, year]
+    ).aggregate(
+        previous=Count('id', filter=Q(created_at__year=year - 1)),
+        current=Count('id', filter=Q(created_at__year=year))
+    )
+    prev_year_customers = year_counts['previous']
+    current_year_customers = year_counts['current']
+
+    yoy_growth = ((current_year_customers - prev_year_customers) / prev_year_customers * 100) if prev_year_customers else 0
+
+    return {
+        'year': year,
+        'monthly_data': json.dumps(monthly_data),
+        'monthly_data_table': monthly_data,
+        'barangay_data': barangay_data,
+        'first_plans': first_plans,
+        'avg_activation_time': avg_activation_time,
+        'total_new_customers': sum(d['new_customers'] for d in monthly_data),
+        'total_new_installations': sum(d['new_installations'] for d in monthly_data),
+        'yoy_growth': yoy_growth,
+        'monthly_average': sum(d['new_customers'] for d in monthly_data) / 12,
+    }
+
+
+# Payment behavior
+
+def payment_behavior_params(data):
+    return _days_params(data, 90)
+
+
+def payment_behavior_context(tenant, params):
+    """Payment behavior report for financial planning."""
+    # Get date range
+    end_date = date.fromisoformat(params['end_date'])
+    days = params['days']
+    start_date = end_date - timedelta(days=days)
+
+    # Get all subscriptions in date range
+    subscriptions = CustomerSubscription.objects.filter(tenant=tenant,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date)
+
+    # Overall and custom amount totals
+    totals = subscriptions.aggregate(
+        count=Count('id'),
+        revenue=Sum('amount'),
+        custom_count=Count('id', filter=Q(subscription_type='custom')),
+        custom_avg=Avg('amount', filter=Q(subscription_type='custom')),
+        custom_min=Min('amount', filter=Q(subscription_type='custom')),
+        custom_max=Max('amount', filter=Q(subscription_type='custom'))
+    )
+    total_subscriptions = totals['count']
+    total_revenue = totals['revenue'] or 0
+
+    # Payment type distribution
+    payment_types = subscriptions.values('subscription_type').annotate(
+        count=Count('id'),
+        total=Sum('amount')
+    ).order_by()
+
+    payment_type_data = []
+    for pt in payment_types:
+        payment_type_data.append({
+            'type': pt['subscription_type'],
+            'display': dict(CustomerSubscription.SUBSCRIPTION_TYPES).get(pt['subscription_type']),
+            'count': pt['count'],
+            'total': pt['total'],
+            'percentage': (pt['count'] / total_subscriptions * 100) if total_subscriptions else 0
+        })
+
+    # Renewal patterns - gap between each subscription and the previous one
+    # of the same installation, in whole days
+    renewals = subscriptions.annotate(
+        previous_end=Window(
+            Lag('end_date'),
+            partition_by=F('customer_installation'),
+            order_by=F('start_date').asc()
+        )
+    ).annotate(
+        gap_days=Floor(Extract(
+            ExpressionWrapper(F('start_date') - F('previous_end'), output_field=DurationField()),
+            'epoch'
+        ) / 86400)
+    ).filter(previous_end__isnull=False)
+
+    renewal_counts = renewals.aggregate(
+        total=Count('id'),
+        early=Count('id', filter=Q(gap_days__lt=0)),
+        on_time=Count('id', filter=Q(gap_days__gte=-1, gap_days__lte=1)),
+        late=Count('id', filter=Q(gap_days__gt=1)),
+        avg_gap=Avg('gap_days')
+    )
+
+    # Calculate renewal statistics
+    total_renewals = renewal_counts['total']
+    early_renewals = renewal_counts['early']
+    on_time_renewals = renewal_counts['on_time']
+    late_renewals = renewal_counts['late']
+
+    avg_gap_days = float(renewal_counts['avg_gap'] or 0)
+
+    # Payment amount distribution
+    amount_ranges = [
+        (0, 500, '₱0-500'),
+        (500, 1000, '₱500-1000'),
+        (1000, 1500, '₱1000-1500'),
+        (1500, 2000, '₱1500-2000'),
+        (2000, None, '₱2000+')
+    ]
+
+    bucket_counts = dict(
+        subscriptions.filter(amount__gte=0).annotate(
+            bucket=Case(
+                *[
+                    When(amount__lt=max_amt, then=Value(index))
+                    for index, (_, max_amt, _) in enumerate(amount_ranges)
+                    if max_amt is not None
+                ],
+                default=Value(len(amount_ranges) - 1),
+                output_field=IntegerField()
+            )
+        ).values('bucket').annotate(count=Count('id')).order_by().values_list('bucket', 'count')
+    )
+
+    amount_distribution = []
+    for index, (_, _, label) in enumerate(amount_ranges):
+        count = bucket_counts.get(index, 0)
+        amount_distribution.append({
+            'range': label,
+            'count': count,
+            'percentage': (count / total_subscriptions * 100) if total_subscriptions else 0
+        })
+
+    # Custom amount analysis
+    avg_custom_amount = float(totals['custom_avg'] or 0)
+    min_custom_amount = float(totals['custom_min'] or 0)
+    max_custom_amount = float(totals['custom_max'] or 0)
+
+    # Day of week analysis
+    weekdays = {
+        row['week_day']: row
+        for row in subscriptions.annotate(week_day=ExtractWeekDay('created_at')).values(
+            'week_day'
+        ).annotate(count=Count('id'), total=Sum('amount')).order_by()
+    }
+    dow_data = []
+    for i in range(7):
+        day = weekdays.get(i + 1, {})  # 1=Sunday, 7=Saturday
+        dow_data.append({
+            'day': ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'][i],
+            'count': day.get('count', 0),
+            'total': float(day.get('total') or 0)  # Convert Decimal to float for JSON serialization
+        })
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'days': days,
+        'total_subscriptions': total_subscriptions,
+        'total_revenue': total_revenue,
+        'average_payment': total_revenue / total_subscriptions if total_subscriptions else 0,
+        'payment_type_data': payment_type_data,
+        'renewal_stats': {
+            'total': total_renewals,
+            'early': early_renewals,
+            'early_pct': (early_renewals / total_renewals * 100) if total_renewals else 0,
+            'on_time': on_time_renewals,
+            'on_time_pct': (on_time_renewals / total_renewals * 100) if total_renewals else 0,
+            'late': late_renewals,
+            'late_pct': (late_renewals / total_renewals * 100) if total_renewals else 0,
+            'avg_gap_days': avg_gap_days
+        },
+        'amount_distribution': amount_distribution,
+        'custom_stats': {
+            'count': totals['custom_count'],
+            'avg': avg_custom_amount,
+            'min': min_custom_amount,
+            'max': max_custom_amount
+        },
+        'dow_data': json.dumps(dow_data),
+    }
+
+
+# Area performance
+
+def area_performance_params(data):
+    return {
+        'barangay': _optional_id_param(data, 'barangay'),
+        'end_date': timezone.localdate().isoformat(),
+    }
+
+
+def area_performance_context(tenant, params):
+    """Area performance dashboard for geographic business insights."""
+    # Get all active barangays
+    barangays = Barangay.objects.filter(tenant=tenant, is_active=True).order_by('name')
+
+    # Selected barangay
+    selected_barangay_id = params['barangay']
+    if selected_barangay_id:
+        selected_barangay = get_object_or_404(Barangay, id=selected_barangay_id, tenant=tenant)
+    else:
+        selected_barangay = None
+
+    # Date range (default last 3 months)
+    end_date = date.fromisoformat(params['end_date'])
+    days = 90
+    start_date = end_date - timedelta(days=days)
+
+    area_stats = []
+
+    if selected_barangay:
+        # Detailed stats for selected barangay
+        customers = Customer.objects.filter(tenant=tenant, barangay=selected_barangay)
+
+        # Revenue
+        area_rollups = DailyRevenueRollup.objects.filter(
+            tenant=tenant,
+            barangay=selected_barangay
+        )
+        revenue = area_rollups.filter(
+            date__gte=start_date,
+            date__lte=end_date
+        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
+
+        # Active subscriptions
+        active_subs = CustomerSubscription.objects.filter(tenant=tenant,
+            customer_installation__customer__barangay=selected_barangay,
+            status='ACTIVE').count()
+
+        # Service issues
+        tickets = Ticket.objects.filter(tenant=tenant,
+            customer_installation__customer__barangay=selected_barangay,
+            created_at__date__gte=start_date,
+            created_at__date__lte=end_date).aggregate(
+            total=Count('id'),
+            resolved=Count('id', filter=Q(status='resolved')),
+            pending=Count('id', filter=Q(status__in=['pending', 'assigned', 'in_progress']))
+        )
+
+        # Infrastructure
+        naps_in_area = NAP.objects.filter(tenant=tenant,
+            splitter__lcp__barangay=selected_barangay)
+
+        total_ports = naps_in_area.aggregate(total=Sum('port_capacity'))['total'] or 0
+        used_ports = CustomerInstallation.objects.filter(tenant=tenant,
+            nap__in=naps_in_area,
+            status='ACTIVE').count()
+
+        # Customer counts and growth (new customers)
+        customer_counts = customers.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(installation__status='ACTIVE'), distinct=True),
+            new=Count('id', filter=Q(
+                created_at__date__gte=start_date,
+                created_at__date__lte=end_date
+            ))
+        )
+
+        # Monthly trend for selected area
+        monthly_trend = []
+        for i in range(3):
+            month_start = end_date.replace(day=1) - timedelta(days=i*30)
+            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+            month_revenue = area_rollups.filter(
+                date__gte=month_start,
+                date__lte=month_end
+            ).aggregate(total=Sum('total_amount'))['total'] or 0
+
+            monthly_trend.append({
+                'month': month_start.strftime('%B'),
+                'revenue': float(month_revenue)
+            })
+
+        monthly_trend.reverse()
+
+        selected_stats = {
+            'barangay': selected_barangay,
+            'total_customers': customer_counts['total'],
+            'active_customers': customer_counts['active'],
+            'revenue': revenue,
+            'active_subscriptions': active_subs,
+            'tickets_total': tickets['total'],
+            'tickets_resolved': tickets['resolved'],
+            'tickets_pending': tickets['pending'],
+            'total_ports': total_ports,
+            'used_ports': used_ports,
+            'port_utilization': (used_ports / total_ports * 100) if total_ports else 0,
+            'new_customers': customer_counts['new'],
+            'monthly_trend': json.dumps(monthly_trend),
+            'popular_plans': area_rollups.filter(
+                date__gte=start_date
+            ).values('subscription_plan__name').annotate(
+                count=Sum('subscription_count')
+            ).order_by('-count')[:5]
+        }
+    else:
+        # Overview of all areas, one grouped query per metric
+        customer_counts = {
+            row['barangay']: row
+            for row in Customer.objects.filter(tenant=tenant).values('barangay').annotate(
+                total=Count('id'),
+                active=Count('id', filter=Q(installation__status='ACTIVE'), distinct=True)
+            ).order_by()
+        }
+
+        revenue_by_barangay = dict(
+            revenue_rollups(tenant, start_date, end_date).values(
+                'barangay_id'
+            ).annotate(total=Sum('total_amount')).values_list('barangay_id', 'total')
+        )
+
+        tickets_by_barangay = dict(
+            Ticket.objects.filter(tenant=tenant,
+                created_at__date__gte=start_date,
+                created_at__date__lte=end_date
+            ).values('customer_installation__customer__barangay').annotate(
+                count=Count('id')
+            ).order_by().values_list('customer_installation__customer__barangay', 'count')
+        )
+
+        for barangay in barangays:
+            counts = customer_counts.get(barangay.id, {})
+            active_customers = counts.get('active', 0)
+
+            # Calculate potential (based on households estimate)
+            # This is a rough estimate - you might want to add actual household data
+            penetration_rate = (active_customers / 100) * 100  # Assuming 100 households per barangay
+
+            area_stats.append({
+                'barangay': barangay,
+                'total_customers': counts.get('total', 0),
+                'active_customers': active_customers,
+                'revenue': revenue_by_barangay.get(barangay.id, Decimal('0')),
+                'tickets': tickets_by_barangay.get(barangay.id, 0),
+                'penetration_rate': min(penetration_rate, 100)  # Cap at 100%
+            })
+
+        # Sort by revenue
+        area_stats.sort(key=lambda x: x['revenue'], reverse=True)
+
+        selected_stats = None
+
+    # Top performing areas (if showing overview)
+    if not selected_barangay:
+        top_revenue = area_stats[:5] if area_stats else []
+        low_penetration = sorted(
+            [a for a in area_stats if a['active_customers'] > 0],
+            key=lambda x: x['penetration_rate']
+        )[:5]
+        high_issues = sorted(
+            [a for a in area_stats if a['tickets'] > 0],
+            key=lambda x: x['tickets'],
+            reverse=True
+        )[:5]
+    else:
+        top_revenue = low_penetration = high_issues = []
+
+    return {
+        'barangays': barangays,
+        'selected_barangay': selected_barangay,
+        'selected_stats': selected_stats,
+        'area_stats': area_stats[:20],  # Show top 20 areas in overview
+        'top_revenue': top_revenue,
+        'low_penetration': low_penetration,
+        'high_issues': high_issues,
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+
+
+# Registry of reports that can be built outside the request cycle.
+# Each entry names the template, the permission needed to view it and the
+# functions that parse GET parameters and build the template context.
+# Reports relative to the current time set time_bucket, the seconds a cached
+# context stays valid for even when no write invalidates it.
+REPORTS = {
+    'daily_collection': {
+        'title': 'Daily Collection Report',
+        'template': 'reports/daily_collection.html',
+        'permission': 'reports.view_daily_collection_report',
+        'params': daily_collection_params,
+        'context': daily_collection_context,
+    },
+    'subscription_expiry': {
+        'title': 'Subscription Expiry Report',
+        'template': 'reports/subscription_expiry.html',
+        'permission': 'reports.view_subscription_expiry_report',
+        'params': subscription_expiry_params,
+        'context': subscription_expiry_context,
+        # Expiry groups move with the (UTC) date of timezone.now()
+        'time_bucket': 60 * 60,
+    },
+    'monthly_revenue': {
+        'title': 'Monthly Revenue Report',
+        'template': 'reports/monthly_revenue.html',
+        'permission': 'reports.view_monthly_revenue_report',
+        'params': monthly_revenue_params,
+        'context': monthly_revenue_context,
+    },
+    'ticket_analysis': {
+        'title': 'Ticket Analysis Report',
+        'template': 'reports/ticket_analysis.html',
+        'permission': 'reports.view_ticket_analysis_report',
+        'params': ticket_analysis_params,
+        'context': ticket_analysis_context,
+        # Overdue tickets are counted against timezone.now()
+        'time_bucket': 5 * 60,
+    },
+    'technician_performance': {
+        'title': 'Technician Performance Report',
+        'template': 'reports/technician_performance.html',
+        'permission': 'reports.view_technician_performance_report',
+        'params': technician_performance_params,
+        'context': technician_performance_context,
+    },
+    'customer_acquisition': {
+        'title': 'Customer Acquisition Report',
+        'template': 'reports/customer_acquisition.html',
+        'permission': 'reports.view_customer_acquisition_report',
+        'params': customer_acquisition_params,
+        'context': customer_acquisition_context,
+    },
+    'payment_behavior': {
+        'title': 'Payment Behavior Report',
+        'template': 'reports/payment_behavior.html',
+        'permission': 'reports.view_payment_behavior_report',
+        'params': payment_behavior_params,
+        'context': payment_behavior_context,
+    },
+    'area_performance': {
+        'title': 'Area Performance Dashboard',
+        'template': 'reports/area_performance.html',
+        'permission': 'reports.view_area_performance_dashboard',
+        'params': area_performance_params,
+        'context': area_performance_context,
+    },
+}
+
+
+def build_report_context(report_name, tenant, params):
+    """Compute the template context for a registered report."""
+    return REPORTS[report_name]['context'](tenant, params)
+
+
+def cached_report_context(report_name, tenant, params):
+    """
+    Template context for a report, served from the tenant's report cache
+    when the tenant's data has not changed since it was built and, for
+    reports relative to the current time, within the same time bucket.
+    """
+    key_params = params
+    time_bucket = REPORTS[report_name].get('time_bucket')
+    if time_bucket:
+        key_params = {**params, 'time_bucket': int(timezone.now().timestamp()) // time_bucket}
+    key = report_cache_key(tenant.id, report_name, key_params)
+    context = cache.get(key)
+    if context is None:
+        context = build_report_context(report_name, tenant, params)
+        # Pickling evaluates the querysets, so hits never touch the database
+        cache.set(key, context, REPORT_CACHE_TIMEOUT)
+    return context
@@ -0,0 +1,49 @@
+"""
+Tenant-scoped cache for report results.
+
+Cached reports are keyed by tenant, report name, normalized parameters and
+the tenant's report version. Writes to the data reports are built from bump
+the version of the affected tenant only (see signals.py), which makes every
+cached report of that tenant unreachable while other tenants keep theirs.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+REPORT_CACHE_TIMEOUT = getattr(settings, 'REPORT_CACHE_TIMEOUT', 60 * 60)
+
+
+def _version_key(tenant_id):
+    return f'reports:version:{tenant_id}'
+
+
+def get_report_version(tenant_id):
+    """Current report cache version for a tenant."""
+    key = _version_key(tenant_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted version never reuses an old number
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_report_version(tenant_id):
+    """Invalidate every cached report of a tenant."""
+    key = _version_key(tenant_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def report_cache_key(tenant_id, report_name, params):
+    """Cache key for a report with the given normalized parameters."""
+    digest = hashlib.md5(
+        json.dumps(params, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    version = get_report_version(tenant_id)
+    return f'reports:{tenant_id}:{version}:{report_name}:{digest}'
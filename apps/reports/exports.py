@@ -0,0 +1,391 @@
+"""
+Streaming CSV exports for the reports app.
+
+Each export is a generator of CSV rows built from `values_list` projections
+read in chunks with `.iterator()`, so large exports are written to the client
+as they are read instead of being held in memory. Small aggregate sections
+reuse the cached report context.
+"""
+import csv
+from datetime import date, timedelta
+
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.customers.models import Customer
+from apps.reports.builders import cached_report_context
+from apps.reports.services import revenue_rollups
+from apps.tickets.models import Ticket
+
+# Rows fetched from the database per round trip
+EXPORT_CHUNK_SIZE = 2000
+
+SUBSCRIPTION_TYPES = dict(CustomerSubscription.SUBSCRIPTION_TYPES)
+
+
+class Echo:
+    """File-like object that returns what is written instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, rows):
+    """Stream rows to the client as a CSV attachment."""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in rows),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _name(first_name, last_name):
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+def _local(value, fmt='%Y-%m-%d %I:%M %p'):
+    return timezone.localtime(value).strftime(fmt) if value else ''
+
+
+def _month_range(year, month):
+    start_date = date(year, month, 1)
+    end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start_date, end_date
+
+
+def _days_range(params):
+    end_date = date.fromisoformat(params['end_date'])
+    return end_date - timedelta(days=params['days']), end_date
+
+
+def daily_collection_rows(tenant, params):
+    report_date = date.fromisoformat(params['date'])
+
+    yield ['Daily Collection Report', f'Date: {report_date}']
+    yield []
+    yield ['Customer', 'Plan', 'Type', 'Amount', 'Processed By', 'Time']
+
+    payments = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        created_at__date=report_date
+    ).order_by('created_at').values_list(
+        'customer_installation__customer__first_name',
+        'customer_installation__customer__last_name',
+        'subscription_plan__name',
+        'subscription_type',
+        'amount',
+        'created_by__first_name',
+        'created_by__last_name',
+        'created_at',
+    )
+    for (first, last, plan, sub_type, amount, by_first, by_last,
+         created_at) in payments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            _name(first, last),
+            plan,
+            SUBSCRIPTION_TYPES.get(sub_type, sub_type),
+            amount,
+            _name(by_first, by_last) or 'System',
+            _local(created_at, '%I:%M %p'),
+        ]
+
+    totals = revenue_rollups(tenant, report_date, report_date).aggregate(
+        total=Sum('total_amount'),
+        count=Sum('subscription_count')
+    )
+    yield []
+    yield ['Total Collections:', f"₱{totals['total'] or 0}"]
+    yield ['Total Transactions:', totals['count'] or 0]
+
+
+def subscription_expiry_rows(tenant, params):
+    now = timezone.now()
+    today = timezone.localdate()
+
+    subscriptions = CustomerSubscription.objects.filter(tenant=tenant)
+    if params['barangay']:
+        subscriptions = subscriptions.filter(
+            customer_installation__customer__barangay_id=params['barangay']
+        )
+
+    sections = [
+        ('DUE IN 3 DAYS (URGENT)', 'Days Left', subscriptions.filter(
+            status='ACTIVE',
+            end_date__date__gt=today,
+            end_date__date__lte=today + timedelta(days=3)
+        ).order_by('end_date')),
+        ('DUE IN 7 DAYS', 'Days Left', subscriptions.filter(
+            status='ACTIVE',
+            end_date__date__gt=today + timedelta(days=3),
+            end_date__date__lte=today + timedelta(days=7)
+        ).order_by('end_date')),
+        ('EXPIRED YESTERDAY', 'Days Expired', subscriptions.filter(
+            status='EXPIRED',
+            end_date__date=today - timedelta(days=1)
+        ).order_by('customer_installation__customer__barangay__name')),
+        ('EXPIRED 3+ DAYS (FOR DISCONNECTION)', 'Days Expired', subscriptions.filter(
+            status='EXPIRED',
+            end_date__date__lte=today - timedelta(days=3),
+            end_date__date__gte=today - timedelta(days=30)
+        ).order_by('-end_date')),
+    ]
+
+    yield ['Subscription Expiry Report', f'Generated: {_local(now)}']
+
+    for title, days_column, section in sections:
+        yield []
+        yield [title]
+        yield ['Customer', 'Phone', 'Area', 'Plan', 'Expires', days_column]
+
+        rows = section.values_list(
+            'customer_installation__customer__first_name',
+            'customer_installation__customer__last_name',
+            'customer_installation__customer__phone_primary',
+            'customer_installation__customer__barangay__name',
+            'subscription_plan__name',
+            'end_date',
+        )
+        for first, last, phone, area, plan, end_date in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                _name(first, last),
+                phone,
+                area,
+                plan,
+                _local(end_date),
+                (end_date - now).days if days_column == 'Days Left' else (now - end_date).days,
+            ]
+
+
+def monthly_revenue_rows(tenant, params):
+    start_date, end_date = _month_range(params['year'], params['month'])
+
+    yield ['Monthly Revenue Report', start_date.strftime('%B %Y')]
+    yield []
+    yield ['Date', 'Payments', 'Revenue']
+
+    daily = revenue_rollups(tenant, start_date, end_date).values('date').annotate(
+        count=Sum('subscription_count'),
+        total=Sum('total_amount')
+    ).order_by('date').values_list('date', 'count', 'total')
+    for day, count, total in daily:
+        yield [day, count, total]
+
+    yield []
+    yield ['Date', 'Customer', 'Barangay', 'Plan', 'Type', 'Amount', 'New/Renewal']
+
+    payments = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date
+    ).order_by('created_at').values_list(
+        'created_at',
+        'customer_installation__customer__first_name',
+        'customer_installation__customer__last_name',
+        'customer_installation__customer__barangay__name',
+        'subscription_plan__name',
+        'subscription_type',
+        'amount',
+        'is_first_subscription',
+    )
+    for (created_at, first, last, area, plan, sub_type, amount,
+         is_first) in payments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            _local(created_at),
+            _name(first, last),
+            area,
+            plan,
+            SUBSCRIPTION_TYPES.get(sub_type, sub_type),
+            amount,
+            'New' if is_first else 'Renewal',
+        ]
+
+
+def ticket_analysis_rows(tenant, params):
+    start_date, end_date = _days_range(params)
+    categories = dict(Ticket.CATEGORY_CHOICES)
+    priorities = dict(Ticket.PRIORITY_CHOICES)
+    statuses = dict(Ticket.STATUS_CHOICES)
+
+    yield ['Ticket Analysis Report', f'{start_date} to {end_date}']
+    yield []
+    yield [
+        'Ticket', 'Created', 'Customer', 'Barangay', 'Category', 'Priority',
+        'Status', 'Assigned To', 'Resolved', 'Resolution Hours'
+    ]
+
+    tickets = Ticket.objects.filter(
+        tenant=tenant,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date
+    ).order_by('created_at').values_list(
+        'ticket_number',
+        'created_at',
+        'customer__first_name',
+        'customer__last_name',
+        'customer_installation__customer__barangay__name',
+        'category',
+        'priority',
+        'status',
+        'assigned_to__first_name',
+        'assigned_to__last_name',
+        'resolved_at',
+    )
+    for (number, created_at, first, last, area, category, priority, status,
+         tech_first, tech_last, resolved_at) in tickets.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            number,
+            _local(created_at),
+            _name(first, last),
+            area,
+            categories.get(category, category),
+            priorities.get(priority, priority),
+            statuses.get(status, status),
+            _name(tech_first, tech_last),
+            _local(resolved_at),
+            round((resolved_at - created_at).total_seconds() / 3600, 1) if resolved_at else '',
+        ]
+
+
+def technician_performance_rows(tenant, params):
+    context = cached_report_context('technician_performance', tenant, params)
+
+    yield ['Technician Performance Report', f"{context['start_date']} to {context['end_date']}"]
+    yield []
+    yield [
+        'Technician', 'Installations', 'Tickets Assigned', 'Tickets Resolved',
+        'Tickets Pending', 'Resolution Rate %', 'Avg Resolution Hours', 'Areas Covered'
+    ]
+    for stat in context['technician_stats']:
+        yield [
+            stat['technician'].get_full_name() or stat['technician'].username,
+            stat['installations_completed'],
+            stat['tickets_assigned'],
+            stat['tickets_resolved'],
+            stat['tickets_pending'],
+            round(stat['resolution_rate'], 1),
+            round(stat['avg_resolution_time'], 1),
+            ', '.join(area for area in stat['area_names'] if area),
+        ]
+
+
+def customer_acquisition_rows(tenant, params):
+    context = cached_report_context('customer_acquisition', tenant, params)
+    year = params['year']
+
+    yield ['Customer Acquisition Report', year]
+    yield []
+    yield ['Month', 'New Customers', 'Installations', 'Activations', 'Cumulative']
+    for month in context['monthly_data_table']:
+        yield [
+            month['month_name'],
+            month['new_customers'],
+            month['new_installations'],
+            month['activations'],
+            month['cumulative'],
+        ]
+
+    yield []
+    yield ['Customer', 'Barangay', 'Registered', 'Installed', 'Status']
+
+    customers = Customer.objects.filter(
+        tenant=tenant,
+        created_at__year=year
+    ).order_by('created_at').values_list(
+        'first_name',
+        'last_name',
+        'barangay__name',
+        'created_at',
+        'installation__installation_date',
+        'status',
+    )
+    for first, last, area, created_at, installed, status in customers.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [_name(first, last), area, _local(created_at, '%Y-%m-%d'), installed or '', status]
+
+
+def payment_behavior_rows(tenant, params):
+    start_date, end_date = _days_range(params)
+
+    yield ['Payment Behavior Report', f'{start_date} to {end_date}']
+    yield []
+    yield ['Paid', 'Customer', 'Plan', 'Type', 'Amount', 'Start', 'End']
+
+    payments = CustomerSubscription.objects.filter(
+        tenant=tenant,
+        created_at__date__gte=start_date,
+        created_at__date__lte=end_date
+    ).order_by('created_at').values_list(
+        'created_at',
+        'customer_installation__customer__first_name',
+        'customer_installation__customer__last_name',
+        'subscription_plan__name',
+        'subscription_type',
+        'amount',
+        'start_date',
+        'end_date',
+    )
+    for created_at, first, last, plan, sub_type, amount, start, end in payments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            _local(created_at),
+            _name(first, last),
+            plan,
+            SUBSCRIPTION_TYPES.get(sub_type, sub_type),
+            amount,
+            _local(start),
+            _local(end),
+        ]
+
+
+def area_performance_rows(tenant, params):
+    context = cached_report_context('area_performance', tenant, params)
+
+    yield ['Area Performance Report', f"{context['start_date']} to {context['end_date']}"]
+    yield []
+
+    stats = context['selected_stats']
+    if stats:
+        yield ['Barangay', stats['barangay'].name]
+        yield ['Total Customers', stats['total_customers']]
+        yield ['Active Customers', stats['active_customers']]
+        yield ['Revenue', stats['revenue']]
+        yield ['Active Subscriptions', stats['active_subscriptions']]
+        yield ['Tickets', stats['tickets_total']]
+        yield ['Tickets Resolved', stats['tickets_resolved']]
+        yield ['Tickets Pending', stats['tickets_pending']]
+        yield ['Ports Used', f"{stats['used_ports']}/{stats['total_ports']}"]
+        yield ['New Customers', stats['new_customers']]
+        return
+
+    yield ['Barangay', 'Total Customers', 'Active Customers', 'Revenue', 'Tickets', 'Penetration %']
+    for area in context['area_stats']:
+        yield [
+            area['barangay'].name,
+            area['total_customers'],
+            area['active_customers'],
+            area['revenue'],
+            area['tickets'],
+            round(area['penetration_rate'], 1),
+        ]
+
+
+# Filename pattern (formatted with the report parameters) and row generator
+# for each report's CSV export
+EXPORTS = {
+    'daily_collection': ('daily_collection_{date}.csv', daily_collection_rows),
+    'subscription_expiry': ('subscription_expiry_{date}.csv', subscription_expiry_rows),
+    'monthly_revenue': ('monthly_revenue_{year}-{month:02d}.csv', monthly_revenue_rows),
+    'ticket_analysis': ('ticket_analysis_{end_date}.csv', ticket_analysis_rows),
+    'technician_performance': ('technician_performance_{end_date}.csv', technician_performance_rows),
+    'customer_acquisition': ('customer_acquisition_{year}.csv', customer_acquisition_rows),
+    'payment_behavior': ('payment_behavior_{end_date}.csv', payment_behavior_rows),
+    'area_performance': ('area_performance_{end_date}.csv', area_performance_rows),
+}
+
+
+def export_report(report_name, tenant, params):
+    """Stream a report's CSV export."""
+    filename, rows = EXPORTS[report_name]
+    return stream_csv(filename.format(**params), rows(tenant, params))
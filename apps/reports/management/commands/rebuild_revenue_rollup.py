@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reports.services import rebuild_daily_revenue
+from apps.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue rollup used by revenue reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Rebuild for specific tenant ID only'
+        )
+        parser.add_argument(
+            '--start',
+            help='First date to rebuild (YYYY-MM-DD), defaults to all history'
+        )
+        parser.add_argument(
+            '--end',
+            help='Last date to rebuild (YYYY-MM-DD), defaults to today'
+        )
+
+    def parse_date(self, value, option):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Invalid {option} date "{value}", expected YYYY-MM-DD') from None
+
+    def handle(self, *args, **options):
+        start_date = self.parse_date(options.get('start'), '--start')
+        end_date = self.parse_date(options.get('end'), '--end')
+        tenant_id = options.get('tenant_id')
+
+        tenants = Tenant.objects.filter(is_active=True)
+        if tenant_id:
+            tenants = tenants.filter(id=tenant_id)
+            if not tenants.exists():
+                self.stdout.write(self.style.ERROR(f'Tenant {tenant_id} not found or inactive'))
+                return
+
+        for tenant in tenants:
+            rows = rebuild_daily_revenue(tenant, start_date, end_date)
+            self.stdout.write(self.style.SUCCESS(f'Tenant {tenant.name}: {rows} rollup rows'))
+
+        self.stdout.write(self.style.SUCCESS('Revenue rollup rebuild complete!'))
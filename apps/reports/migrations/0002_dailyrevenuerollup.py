@@ -0,0 +1,76 @@
+# Generated by Django 5.2.2 on 2026-10-16 22:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_revenue_rollup(apps, schema_editor):
+    """Populate the rollup from existing subscriptions."""
+    from django.db.models import Count, Sum
+    from django.db.models.functions import TruncDate
+
+    CustomerSubscription = apps.get_model('customer_subscriptions', 'CustomerSubscription')
+    DailyRevenueRollup = apps.get_model('reports', 'DailyRevenueRollup')
+
+    buckets = CustomerSubscription.objects.annotate(
+        day=TruncDate('created_at')
+    ).values(
+        'tenant_id',
+        'day',
+        'subscription_plan_id',
+        'customer_installation__customer__barangay_id',
+        'subscription_type',
+    ).annotate(
+        count=Count('id'),
+        total=Sum('amount')
+    ).order_by()
+
+    DailyRevenueRollup.objects.bulk_create(
+        (
+            DailyRevenueRollup(
+                tenant_id=bucket['tenant_id'],
+                date=bucket['day'],
+                subscription_plan_id=bucket['subscription_plan_id'],
+                barangay_id=bucket['customer_installation__customer__barangay_id'],
+                subscription_type=bucket['subscription_type'],
+                subscription_count=bucket['count'],
+                total_amount=bucket['total'],
+            )
+            for bucket in buckets.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barangays', '0002_initial'),
+        ('customer_subscriptions', '0002_initial'),
+        ('reports', '0001_initial'),
+        ('subscriptions', '0002_initial'),
+        ('tenants', '0003_remove_tenant_name_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField(help_text='Local date the payments were collected')),
+                ('subscription_type', models.CharField(max_length=20)),
+                ('subscription_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('barangay', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='barangays.barangay')),
+                ('subscription_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='subscriptions.subscriptionplan')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('tenant', 'date', 'subscription_plan', 'barangay', 'subscription_type')},
+            },
+        ),
+        migrations.RunPython(backfill_revenue_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-17 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_reportresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportresult',
+            name='cache_version',
+            field=models.BigIntegerField(blank=True, help_text='Tenant report cache version the content was built from', null=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 # Reports app models
 from django.db import models
 
+from apps.utils.models import TenantAwareModel
+
 
 class ReportPermission(models.Model):
     """
@@ -34,3 +36,88 @@ class ReportPermission(models.Model):
             ("schedule_reports", "Can schedule automated reports"),
             ("customize_report_parameters", "Can customize report parameters"),
         ]
+
+
+class DailyRevenueRollup(TenantAwareModel):
+    """
+    Pre-aggregated revenue per day, plan, barangay and subscription type.
+    The barangay is the customer's current one, so a customer's revenue
+    moves with them when they change barangay. Kept up to date by signals
+    on CustomerSubscription and Customer and rebuilt with the
+    `rebuild_revenue_rollup` management command. Revenue reports read from
+    this table instead of scanning raw subscriptions.
+    """
+    date = models.DateField(help_text="Local date the payments were collected")
+    subscription_plan = models.ForeignKey(
+        'subscriptions.SubscriptionPlan',
+        on_delete=models.CASCADE,
+        related_name='revenue_rollups'
+    )
+    barangay = models.ForeignKey(
+        'barangays.Barangay',
+        on_delete=models.CASCADE,
+        related_name='revenue_rollups'
+    )
+    subscription_type = models.CharField(max_length=20)
+    subscription_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = [
+            ['tenant', 'date', 'subscription_plan', 'barangay', 'subscription_type'],
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.date} - {self.subscription_plan_id}/{self.barangay_id}/"
+            f"{self.subscription_type}: {self.total_amount}"
+        )
+
+
+class ReportResult(TenantAwareModel):
+    """
+    A report rendered in the background by the `generate_report` task.
+    The rendered HTML is stored so reopening a report with the same
+    parameters is served straight from this table, for as long as the
+    tenant's report cache version still matches `cache_version`.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Success'),
+        ('FAILURE', 'Failure'),
+    ]
+
+    report_name = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, help_text="Normalized report parameters")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    task_id = models.CharField(max_length=255, blank=True)
+    content = models.TextField(blank=True, help_text="Rendered report HTML")
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        'users.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='report_results'
+    )
+    completed_at = models.DateTimeField(null=True, blank=True)
+    cache_version = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Tenant report cache version the content was built from"
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', 'report_name', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.report_name} ({self.status}) - {self.created_at}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('SUCCESS', 'FAILURE')
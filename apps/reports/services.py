@@ -0,0 +1,245 @@
+"""
+Revenue rollup maintenance, lookups and background report helpers for the
+reports app.
+
+Revenue reports read pre-aggregated rows from DailyRevenueRollup instead of
+scanning CustomerSubscription. Rows are keyed by tenant, local date,
+subscription plan, barangay and subscription type.
+
+Like the raw subscription reports, revenue is attributed to the customer's
+current barangay: when a customer moves, their subscriptions are moved to
+the new barangay's buckets (see move_customer_revenue).
+"""
+import logging
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.reports.cache import bump_report_version, get_report_version
+from apps.reports.models import DailyRevenueRollup, ReportResult
+
+logger = logging.getLogger(__name__)
+
+
+def subscription_rollup_key(subscription, **overrides):
+    """
+    Return the rollup bucket a subscription belongs to.
+
+    The barangay is the customer's current one, not where the customer
+    lived when the subscription was paid.
+    """
+    key = {
+        'tenant_id': subscription.tenant_id,
+        'date': timezone.localdate(subscription.created_at),
+        'subscription_plan_id': subscription.subscription_plan_id,
+        'barangay_id': subscription.customer_installation.customer.barangay_id,
+        'subscription_type': subscription.subscription_type,
+    }
+    key.update(overrides)
+    return key
+
+
+def apply_revenue_delta(key, count, amount):
+    """
+    Atomically add `count` payments totalling `amount` to a rollup bucket.
+
+    Negative deltas remove payments from an existing bucket; buckets that
+    drop to zero payments are deleted.
+    """
+    amount = Decimal(amount or 0)
+    rollups = DailyRevenueRollup.objects.filter(**key)
+
+    with transaction.atomic():
+        if count < 0:
+            rollups.filter(subscription_count__gte=-count).update(
+                subscription_count=F('subscription_count') + count,
+                total_amount=F('total_amount') + amount,
+                updated_at=timezone.now(),
+            )
+            rollups.filter(subscription_count=0).delete()
+            return
+
+        updated = rollups.update(
+            subscription_count=F('subscription_count') + count,
+            total_amount=F('total_amount') + amount,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            return
+
+        try:
+            with transaction.atomic():
+                DailyRevenueRollup.objects.create(
+                    subscription_count=count,
+                    total_amount=amount,
+                    **key
+                )
+        except IntegrityError:
+            # Another writer created the bucket first, add to it instead
+            rollups.update(
+                subscription_count=F('subscription_count') + count,
+                total_amount=F('total_amount') + amount,
+                updated_at=timezone.now(),
+            )
+
+
+def record_subscription_revenue(subscription):
+    """Add a newly created subscription to its rollup bucket."""
+    apply_revenue_delta(subscription_rollup_key(subscription), 1, subscription.amount)
+
+
+def remove_subscription_revenue(subscription, **previous):
+    """
+    Remove a subscription from its rollup bucket.
+
+    `previous` may override key fields (and `amount`) with the values the
+    subscription had when it was recorded.
+    """
+    amount = previous.pop('amount', subscription.amount)
+    apply_revenue_delta(subscription_rollup_key(subscription, **previous), -1, -amount)
+
+
+def move_customer_revenue(customer, previous_barangay_id):
+    """
+    Move a customer's subscriptions from the buckets of the barangay they
+    moved away from to the buckets of their current barangay.
+    """
+    buckets = CustomerSubscription.objects.filter(
+        tenant_id=customer.tenant_id,
+        customer_installation__customer=customer
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values(
+        'day',
+        'subscription_plan_id',
+        'subscription_type',
+    ).annotate(
+        count=Count('id'),
+        total=Sum('amount')
+    ).order_by()
+
+    with transaction.atomic():
+        for bucket in buckets:
+            key = {
+                'tenant_id': customer.tenant_id,
+                'date': bucket['day'],
+                'subscription_plan_id': bucket['subscription_plan_id'],
+                'subscription_type': bucket['subscription_type'],
+            }
+            apply_revenue_delta({**key, 'barangay_id': previous_barangay_id}, -bucket['count'], -bucket['total'])
+            apply_revenue_delta({**key, 'barangay_id': customer.barangay_id}, bucket['count'], bucket['total'])
+
+
+def rebuild_daily_revenue(tenant, start_date=None, end_date=None):
+    """
+    Recompute rollup rows for a tenant from raw subscriptions.
+
+    Optionally limited to an inclusive local date range. Returns the number
+    of rollup rows written.
+    """
+    subscriptions = CustomerSubscription.objects.filter(tenant=tenant)
+    rollups = DailyRevenueRollup.objects.filter(tenant=tenant)
+    if start_date:
+        subscriptions = subscriptions.filter(created_at__date__gte=start_date)
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        subscriptions = subscriptions.filter(created_at__date__lte=end_date)
+        rollups = rollups.filter(date__lte=end_date)
+
+    buckets = subscriptions.annotate(
+        day=TruncDate('created_at')
+    ).values(
+        'day',
+        'subscription_plan_id',
+        'customer_installation__customer__barangay_id',
+        'subscription_type',
+    ).annotate(
+        count=Count('id'),
+        total=Sum('amount')
+    ).order_by()
+
+    rows = [
+        DailyRevenueRollup(
+            tenant=tenant,
+            date=bucket['day'],
+            subscription_plan_id=bucket['subscription_plan_id'],
+            barangay_id=bucket['customer_installation__customer__barangay_id'],
+            subscription_type=bucket['subscription_type'],
+            subscription_count=bucket['count'],
+            total_amount=bucket['total'],
+        )
+        for bucket in buckets.iterator()
+    ]
+
+    with transaction.atomic():
+        rollups.delete()
+        DailyRevenueRollup.objects.bulk_create(rows, batch_size=1000)
+        transaction.on_commit(lambda: bump_report_version(tenant.id))
+
+    logger.info(f"Tenant {tenant.name}: rebuilt {len(rows)} revenue rollup rows")
+    return len(rows)
+
+
+def revenue_rollups(tenant, start_date, end_date):
+    """Rollup rows for a tenant within an inclusive local date range."""
+    return DailyRevenueRollup.objects.filter(
+        tenant=tenant,
+        date__gte=start_date,
+        date__lte=end_date
+    )
+
+
+def latest_report_result(tenant, report_name, params):
+    """
+    Most recent background result for a report with the given parameters
+    that can still be served.
+
+    Failed results and results built from an older report cache version
+    (the tenant's data changed since) are misses, as are results of
+    time-relative reports from before the report's time bucket.
+    """
+    from apps.reports.builders import REPORTS
+
+    results = ReportResult.objects.filter(
+        tenant=tenant,
+        report_name=report_name,
+        params=params,
+        cache_version=get_report_version(tenant.id)
+    ).exclude(status='FAILURE')
+    time_bucket = REPORTS[report_name].get('time_bucket')
+    if time_bucket:
+        results = results.filter(created_at__gte=timezone.now() - timedelta(seconds=time_bucket))
+    return results.order_by('-created_at').first()
+
+
+def queue_report(tenant, report_name, params, user=None):
+    """
+    Create a pending ReportResult and queue the task that renders it.
+
+    The task is sent once the surrounding transaction commits so the worker
+    always finds the result row.
+    """
+    from apps.reports.tasks import generate_report_for_tenant
+
+    result = ReportResult.objects.create(
+        tenant=tenant,
+        report_name=report_name,
+        params=params,
+        task_id=str(uuid.uuid4()),
+        requested_by=user,
+        cache_version=get_report_version(tenant.id)
+    )
+    transaction.on_commit(
+        lambda: generate_report_for_tenant.apply_async(
+            args=[tenant.id, result.id],
+            task_id=result.task_id
+        )
+    )
+    logger.info(f"Tenant {tenant.name}: queued {report_name} report {result.id}")
+    return result
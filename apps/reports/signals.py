@@ -0,0 +1,104 @@
+"""
+Keep DailyRevenueRollup in sync with CustomerSubscription writes and
+invalidate a tenant's cached reports when the data behind them changes.
+"""
+from contextlib import suppress
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.customer_installations.models import CustomerInstallation
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.customers.models import Customer
+from apps.reports.cache import bump_report_version
+from apps.reports.services import (
+    move_customer_revenue,
+    record_subscription_revenue,
+    remove_subscription_revenue,
+)
+from apps.tickets.models import Ticket
+
+# Fields that determine which rollup bucket a subscription counts towards
+REVENUE_FIELDS = ('amount', 'subscription_plan_id', 'subscription_type')
+
+
+def _revenue_snapshot(instance):
+    """Capture revenue fields without triggering loads of deferred fields."""
+    return {field: instance.__dict__.get(field) for field in REVENUE_FIELDS}
+
+
+@receiver(post_init, sender=CustomerSubscription)
+def remember_subscription_revenue(sender, instance, **kwargs):
+    """Remember the revenue fields a subscription was loaded with."""
+    instance._revenue_snapshot = _revenue_snapshot(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=CustomerSubscription)
+def update_revenue_rollup(sender, instance, created, raw=False, **kwargs):
+    """Add new subscriptions to the rollup and move changed ones between buckets."""
+    if raw:
+        return
+
+    previous = getattr(instance, '_revenue_snapshot', None)
+    current = _revenue_snapshot(instance)
+
+    if created:
+        record_subscription_revenue(instance)
+    elif previous and None not in previous.values() and previous != current:
+        remove_subscription_revenue(instance, **previous)
+        record_subscription_revenue(instance)
+
+    instance._revenue_snapshot = current
+
+
+@receiver(post_delete, sender=CustomerSubscription)
+def remove_revenue_rollup(sender, instance, **kwargs):
+    """Remove deleted subscriptions from the rollup."""
+    previous = getattr(instance, '_revenue_snapshot', None) or {}
+    # The installation or customer may already be removed (e.g. tenant
+    # deletion); the rollup rows cascade with them.
+    with suppress(ObjectDoesNotExist):
+        remove_subscription_revenue(
+            instance,
+            **{field: value for field, value in previous.items() if value is not None}
+        )
+
+
+@receiver(post_init, sender=Customer)
+def remember_customer_barangay(sender, instance, **kwargs):
+    """Remember the barangay a customer was loaded with."""
+    instance._barangay_snapshot = instance.__dict__.get('barangay_id') if instance.pk else None
+
+
+@receiver(post_save, sender=Customer)
+def move_revenue_rollup(sender, instance, created, raw=False, **kwargs):
+    """Move a customer's revenue to their new barangay when they move."""
+    if raw:
+        return
+
+    previous = getattr(instance, '_barangay_snapshot', None)
+    current = instance.__dict__.get('barangay_id')
+    if not created and previous is not None and current is not None and previous != current:
+        move_customer_revenue(instance, previous)
+
+    instance._barangay_snapshot = current
+
+
+# Models whose writes change what the reports show
+REPORT_SOURCE_MODELS = (CustomerSubscription, Ticket, Customer, CustomerInstallation)
+
+
+def invalidate_report_cache(sender, instance, raw=False, **kwargs):
+    """Invalidate the writing tenant's cached reports once the write commits."""
+    if raw:
+        return
+
+    tenant_id = instance.tenant_id
+    transaction.on_commit(lambda: bump_report_version(tenant_id))
+
+
+for model in REPORT_SOURCE_MODELS:
+    post_save.connect(invalidate_report_cache, sender=model)
+    post_delete.connect(invalidate_report_cache, sender=model)
@@ -0,0 +1,77 @@
+import logging
+
+from celery import shared_task
+from celery_progress.backend import BaseProgressRecorder, ProgressRecorder
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.reports.builders import REPORTS, cached_report_context
+from apps.reports.cache import get_report_version
+from apps.reports.models import ReportResult
+from apps.tenants.context import get_current_tenant
+from apps.tenants.tasks import TenantAwareTask
+
+logger = logging.getLogger(__name__)
+
+
+class GenerateReportTask(TenantAwareTask):
+    """Tenant-aware task that renders a report in the background."""
+
+    def run(self, result_id, progress_recorder=None):
+        """
+        Build and render the report described by a ReportResult for the
+        current tenant, storing the rendered HTML on the result.
+        """
+        tenant = get_current_tenant()
+        if not tenant:
+            logger.error("No tenant context available for generate_report")
+            return "Error: No tenant context"
+
+        try:
+            result = ReportResult.objects.get(id=result_id, tenant=tenant)
+        except ReportResult.DoesNotExist:
+            logger.error(f"Tenant {tenant.name}: Report result {result_id} not found")
+            return f"Error: Report result {result_id} not found"
+
+        progress = progress_recorder or BaseProgressRecorder()
+        report = REPORTS[result.report_name]
+
+        result.status = 'RUNNING'
+        # The content reflects the data as of now, not as of when it was queued
+        result.cache_version = get_report_version(tenant.id)
+        result.save(update_fields=['status', 'cache_version', 'updated_at'])
+        progress.set_progress(0, 2, 'Collecting data')
+
+        try:
+            context = cached_report_context(result.report_name, tenant, result.params)
+            progress.set_progress(1, 2, 'Rendering report')
+            result.content = render_to_string(f"{report['template']}#report-content", context)
+        except Exception as e:
+            logger.error(f"Tenant {tenant.name}: Failed to generate {result.report_name} report: {e}")
+            result.status = 'FAILURE'
+            result.error = str(e)
+            result.completed_at = timezone.now()
+            result.save(update_fields=['status', 'error', 'completed_at', 'updated_at'])
+            raise
+
+        result.status = 'SUCCESS'
+        result.completed_at = timezone.now()
+        result.save(update_fields=['status', 'content', 'completed_at', 'updated_at'])
+        progress.set_progress(2, 2, 'Done')
+
+        logger.info(f"Tenant {tenant.name}: Generated {result.report_name} report {result.id}")
+        return f"Tenant {tenant.name}: Generated {result.report_name} report {result.id}"
+
+
+# Create the shared task instance
+generate_report = GenerateReportTask()
+
+
+@shared_task(bind=True)
+def generate_report_for_tenant(self, tenant_id: int, result_id: int):
+    """Run generate_report for a specific tenant, reporting progress to celery_progress."""
+    return generate_report.run_for_tenant(
+        tenant_id,
+        result_id,
+        progress_recorder=ProgressRecorder(self)
+    )
@@ -189,7 +189,7 @@ class ReportTenantIsolationTest(TestCase):
         self.assertEqual(response['Content-Type'], 'text/csv')
         
         # Check CSV content
-        content = response.content.decode('utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8')
         self.assertIn("John Doe", content)
         self.assertNotIn("Jane Smith", content)
         
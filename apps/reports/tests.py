@@ -1 +1,764 @@
-# Tests for reports app
\ No newline at end of file
+# Tests for reports app
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.barangays.models import Barangay
+from apps.customer_installations.models import CustomerInstallation
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.customers.models import Customer
+from apps.lcp.models import LCP, NAP, Splitter
+from apps.reports.builders import (
+    area_performance_context,
+    area_performance_params,
+    cached_report_context,
+    customer_acquisition_context,
+    customer_acquisition_params,
+    monthly_revenue_params,
+    payment_behavior_context,
+    payment_behavior_params,
+    technician_performance_context,
+    technician_performance_params,
+    ticket_analysis_context,
+    ticket_analysis_params,
+)
+from apps.reports.cache import get_report_version
+from apps.reports.models import DailyRevenueRollup, ReportResult
+from apps.reports.services import rebuild_daily_revenue
+from apps.reports.tasks import generate_report
+from apps.subscriptions.models import SubscriptionPlan
+from apps.tickets.models import Ticket
+from apps.utils.test_base import TenantTestCase
+
+
+class ReportTestMixin:
+    """Shared fixtures for report tests."""
+
+    def create_report_fixtures(self):
+        self.barangay = Barangay.objects.create(tenant=self.tenant, name='Rollup Barangay')
+        self.plan = SubscriptionPlan.objects.create(
+            tenant=self.tenant,
+            name='Rollup Plan',
+            speed=25,
+            price=Decimal('1000.00')
+        )
+        self.customer = Customer.objects.create(
+            tenant=self.tenant,
+            first_name='Rollup',
+            last_name='Customer',
+            email='rollup.customer@example.com',
+            phone_primary='09000000000',
+            street_address='1 Rollup St',
+            barangay=self.barangay
+        )
+        self.installation = CustomerInstallation.objects.create(
+            tenant=self.tenant,
+            customer=self.customer,
+            installation_date=timezone.localdate(),
+            installation_technician=self.user
+        )
+
+    def create_subscription(self, subscription_type='one_month', amount=None, **kwargs):
+        return CustomerSubscription.objects.create(
+            tenant=self.tenant,
+            customer_installation=self.installation,
+            subscription_plan=self.plan,
+            subscription_type=subscription_type,
+            amount=amount or self.plan.price,
+            start_date=kwargs.pop('start_date', timezone.now()),
+            created_by=self.user,
+            **kwargs
+        )
+
+    def create_ticket(self, **kwargs):
+        return Ticket.objects.create(
+            tenant=self.tenant,
+            customer=self.customer,
+            customer_installation=self.installation,
+            title='No connection',
+            description='Customer reports no connection',
+            reported_by=self.user,
+            **kwargs
+        )
+
+    def grant_report_permissions(self, user):
+        user.user_permissions.add(*Permission.objects.filter(content_type__app_label='reports'))
+
+
+class DailyRevenueRollupTest(ReportTestMixin, TenantTestCase):
+    """Test the pre-aggregated revenue rollup."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+
+    def get_rollup(self):
+        return DailyRevenueRollup.objects.get(
+            tenant=self.tenant,
+            date=timezone.localdate(),
+            subscription_plan=self.plan,
+            barangay=self.barangay,
+            subscription_type='one_month'
+        )
+
+    def test_new_subscriptions_increment_rollup(self):
+        """Creating subscriptions adds them to the day's bucket."""
+        self.create_subscription()
+        self.create_subscription()
+
+        rollup = self.get_rollup()
+        self.assertEqual(rollup.subscription_count, 2)
+        self.assertEqual(rollup.total_amount, Decimal('2000.00'))
+
+    def test_status_change_does_not_double_count(self):
+        """Saving without touching revenue fields leaves the rollup alone."""
+        subscription = self.create_subscription()
+        subscription.status = 'CANCELLED'
+        subscription.save()
+
+        self.assertEqual(self.get_rollup().subscription_count, 1)
+
+    def test_changed_type_moves_between_buckets(self):
+        """Changing the subscription type moves the payment to another bucket."""
+        subscription = self.create_subscription()
+        subscription = CustomerSubscription.objects.get(pk=subscription.pk)
+        subscription.subscription_type = 'custom'
+        subscription.amount = Decimal('300.00')
+        subscription.save()
+
+        rollups = DailyRevenueRollup.objects.filter(tenant=self.tenant)
+        self.assertEqual(rollups.count(), 1)
+        self.assertEqual(rollups.get().subscription_type, 'custom')
+        self.assertEqual(rollups.get().total_amount, Decimal('300.00'))
+
+    def test_delete_removes_from_rollup(self):
+        """Deleting the only subscription in a bucket removes the bucket."""
+        subscription = self.create_subscription()
+        subscription.delete()
+
+        self.assertFalse(DailyRevenueRollup.objects.filter(tenant=self.tenant).exists())
+
+    def test_customer_move_moves_revenue(self):
+        """Revenue follows a customer to their new barangay, also on later deletes."""
+        subscription = self.create_subscription()
+        moved_to = Barangay.objects.create(tenant=self.tenant, name='New Barangay')
+
+        self.customer.barangay = moved_to
+        self.customer.save()
+
+        rollups = DailyRevenueRollup.objects.filter(tenant=self.tenant)
+        self.assertEqual(list(rollups.values_list('barangay', 'subscription_count')), [(moved_to.id, 1)])
+
+        subscription.delete()
+        self.assertFalse(rollups.exists())
+
+    def test_rebuild_matches_incremental(self):
+        """A full rebuild produces the same totals as incremental updates."""
+        self.create_subscription()
+        self.create_subscription(subscription_type='fifteen_days')
+        expected = sorted(
+            DailyRevenueRollup.objects.filter(tenant=self.tenant).values_list(
+                'subscription_type', 'subscription_count', 'total_amount'
+            )
+        )
+
+        DailyRevenueRollup.objects.filter(tenant=self.tenant).update(total_amount=0)
+        rows = rebuild_daily_revenue(self.tenant)
+
+        self.assertEqual(rows, 2)
+        self.assertEqual(
+            sorted(
+                DailyRevenueRollup.objects.filter(tenant=self.tenant).values_list(
+                    'subscription_type', 'subscription_count', 'total_amount'
+                )
+            ),
+            expected
+        )
+
+    def test_rollup_is_tenant_scoped(self):
+        """Rebuilding one tenant never touches another tenant's rows."""
+        self.create_subscription()
+        rebuild_daily_revenue(self.other_tenant)
+
+        self.assertEqual(self.get_rollup().subscription_count, 1)
+
+    def test_monthly_revenue_report_reads_rollup(self):
+        """The monthly report totals come from the rollup."""
+        for _ in range(3):
+            self.create_subscription()
+        self.grant_report_permissions(self.user)
+        self.client.force_login(self.user)
+
+        today = timezone.localdate()
+        url = reverse('reports:monthly_revenue') + f'?month={today.month}&year={today.year}'
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_revenue'], Decimal('3000.00'))
+        self.assertEqual(response.context['total_subscriptions'], 3)
+
+
+class MonthlyRevenueSplitTest(ReportTestMixin, TenantTestCase):
+    """Test the new vs renewal revenue split."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+        self.grant_report_permissions(self.user)
+        self.client.force_login(self.user)
+
+    def test_only_first_subscription_is_flagged(self):
+        """The installation's first subscription is new, later ones are renewals."""
+        first = self.create_subscription()
+        renewal = self.create_subscription(subscription_type='fifteen_days')
+
+        self.assertTrue(first.is_first_subscription)
+        self.assertFalse(renewal.is_first_subscription)
+
+    def test_new_vs_renewal_revenue(self):
+        """Monthly report splits revenue using the first-subscription flag."""
+        self.create_subscription()
+        self.create_subscription(subscription_type='fifteen_days')
+
+        today = timezone.localdate()
+        response = self.client.get(
+            reverse('reports:monthly_revenue') + f'?month={today.month}&year={today.year}'
+        )
+
+        self.assertEqual(response.context['new_revenue'], Decimal('1000.00'))
+        self.assertEqual(response.context['renewal_revenue'], Decimal('500.00'))
+
+
+class AsyncReportTest(ReportTestMixin, TenantTestCase):
+    """Test background report generation."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+        self.create_subscription()
+        self.grant_report_permissions(self.user)
+        self.client.force_login(self.user)
+        self.url = reverse('reports:monthly_revenue') + '?mode=async'
+
+    def test_async_mode_queues_report(self):
+        """Opening a report in async mode queues a task instead of computing it."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'reports/report_async.html')
+        self.assertEqual(len(callbacks), 1)
+
+        result = ReportResult.objects.get(tenant=self.tenant)
+        self.assertEqual(result.status, 'PENDING')
+        self.assertEqual(result.report_name, 'monthly_revenue')
+        self.assertContains(response, result.task_id)
+
+    def test_task_stores_rendered_report(self):
+        """The task renders the report for the result's tenant and stores it."""
+        with self.captureOnCommitCallbacks():
+            self.client.get(self.url)
+        result = ReportResult.objects.get(tenant=self.tenant)
+
+        generate_report.run_for_tenant(self.tenant.id, result.id)
+
+        result.refresh_from_db()
+        self.assertEqual(result.status, 'SUCCESS')
+        self.assertIsNotNone(result.completed_at)
+        self.assertIn('1,000', result.content)
+
+    def test_stored_result_is_reused(self):
+        """Reopening a finished report serves the stored result without queueing."""
+        with self.captureOnCommitCallbacks():
+            self.client.get(self.url)
+        result = ReportResult.objects.get(tenant=self.tenant)
+        generate_report.run_for_tenant(self.tenant.id, result.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(callbacks), 0)
+        self.assertEqual(ReportResult.objects.filter(tenant=self.tenant).count(), 1)
+        self.assertContains(response, '1,000')
+
+    def test_failed_result_is_not_served(self):
+        """A failed result is queued again instead of being served."""
+        with self.captureOnCommitCallbacks():
+            self.client.get(self.url)
+        ReportResult.objects.filter(tenant=self.tenant).update(status='FAILURE')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.get(self.url)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ReportResult.objects.filter(tenant=self.tenant).count(), 2)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_result_from_older_version_is_not_served(self):
+        """A write after a result was built makes the stored result a miss."""
+        cache.clear()
+        with self.captureOnCommitCallbacks():
+            self.client.get(self.url)
+        result = ReportResult.objects.get(tenant=self.tenant)
+        generate_report.run_for_tenant(self.tenant.id, result.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_subscription()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.get(self.url)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ReportResult.objects.filter(tenant=self.tenant).count(), 2)
+
+    def test_other_tenant_results_are_not_served(self):
+        """A result stored for another tenant is never reused."""
+        with self.captureOnCommitCallbacks():
+            self.client.get(self.url)
+        ReportResult.objects.filter(tenant=self.tenant).update(tenant=self.other_tenant)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.get(self.url)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ReportResult.objects.filter(tenant=self.tenant).count(), 1)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReportCacheTest(ReportTestMixin, TenantTestCase):
+    """Test the tenant-scoped report cache."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.create_report_fixtures()
+        self.params = monthly_revenue_params({})
+
+    def test_repeated_report_is_served_from_cache(self):
+        """A second build with unchanged data runs no queries."""
+        cached_report_context('monthly_revenue', self.tenant, self.params)
+
+        with self.assertNumQueries(0):
+            context = cached_report_context('monthly_revenue', self.tenant, self.params)
+        self.assertEqual(context['total_revenue'], Decimal('0'))
+
+    def test_time_relative_reports_expire_with_their_bucket(self):
+        """Overdue tickets are recounted once the time bucket moves on, even without writes."""
+        params = ticket_analysis_params({})
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        with patch('django.utils.timezone.now', return_value=start):
+            cached_report_context('ticket_analysis', self.tenant, params)
+        with patch('django.utils.timezone.now', return_value=start + timedelta(minutes=1)), \
+                self.assertNumQueries(0):
+            cached_report_context('ticket_analysis', self.tenant, params)
+        with patch('django.utils.timezone.now', return_value=start + timedelta(minutes=10)), \
+                CaptureQueriesContext(connection) as queries:
+            cached_report_context('ticket_analysis', self.tenant, params)
+        self.assertTrue(queries)
+
+    def test_write_invalidates_tenant_reports(self):
+        """Saving a subscription makes the next build see the new data."""
+        cached_report_context('monthly_revenue', self.tenant, self.params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_subscription()
+
+        context = cached_report_context('monthly_revenue', self.tenant, self.params)
+        self.assertEqual(context['total_revenue'], Decimal('1000.00'))
+
+    def test_write_does_not_invalidate_other_tenants(self):
+        """A write in one tenant leaves other tenants' versions untouched."""
+        other_version = get_report_version(self.other_tenant.id)
+        version = get_report_version(self.tenant.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.save()
+
+        self.assertNotEqual(get_report_version(self.tenant.id), version)
+        self.assertEqual(get_report_version(self.other_tenant.id), other_version)
+
+
+class ReportExportTest(ReportTestMixin, TenantTestCase):
+    """Test the streaming CSV exports."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+        self.grant_report_permissions(self.user)
+        self.client.force_login(self.user)
+
+    def export(self, url_name, query=''):
+        response = self.client.get(reverse(url_name) + f'?{query}&export=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_every_report_exports_csv(self):
+        """All reports stream a CSV export."""
+        self.create_subscription()
+        for url_name in [
+            'reports:daily_collection',
+            'reports:subscription_expiry',
+            'reports:monthly_revenue',
+            'reports:ticket_analysis',
+            'reports:technician_performance',
+            'reports:customer_acquisition',
+            'reports:payment_behavior',
+            'reports:area_performance',
+        ]:
+            with self.subTest(url_name=url_name):
+                self.assertTrue(self.export(url_name))
+
+    def test_daily_collection_export_lists_payments(self):
+        """The daily export lists each payment and the day's totals."""
+        self.create_subscription()
+        content = self.export('reports:daily_collection')
+
+        self.assertIn('Rollup Customer', content)
+        self.assertIn('Total Transactions:,1', content)
+
+    def test_expiry_export_includes_every_section(self):
+        """The expiry export covers due and expired subscriptions."""
+        subscription = self.create_subscription(
+            start_date=timezone.now() - timedelta(days=35)
+        )
+        CustomerSubscription.objects.filter(pk=subscription.pk).update(status='EXPIRED')
+        content = self.export('reports:subscription_expiry')
+
+        self.assertIn('DUE IN 7 DAYS', content)
+        self.assertIn('EXPIRED YESTERDAY', content)
+        self.assertIn('EXPIRED 3+ DAYS (FOR DISCONNECTION)', content)
+        self.assertIn('Rollup Customer', content)
+
+
+class TechnicianPerformanceReportTest(ReportTestMixin, TenantTestCase):
+    """Test the set-based technician performance report."""
+
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        self.create_report_fixtures()
+        self.params = technician_performance_params({})
+
+    def get_stats(self, context, user):
+        return next(stat for stat in context['technician_stats'] if stat['technician'] == user)
+
+    def test_technician_stats(self):
+        """Counts, average resolution time and areas are computed per technician."""
+        resolved = self.create_ticket(assigned_to=self.user, status='resolved')
+        Ticket.objects.filter(pk=resolved.pk).update(
+            resolved_at=resolved.created_at + timedelta(hours=2)
+        )
+        self.create_ticket(assigned_to=self.user)
+
+        stats = self.get_stats(technician_performance_context(self.tenant, self.params), self.user)
+
+        self.assertEqual(stats['installations_completed'], 1)
+        self.assertEqual(stats['tickets_assigned'], 2)
+        self.assertEqual(stats['tickets_resolved'], 1)
+        self.assertEqual(stats['tickets_pending'], 1)
+        self.assertEqual(stats['resolution_rate'], 50)
+        self.assertAlmostEqual(stats['avg_resolution_time'], 2.0)
+        self.assertEqual(stats['area_names'], ['Rollup Barangay'])
+
+    def test_daily_activity_covers_range(self):
+        """The chart has one point per day with that day's activity."""
+        self.create_ticket(assigned_to=self.user)
+
+        context = technician_performance_context(self.tenant, self.params)
+        daily = json.loads(context['daily_activity'])
+
+        self.assertEqual(len(daily), self.params['days'] + 1)
+        self.assertEqual(daily[-1], {
+            'date': timezone.localdate().isoformat(),
+            'installations': 1,
+            'tickets': 1,
+        })
+
+    def test_query_count_is_constant(self):
+        """Adding technicians does not add queries."""
+        with CaptureQueriesContext(connection) as baseline:
+            technician_performance_context(self.tenant, self.params)
+
+        for index in range(3):
+            self.create_test_user(f'tech{index}', is_staff=True)
+
+        with CaptureQueriesContext(connection) as more_staff:
+            technician_performance_context(self.tenant, self.params)
+
+        self.assertEqual(len(more_staff), len(baseline))
+
+
+class TicketAnalysisReportTest(ReportTestMixin, TenantTestCase):
+    """Test the set-based ticket analysis report."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+        self.params = ticket_analysis_params({})
+
+    def resolve_after(self, ticket, hours):
+        Ticket.objects.filter(pk=ticket.pk).update(
+            status='resolved',
+            resolved_at=ticket.created_at + timedelta(hours=hours)
+        )
+
+    def age(self, ticket, hours):
+        Ticket.objects.filter(pk=ticket.pk).update(
+            created_at=timezone.now() - timedelta(hours=hours)
+        )
+
+    def test_resolution_time_statistics(self):
+        """Average, median and 90th percentile are computed per priority."""
+        for hours in (1, 2, 3, 10):
+            self.resolve_after(self.create_ticket(priority='high'), hours)
+        self.create_ticket(priority='high')
+
+        context = ticket_analysis_context(self.tenant, self.params)
+        stats = next(stat for stat in context['priority_stats'] if stat['priority'] == 'high')
+
+        self.assertEqual(stats['count'], 5)
+        self.assertEqual(stats['avg_resolution_hours'], 4.0)
+        self.assertEqual(stats['median_resolution_hours'], 2.5)
+        self.assertEqual(stats['p90_resolution_hours'], 7.9)
+        self.assertEqual(context['resolved_tickets'], 4)
+        self.assertEqual(context['pending_tickets'], 1)
+
+    def test_overdue_tickets_follow_priority_sla(self):
+        """Overdue detection in SQL agrees with Ticket.is_overdue."""
+        urgent = self.create_ticket(priority='urgent')
+        self.age(urgent, 5)
+        low = self.create_ticket(priority='low')
+        self.age(low, 5)
+        resolved = self.create_ticket(priority='urgent')
+        self.age(resolved, 5)
+        self.resolve_after(Ticket.objects.get(pk=resolved.pk), 1)
+
+        context = ticket_analysis_context(self.tenant, self.params)
+
+        self.assertEqual(context['overdue_count'], 1)
+        self.assertEqual(list(context['overdue_tickets']), [urgent])
+        for ticket in Ticket.objects.filter(tenant=self.tenant):
+            self.assertEqual(ticket.is_overdue, ticket == urgent)
+
+    def test_daily_trend(self):
+        """The chart has one point per day with that day's counts."""
+        self.resolve_after(self.create_ticket(), 1)
+        self.create_ticket()
+
+        context = ticket_analysis_context(self.tenant, self.params)
+        daily = json.loads(context['daily_tickets'])
+
+        self.assertEqual(len(daily), self.params['days'] + 1)
+        self.assertEqual(daily[-1], {
+            'date': timezone.localdate().isoformat(),
+            'total': 2,
+            'resolved': 1,
+        })
+
+    def test_query_count_is_constant(self):
+        """A longer date range does not add queries."""
+        with CaptureQueriesContext(connection) as short_range:
+            ticket_analysis_context(self.tenant, ticket_analysis_params({'days': '7'}))
+
+        with CaptureQueriesContext(connection) as long_range:
+            ticket_analysis_context(self.tenant, ticket_analysis_params({'days': '365'}))
+
+        self.assertEqual(len(long_range), len(short_range))
+
+
+class AreaPerformanceReportTest(ReportTestMixin, TenantTestCase):
+    """Test the grouped area performance dashboard."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+
+    def add_barangay(self, name):
+        barangay = Barangay.objects.create(tenant=self.tenant, name=name)
+        customer = Customer.objects.create(
+            tenant=self.tenant,
+            first_name=name,
+            last_name='Customer',
+            email=f'{name.lower()}@example.com',
+            phone_primary='09000000001',
+            street_address='1 Area St',
+            barangay=barangay
+        )
+        CustomerInstallation.objects.create(
+            tenant=self.tenant,
+            customer=customer,
+            installation_date=timezone.localdate(),
+            installation_technician=self.user,
+            status='INACTIVE'
+        )
+        return barangay
+
+    def test_overview_stats(self):
+        """Customer, revenue and ticket totals are merged per barangay."""
+        self.create_subscription()
+        self.create_ticket()
+        quiet = self.add_barangay('Quiet')
+
+        context = area_performance_context(self.tenant, area_performance_params({}))
+        stats = {stat['barangay']: stat for stat in context['area_stats']}
+
+        self.assertEqual(stats[self.barangay]['total_customers'], 1)
+        self.assertEqual(stats[self.barangay]['active_customers'], 1)
+        self.assertEqual(stats[self.barangay]['revenue'], self.plan.price)
+        self.assertEqual(stats[self.barangay]['tickets'], 1)
+        self.assertEqual(stats[quiet]['total_customers'], 1)
+        self.assertEqual(stats[quiet]['active_customers'], 0)
+        self.assertEqual(stats[quiet]['revenue'], Decimal('0'))
+        self.assertEqual(stats[quiet]['tickets'], 0)
+
+    def test_overview_query_count_is_constant(self):
+        """Adding barangays does not add queries."""
+        params = area_performance_params({})
+        with CaptureQueriesContext(connection) as baseline:
+            area_performance_context(self.tenant, params)
+
+        for index in range(3):
+            self.add_barangay(f'Area{index}')
+
+        with CaptureQueriesContext(connection) as more_areas:
+            area_performance_context(self.tenant, params)
+
+        self.assertEqual(len(more_areas), len(baseline))
+
+    def test_detail_port_capacity(self):
+        """Port totals for a barangay are summed across its NAPs."""
+        lcp = LCP.objects.create(
+            tenant=self.tenant, name='Area LCP', code='LCP-A', location='Area', barangay=self.barangay
+        )
+        splitter = Splitter.objects.create(tenant=self.tenant, lcp=lcp, code='SPL-A', type='1:8')
+        for port, capacity in ((1, 8), (2, 16)):
+            NAP.objects.create(
+                tenant=self.tenant,
+                splitter=splitter,
+                splitter_port=port,
+                code=f'NAP-{port}',
+                name=f'NAP {port}',
+                location='Area',
+                port_capacity=capacity
+            )
+
+        context = area_performance_context(
+            self.tenant, area_performance_params({'barangay': str(self.barangay.id)})
+        )
+        stats = context['selected_stats']
+
+        self.assertEqual(stats['total_ports'], 24)
+        self.assertEqual(stats['total_customers'], 1)
+        self.assertEqual(stats['active_customers'], 1)
+        self.assertEqual(stats['new_customers'], 1)
+
+
+class CustomerAcquisitionReportTest(ReportTestMixin, TenantTestCase):
+    """Test the month-grouped customer acquisition report."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+        self.params = customer_acquisition_params({})
+
+    def test_monthly_series(self):
+        """New customers, installations and activations land in their month."""
+        self.create_subscription()
+        self.create_subscription()
+
+        context = customer_acquisition_context(self.tenant, self.params)
+        month = context['monthly_data_table'][timezone.localdate().month - 1]
+
+        self.assertEqual(month['new_customers'], 1)
+        self.assertEqual(month['new_installations'], 1)
+        self.assertEqual(month['activations'], 1)
+        self.assertEqual(context['total_new_customers'], 1)
+
+    def test_activation_time_covers_all_installations(self):
+        """Activation time averages the first subscription of every installation."""
+        year = self.params['year']
+        CustomerInstallation.objects.filter(pk=self.installation.pk).update(
+            installation_date=date(year, 1, 1)
+        )
+        first = self.create_subscription()
+        self.create_subscription()
+        CustomerSubscription.objects.filter(pk=first.pk).update(
+            created_at=timezone.make_aware(datetime(year, 1, 5, 9))
+        )
+
+        context = customer_acquisition_context(self.tenant, self.params)
+
+        self.assertEqual(context['avg_activation_time'], 4)
+
+    def test_query_count_is_constant(self):
+        """More customers do not add queries."""
+        with CaptureQueriesContext(connection) as baseline:
+            customer_acquisition_context(self.tenant, self.params)
+
+        self.create_subscription()
+
+        with CaptureQueriesContext(connection) as more_data:
+            customer_acquisition_context(self.tenant, self.params)
+
+        self.assertEqual(len(more_data), len(baseline))
+
+
+class PaymentBehaviorReportTest(ReportTestMixin, TenantTestCase):
+    """Test the window-function payment behavior report."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_report_fixtures()
+        self.params = payment_behavior_params({})
+
+    def test_renewal_gaps(self):
+        """Gaps are measured from the previous subscription of the installation."""
+        first = self.create_subscription(start_date=timezone.now() - timedelta(days=70))
+        self.create_subscription(start_date=first.end_date - timedelta(days=3))
+        self.create_subscription(start_date=timezone.now() + timedelta(days=60))
+
+        stats = payment_behavior_context(self.tenant, self.params)['renewal_stats']
+
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['early'], 1)
+        self.assertEqual(stats['late'], 1)
+
+    def test_amount_and_weekday_distribution(self):
+        """Every subscription falls in one amount bucket and one weekday."""
+        self.create_subscription(subscription_type='fifteen_days')
+        self.create_subscription()
+        self.create_subscription(subscription_type='custom', amount=Decimal('2500.00'))
+
+        context = payment_behavior_context(self.tenant, self.params)
+        buckets = {row['range']: row['count'] for row in context['amount_distribution']}
+        dow = json.loads(context['dow_data'])
+
+        self.assertEqual(buckets, {
+            '₱0-500': 0, '₱500-1000': 1, '₱1000-1500': 1, '₱1500-2000': 0, '₱2000+': 1,
+        })
+        self.assertEqual(sum(day['count'] for day in dow), 3)
+        self.assertEqual(context['custom_stats']['count'], 1)
+        self.assertEqual(context['custom_stats']['max'], 2500.0)
+        self.assertEqual(context['total_revenue'], Decimal('4000.00'))
+
+    def test_runs_under_ten_queries(self):
+        """The report needs fewer than ten queries however many renewals exist."""
+        for _ in range(3):
+            self.create_subscription()
+
+        with CaptureQueriesContext(connection) as queries:
+            payment_behavior_context(self.tenant, self.params)
+
+        self.assertLess(len(queries), 10)
@@ -166,7 +166,7 @@ def router_delete(request, pk):
 def router_quick_stats(request):
     """Get quick statistics for routers (for dashboard)"""
     stats = {
-        "total": Router.objects.count(),
+        "total": Router.objects.filter(tenant=request.tenant).count(),
     }
     
     return render(request, "routers/partials/router_stats.html", {"stats": stats})
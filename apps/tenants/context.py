@@ -1,44 +1,74 @@
 """
 Tenant context management for background tasks and signals.
+
+The current tenant is kept in a context variable, so each thread and each
+asyncio task sees its own tenant. asyncio.to_thread and asgiref's
+sync_to_async carry the caller's context into the worker thread; use
+copy_context_to or ContextThreadPoolExecutor when submitting work to a
+thread pool directly, whose threads otherwise start without a tenant.
 """
-import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Optional
+from functools import partial
 
 from apps.tenants.models import Tenant
 
-# Thread-local storage for tenant context
-_thread_locals = threading.local()
+_current_tenant: contextvars.ContextVar[Tenant | None] = contextvars.ContextVar(
+    'current_tenant', default=None
+)
+
 
+def get_current_tenant() -> Tenant | None:
+    """Get the current tenant from the context."""
+    return _current_tenant.get()
 
-def get_current_tenant() -> Optional[Tenant]:
-    """Get the current tenant from thread-local storage."""
-    return getattr(_thread_locals, 'tenant', None)
 
+def set_current_tenant(tenant: Tenant | None) -> contextvars.Token:
+    """Set the current tenant in the context."""
+    return _current_tenant.set(tenant)
 
-def set_current_tenant(tenant: Optional[Tenant]) -> None:
-    """Set the current tenant in thread-local storage."""
-    _thread_locals.tenant = tenant
+
+def reset_current_tenant(token: contextvars.Token) -> None:
+    """Restore the tenant that was current before set_current_tenant returned `token`."""
+    _current_tenant.reset(token)
 
 
 @contextmanager
 def tenant_context(tenant: Tenant):
     """
     Context manager to set tenant context for background operations.
-    
+
     Usage:
         with tenant_context(tenant):
             # Code here will have access to the tenant context
             # via get_current_tenant()
     """
-    previous_tenant = get_current_tenant()
-    set_current_tenant(tenant)
+    token = set_current_tenant(tenant)
     try:
         yield tenant
     finally:
-        set_current_tenant(previous_tenant)
+        reset_current_tenant(token)
 
 
 def clear_tenant_context():
     """Clear the current tenant context."""
     set_current_tenant(None)
+
+
+def copy_context_to(func, *args, **kwargs):
+    """
+    Bind `func` to a copy of the current context, including the tenant and
+    the audited request, for running in another thread.
+
+    Usage:
+        executor.submit(copy_context_to(build_section, section))
+    """
+    return partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor running each submitted call in a copy of the submitter's context."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(copy_context_to(fn, *args, **kwargs))
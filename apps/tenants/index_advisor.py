@@ -0,0 +1,180 @@
+"""
+Index advisor for tenant-scoped queries.
+
+Reads the SQL the application actually runs, either from pg_stat_statements
+or from a query log, and works out for each tenant-filtered query the
+composite index that would serve it: tenant_id first, then the other
+equality filters, then one range filter or ORDER BY column. Suggestions
+that no existing index already serves are ranked by the time spent in the
+queries that want them.
+
+Only SQL generated by the ORM, with quoted "table"."column" references,
+is understood; other statements are skipped.
+"""
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.db import connection
+
+TENANT_COLUMN = 'tenant_id'
+
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN)\s+"(\w+)"', re.IGNORECASE)
+_WHERE_RE = re.compile(
+    r'\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)',
+    re.IGNORECASE | re.DOTALL
+)
+_ORDER_RE = re.compile(r'\bORDER BY\b(.*?)(?:\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)', re.IGNORECASE | re.DOTALL)
+_EQUALITY_RE = re.compile(r'"(\w+)"\."(\w+)"\s*(?:=|IN\s*\(|IS NULL)', re.IGNORECASE)
+_RANGE_RE = re.compile(r'"(\w+)"\."(\w+)"\s*(?:<=|>=|<|>|BETWEEN\b)', re.IGNORECASE)
+_COLUMN_RE = re.compile(r'"(\w+)"\."(\w+)"')
+
+# PostgreSQL log lines with log_min_duration_statement, and Django's
+# django.db.backends debug log
+_PG_LOG_RE = re.compile(r'duration:\s*([\d.]+)\s*ms\s+(?:statement|execute [^:]*):\s*(.*)', re.IGNORECASE)
+_DJANGO_LOG_RE = re.compile(r'^\(([\d.]+)\)\s+(.*?);\s*args=', re.IGNORECASE)
+
+
+@dataclass
+class Suggestion:
+    """A composite index wanted by one or more query shapes."""
+    table: str
+    columns: tuple[str, ...]
+    calls: int = 0
+    total_time: float = 0.0
+    example: str = ''
+    model: type | None = field(default=None, repr=False)
+
+    @property
+    def fields(self):
+        """Model field names of the columns, for Meta.indexes."""
+        if self.model is None:
+            return list(self.columns)
+        by_column = {f.column: f.name for f in self.model._meta.concrete_fields}
+        return [by_column.get(column, column) for column in self.columns]
+
+    def as_index(self):
+        return f"models.Index(fields={self.fields!r})"
+
+
+def query_shapes(sql: str) -> list[tuple[str, tuple[str, ...], str | None]]:
+    """
+    The access paths of a SELECT as (table, equality columns, range column)
+    for every table filtered on tenant_id. The range column is the first
+    range-filtered column, or else the first ORDER BY column of the table.
+    """
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return []
+
+    where = _WHERE_RE.search(sql)
+    where = where.group(1) if where else ''
+    order = _ORDER_RE.search(sql)
+    order = order.group(1) if order else ''
+
+    shapes = []
+    for table in dict.fromkeys(_TABLE_RE.findall(sql)):
+        equality = [column for t, column in _EQUALITY_RE.findall(where) if t == table]
+        if TENANT_COLUMN not in equality or 'id' in equality:
+            # Not tenant-scoped, or a primary key lookup
+            continue
+        equality = [TENANT_COLUMN] + [c for c in dict.fromkeys(equality) if c != TENANT_COLUMN]
+        ranges = [column for t, column in _RANGE_RE.findall(where) if t == table and column not in equality]
+        ordering = [column for t, column in _COLUMN_RE.findall(order) if t == table and column not in equality]
+        range_column = (ranges or ordering or [None])[0]
+        shapes.append((table, tuple(equality), range_column))
+    return shapes
+
+
+def serves(index_columns: Iterable[str], equality: tuple[str, ...], range_column: str | None) -> bool:
+    """Whether an index with these columns serves the access path."""
+    index_columns = list(index_columns)
+    if set(index_columns[:len(equality)]) != set(equality):
+        return False
+    if range_column is None:
+        return True
+    return len(index_columns) > len(equality) and index_columns[len(equality)] == range_column
+
+
+def existing_indexes(table: str) -> list[list[str]]:
+    """Column lists of the indexes on a table."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        constraint['columns'] for constraint in constraints.values()
+        if constraint['columns'] and (constraint['index'] or constraint['unique'] or constraint['primary_key'])
+    ]
+
+
+def advise(statements: Iterable[tuple[str, int, float]], min_calls: int = 1) -> list[Suggestion]:
+    """
+    Suggest indexes for (sql, calls, total time in ms) statements, most
+    expensive first, leaving out the access paths existing indexes serve.
+    """
+    models_by_table = {model._meta.db_table: model for model in apps.get_models()}
+    indexes = {}
+    suggestions = {}
+
+    for sql, calls, total_time in statements:
+        for table, equality, range_column in query_shapes(sql):
+            if table not in indexes:
+                indexes[table] = existing_indexes(table)
+            if any(serves(columns, equality, range_column) for columns in indexes[table]):
+                continue
+
+            columns = equality + ((range_column,) if range_column else ())
+            suggestion = suggestions.get((table, columns))
+            if suggestion is None:
+                suggestion = suggestions[(table, columns)] = Suggestion(
+                    table=table, columns=columns, example=sql, model=models_by_table.get(table)
+                )
+            suggestion.calls += calls
+            suggestion.total_time += total_time
+
+    return sorted(
+        (s for s in suggestions.values() if s.calls >= min_calls),
+        key=lambda s: (s.total_time, s.calls),
+        reverse=True
+    )
+
+
+def statements_from_log(lines: Iterable[str]) -> list[tuple[str, int, float]]:
+    """
+    Statements of a PostgreSQL log (log_min_duration_statement) or a
+    django.db.backends debug log, one (sql, 1, duration in ms) per line.
+    """
+    statements = []
+    for line in lines:
+        line = line.strip()
+        match = _PG_LOG_RE.search(line)
+        if match:
+            statements.append((match.group(2), 1, float(match.group(1))))
+            continue
+        match = _DJANGO_LOG_RE.search(line)
+        if match:
+            # Django logs durations in seconds
+            statements.append((match.group(2), 1, float(match.group(1)) * 1000))
+        elif line.upper().startswith('SELECT'):
+            statements.append((line.rstrip(';'), 1, 0.0))
+    return statements
+
+
+def statements_from_pg_stat_statements(limit: int = 500) -> list[tuple[str, int, float]]:
+    """
+    The most time-consuming statements recorded by pg_stat_statements.
+    Raises django.db.DatabaseError if the extension is not installed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = 'pg_stat_statements' AND column_name IN ('total_exec_time', 'total_time')"
+        )
+        row = cursor.fetchone()
+        # total_time was renamed total_exec_time in PostgreSQL 13
+        total_column = row[0] if row else 'total_exec_time'
+        cursor.execute(
+            f"SELECT query, calls, {total_column} FROM pg_stat_statements "
+            f"WHERE query ILIKE 'SELECT%%' ORDER BY {total_column} DESC LIMIT %s",
+            [limit]
+        )
+        return [(query, calls, float(total)) for query, calls, total in cursor.fetchall()]
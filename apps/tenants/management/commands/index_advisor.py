@@ -0,0 +1,65 @@
+"""
+Management command suggesting tenant-leading composite indexes from the
+queries the application runs.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from apps.tenants.index_advisor import advise, statements_from_log, statements_from_pg_stat_statements
+
+
+class Command(BaseCommand):
+    help = (
+        'Suggest composite indexes for tenant-filtered queries, read from pg_stat_statements '
+        'or from PostgreSQL / django.db.backends query logs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            action='append',
+            default=[],
+            help='Query log file to read instead of pg_stat_statements; may be repeated'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Number of most expensive pg_stat_statements entries to read'
+        )
+        parser.add_argument(
+            '--min-calls',
+            type=int,
+            default=1,
+            help='Only suggest indexes wanted by at least this many calls'
+        )
+
+    def handle(self, *args, **options):
+        if options['log']:
+            statements = []
+            for path in options['log']:
+                with open(path, encoding='utf-8', errors='replace') as log:
+                    statements.extend(statements_from_log(log))
+        else:
+            try:
+                statements = statements_from_pg_stat_statements(options['limit'])
+            except DatabaseError as e:
+                raise CommandError(
+                    f'Could not read pg_stat_statements ({e}). Enable the extension or pass --log.'
+                ) from e
+
+        suggestions = advise(statements, min_calls=options['min_calls'])
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS(
+                f'Existing indexes serve all tenant-filtered queries of {len(statements)} statements'
+            ))
+            return
+
+        for suggestion in suggestions:
+            model = suggestion.model._meta.label if suggestion.model else suggestion.table
+            self.stdout.write(self.style.WARNING(
+                f"{model}: ({', '.join(suggestion.columns)}) "
+                f"- {suggestion.calls} calls, {suggestion.total_time:.1f} ms"
+            ))
+            self.stdout.write(f'    {suggestion.as_index()}')
+            self.stdout.write(f'    e.g. {suggestion.example[:200]}')
@@ -0,0 +1,64 @@
+"""
+Management command partitioning the largest tenant-aware tables and
+maintaining their partitions.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tenants.partitioning import (
+    PARTITIONED_TABLES,
+    STRATEGIES,
+    drop_months_before,
+    ensure_partitions,
+    partition_table,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Partition the largest tenant-aware tables by tenant (and by month of created_at), '
+        'create upcoming partitions and drop old months'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strategy',
+            choices=STRATEGIES,
+            help='Partition tables that are not partitioned yet with this strategy '
+                 '(defaults to settings.TENANT_PARTITIONING)'
+        )
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=sorted(PARTITIONED_TABLES),
+            help='Only handle this table; may be repeated'
+        )
+        parser.add_argument(
+            '--drop-before',
+            type=date.fromisoformat,
+            help='Drop month partitions ending on or before this date (YYYY-MM-DD), with their rows'
+        )
+
+    def handle(self, *args, **options):
+        strategy = options['strategy'] or settings.TENANT_PARTITIONING
+        tables = options['table'] or list(PARTITIONED_TABLES)
+
+        for table in tables:
+            if strategy:
+                try:
+                    dropped = partition_table(table, PARTITIONED_TABLES[table], strategy)
+                except ValueError as e:
+                    raise CommandError(str(e)) from e
+                for name in dropped:
+                    self.stdout.write(self.style.WARNING(f'{table}: Dropped foreign key {name}'))
+
+            created = ensure_partitions(table)
+            self.stdout.write(f'{table}: Created {created} partitions')
+
+            if options['drop_before']:
+                if not PARTITIONED_TABLES[table]:
+                    raise CommandError(f'{table} is not partitioned by month')
+                dropped = drop_months_before(table, options['drop_before'])
+                self.stdout.write(self.style.SUCCESS(f'{table}: Dropped {len(dropped)} month partitions'))
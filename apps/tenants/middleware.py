@@ -1,6 +1,8 @@
 from django.utils.functional import SimpleLazyObject
 from django.contrib.auth.models import AnonymousUser
 
+from apps.tenants.context import reset_current_tenant, set_current_tenant
+
 
 def get_current_tenant(request):
     """Get the current tenant from the request user"""
@@ -28,5 +30,10 @@ class TenantMiddleware:
         # Add tenant as a lazy object to avoid querying if not needed
         request.tenant = SimpleLazyObject(lambda: get_current_tenant(request))
         
-        response = self.get_response(request)
+        # Scope tenant-aware queries of the request to its tenant
+        token = set_current_tenant(get_current_tenant(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_current_tenant(token)
         return response
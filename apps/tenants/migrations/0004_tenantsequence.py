@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0003_remove_tenant_name_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=50)),
+                ('period', models.CharField(help_text='Period the counter restarts in, e.g. 2025 or 2025-06-30', max_length=20)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sequences', to='tenants.tenant')),
+            ],
+            options={
+                'db_table': 'tenant_sequences',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'name', 'period'), name='unique_tenant_sequence_period')],
+            },
+        ),
+    ]
@@ -20,3 +20,31 @@ class Tenant(BaseModel):
     
     def __str__(self):
         return self.name
+
+
+class TenantSequence(BaseModel):
+    """
+    Per-tenant counter for human-readable document numbers, one row per
+    sequence name and period (e.g. receipts per day, tickets per year).
+    Incremented under a row lock by apps.tenants.sequences.next_value.
+    """
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='sequences'
+    )
+    name = models.CharField(max_length=50)
+    period = models.CharField(max_length=20, help_text="Period the counter restarts in, e.g. 2025 or 2025-06-30")
+    last_value = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'tenant_sequences'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'name', 'period'],
+                name='unique_tenant_sequence_period'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.tenant} {self.name} {self.period}: {self.last_value}"
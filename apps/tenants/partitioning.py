@@ -0,0 +1,391 @@
+"""
+Optional PostgreSQL partitioning of the largest tenant-aware tables.
+
+With settings.TENANT_PARTITIONING set to 'hash' or 'list', the tables in
+PARTITIONED_TABLES are partitioned by tenant_id: hashed into
+TENANT_PARTITION_MODULUS partitions, or one partition per tenant plus a
+default partition. Tables marked monthly are first range-partitioned by
+created_at into calendar months (UTC), each month partitioned by tenant,
+so old months can be dropped cheaply.
+
+Tables keep their names, so the ORM and SQL-level checks such as
+TenantQueryLoggingMiddleware see the same table. PostgreSQL requires the
+partition keys in every primary key and unique constraint, so those gain
+tenant_id (and created_at) in the database and no longer enforce
+uniqueness of their own columns. Nothing on the application side makes up
+for that (saves and bulk_create do not validate constraints), so a
+conversion that would weaken a unique constraint is refused, and every
+such constraint is logged. The exceptions are the primary key, whose id
+is left to its sequence, and the constraints in ACCEPTED_WEAKENED_UNIQUE.
+Foreign keys *to* a partitioned table cannot be enforced by the database
+and are dropped; Django keeps emulating their on_delete.
+
+PostgreSQL cannot create indexes CONCURRENTLY on a partitioned table, so
+migrations adding indexes to these tables once they are partitioned must
+use AddIndex rather than AddIndexConcurrently, which fails on them.
+
+Partitioning is applied by the migrations when the setting is on, and by
+`manage.py partition_tables` for installations enabling it later.
+ensure_partitions, run daily by ensure_tenant_partitions, creates the
+coming months' partitions and, for list partitioning, the partitions of
+new tenants.
+"""
+import logging
+import re
+from datetime import UTC, date
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Table name -> whether it is also range-partitioned by month of created_at.
+# Subscriptions are not, as created_at would weaken the per-tenant unique
+# receipt numbers.
+PARTITIONED_TABLES = {
+    'customer_subscriptions_customersubscription': False,
+    'tickets_ticket': False,
+    'audit_logs_auditlogentry': True,
+}
+
+# Columns of unique constraints that partitioning may weaken, by table. An
+# audit log entry is only created by create_audit_metadata, right after the
+# LogEntry it describes.
+ACCEPTED_WEAKENED_UNIQUE = {
+    'audit_logs_auditlogentry': [('log_entry_id',)],
+}
+
+STRATEGIES = ('hash', 'list')
+
+_MONTH_SUFFIX_RE = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month):
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def _month_partition(table, month):
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def partitioning_strategy(cursor, table):
+    """'hash', 'list' or 'range' if the table is partitioned, else None."""
+    cursor.execute(
+        "SELECT partstrat FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+        [table]
+    )
+    row = cursor.fetchone()
+    return {'h': 'hash', 'l': 'list', 'r': 'range'}[row[0]] if row else None
+
+
+def _tenant_strategy(cursor, table):
+    """Strategy the tenant level of a partitioned table uses."""
+    strategy = partitioning_strategy(cursor, table)
+    if strategy != 'range':
+        return strategy
+    # Monthly tables partition each month by tenant
+    for partition in _child_partitions(cursor, table):
+        if partition.endswith('_default'):
+            continue
+        return partitioning_strategy(cursor, partition)
+    return getattr(settings, 'TENANT_PARTITIONING', '') or 'hash'
+
+
+def _child_partitions(cursor, table):
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s ORDER BY child.relname",
+        [table]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _tenant_ids(cursor):
+    cursor.execute("SELECT id FROM tenants ORDER BY id")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _create_tenant_partitions(cursor, parent, strategy, modulus, tenant_ids):
+    """Create the tenant-level partitions of `parent` that do not exist yet."""
+    qn = default_connection.ops.quote_name
+    existing = set(_child_partitions(cursor, parent))
+
+    if strategy == 'hash':
+        for remainder in range(modulus):
+            name = f"{parent}_p{remainder}"
+            if name not in existing:
+                cursor.execute(
+                    f"CREATE TABLE {qn(name)} PARTITION OF {qn(parent)} "
+                    f"FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})"
+                )
+        return
+
+    default = f"{parent}_default"
+    if default not in existing:
+        cursor.execute(f"CREATE TABLE {qn(default)} PARTITION OF {qn(parent)} DEFAULT")
+    for tenant_id in tenant_ids:
+        name = f"{parent}_tenant_{tenant_id}"
+        if name in existing:
+            continue
+        cursor.execute(f"SELECT 1 FROM {qn(default)} WHERE tenant_id = %s LIMIT 1", [tenant_id])
+        if cursor.fetchone():
+            # Attaching would fail while the tenant's rows sit in the default partition
+            logger.warning(f"Tenant {tenant_id} has rows in {default}, not creating {name}")
+            continue
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} PARTITION OF {qn(parent)} FOR VALUES IN ({int(tenant_id)})"
+        )
+
+
+def _create_month_partition(cursor, table, month, strategy, modulus, tenant_ids):
+    qn = default_connection.ops.quote_name
+    name = _month_partition(table, month)
+    start, end = month.isoformat(), _next_month(month).isoformat()
+    cursor.execute(
+        f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} "
+        f"FOR VALUES FROM ('{start} 00:00:00+00') TO ('{end} 00:00:00+00') "
+        f"PARTITION BY {strategy.upper()} (tenant_id)"
+    )
+    _create_tenant_partitions(cursor, name, strategy, modulus, tenant_ids)
+
+
+def _constraint_columns(definition):
+    """Columns of a PRIMARY KEY / UNIQUE constraint or CREATE UNIQUE INDEX definition."""
+    columns = re.search(r'(?:USING \w+ )?\((.*?)\)', definition).group(1)
+    return [column.strip().strip('"') for column in columns.split(',')]
+
+
+def _weakened_constraints(table, constraints, indexes, partition_columns):
+    """
+    The unique constraints partitioning by `partition_columns` would weaken,
+    as (name, columns, accepted) tuples.
+    """
+    unique = [
+        (name, _constraint_columns(definition), contype == 'p')
+        for name, contype, definition, _ in constraints if contype in ('p', 'u')
+    ]
+    unique.extend(
+        (re.search(r'INDEX (\S+) ON', indexdef).group(1), _constraint_columns(indexdef), False)
+        for indexdef, is_unique in indexes if is_unique
+    )
+    accepted = ACCEPTED_WEAKENED_UNIQUE.get(table, [])
+    return [
+        (name, columns, (primary_key and columns == ['id']) or tuple(columns) in accepted)
+        for name, columns, primary_key in unique
+        if any(column not in columns for column in partition_columns)
+    ]
+
+
+def partition_table(table, monthly, strategy='hash', modulus=None, months_ahead=None, connection=None):
+    """
+    Convert a regular table into a partitioned table with the same name,
+    columns, indexes and outgoing foreign keys, and copy its rows over.
+    Runs in one transaction holding an exclusive lock on the table.
+
+    Raises ValueError, leaving the table as it is, if the partition keys
+    would weaken a unique constraint other than the accepted ones.
+
+    Returns the names of the foreign keys to the table that were dropped.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown partitioning strategy {strategy!r}, expected one of {STRATEGIES}")
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    modulus = modulus or settings.TENANT_PARTITION_MODULUS
+    months_ahead = settings.TENANT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    partition_columns = ['tenant_id', 'created_at'] if monthly else ['tenant_id']
+    old_table = f"{table}_unpartitioned"
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if partitioning_strategy(cursor, table):
+            return []
+        cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+        # Tables with pending deferred foreign key checks cannot be altered
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid), conindid FROM pg_constraint "
+            "WHERE conrelid = %s::regclass",
+            [table]
+        )
+        constraints = cursor.fetchall()
+        constraint_indexes = {indid for _, _, _, indid in constraints if indid}
+        cursor.execute(
+            "SELECT indexrelid, pg_get_indexdef(indexrelid), indisunique FROM pg_index "
+            "WHERE indrelid = %s::regclass",
+            [table]
+        )
+        indexes = [
+            (indexdef, unique) for oid, indexdef, unique in cursor.fetchall()
+            if oid not in constraint_indexes
+        ]
+        cursor.execute(
+            "SELECT conname, conrelid::regclass::text FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = %s::regclass",
+            [table]
+        )
+        incoming = cursor.fetchall()
+
+        weakened = _weakened_constraints(table, constraints, indexes, partition_columns)
+        for name, columns, accepted in weakened:
+            log = logger.warning if accepted else logger.error
+            log(f"Partitioning {table} would make {name} ({', '.join(columns)}) unique only together "
+                f"with {', '.join(partition_columns)}")
+        refused = [name for name, _, accepted in weakened if not accepted]
+        if refused:
+            raise ValueError(f"Not partitioning {table}, it would weaken {', '.join(refused)}")
+
+        for name, referencing_table in incoming:
+            cursor.execute(f"ALTER TABLE {qn(referencing_table)} DROP CONSTRAINT {qn(name)}")
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+        for name, _, _, _ in constraints:
+            cursor.execute(f"ALTER TABLE {qn(old_table)} DROP CONSTRAINT {qn(name)}")
+        for indexdef, _ in indexes:
+            index_name = re.search(r'INDEX (\S+) ON', indexdef).group(1)
+            cursor.execute(f"DROP INDEX {index_name}")
+
+        top_level = 'RANGE (created_at)' if monthly else f'{strategy.upper()} (tenant_id)'
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f"PARTITION BY {top_level}"
+        )
+
+        tenant_ids = _tenant_ids(cursor)
+        if monthly:
+            cursor.execute(f"SELECT MIN(created_at) FROM {qn(old_table)}")
+            oldest = cursor.fetchone()[0]
+            month = _month_start(timezone.now().astimezone(UTC))
+            last = month
+            for _ in range(months_ahead):
+                last = _next_month(last)
+            if oldest:
+                month = min(month, _month_start(oldest.astimezone(UTC)))
+            while month <= last:
+                _create_month_partition(cursor, table, month, strategy, modulus, tenant_ids)
+                month = _next_month(month)
+            cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+        else:
+            _create_tenant_partitions(cursor, table, strategy, modulus, tenant_ids)
+
+        for name, contype, definition, _ in constraints:
+            if contype in ('p', 'u'):
+                columns = _constraint_columns(definition)
+                columns += [c for c in partition_columns if c not in columns]
+                keyword = 'PRIMARY KEY' if contype == 'p' else 'UNIQUE'
+                definition = f"{keyword} ({', '.join(qn(c) for c in columns)})"
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+        for indexdef, unique in indexes:
+            if unique:
+                # Unique indexes must contain the partition keys as well
+                columns = re.search(r'USING \w+ \((.*?)\)', indexdef).group(1)
+                missing = [c for c in partition_columns if c not in re.findall(r'\w+', columns)]
+                if missing:
+                    indexdef = indexdef.replace(f"({columns})", f"({columns}, {', '.join(missing)})", 1)
+            cursor.execute(indexdef)
+
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) "
+            f"FROM {qn(table)}",
+            [table]
+        )
+        cursor.execute(f"DROP TABLE {qn(old_table)}")
+        # Django creates its foreign keys INITIALLY DEFERRED
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+    dropped = [name for name, _ in incoming]
+    logger.info(f"Partitioned {table} by {'month and ' if monthly else ''}tenant ({strategy})")
+    if dropped:
+        logger.warning(f"Dropped foreign keys to {table}: {', '.join(dropped)}")
+    return dropped
+
+
+def partition_from_settings(table, connection=None):
+    """Partition a table of PARTITIONED_TABLES if settings.TENANT_PARTITIONING is on."""
+    strategy = getattr(settings, 'TENANT_PARTITIONING', '')
+    if not strategy:
+        return []
+    return partition_table(table, PARTITIONED_TABLES[table], strategy, connection=connection)
+
+
+def ensure_partitions(table, months_ahead=None, tenant_ids=None, connection=None):
+    """
+    Create the missing partitions of a partitioned table: the months up to
+    `months_ahead` from now, and for list partitioning the partitions of
+    tenants that have none. Returns the number of partitions created.
+    """
+    connection = connection or default_connection
+    months_ahead = settings.TENANT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        top_level = partitioning_strategy(cursor, table)
+        if not top_level:
+            return 0
+        strategy = _tenant_strategy(cursor, table)
+        tenant_ids = _tenant_ids(cursor) if tenant_ids is None else tenant_ids
+        before = _partition_count(cursor, table)
+
+        if top_level == 'range':
+            modulus = _hash_modulus(cursor, table)
+            existing = set(_child_partitions(cursor, table))
+            month = _month_start(timezone.now().astimezone(UTC))
+            for _ in range(months_ahead + 1):
+                name = _month_partition(table, month)
+                if name in existing:
+                    if strategy == 'list':
+                        _create_tenant_partitions(cursor, name, strategy, modulus, tenant_ids)
+                else:
+                    _create_month_partition(cursor, table, month, strategy, modulus, tenant_ids)
+                month = _next_month(month)
+        elif strategy == 'list':
+            _create_tenant_partitions(cursor, table, strategy, None, tenant_ids)
+
+        return _partition_count(cursor, table) - before
+
+
+def _partition_count(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM pg_partition_tree(%s::regclass) WHERE relid <> %s::regclass",
+        [table, table]
+    )
+    return cursor.fetchone()[0]
+
+
+def _hash_modulus(cursor, table):
+    """Modulus the months of a monthly table are hashed with."""
+    for partition in _child_partitions(cursor, table):
+        children = _child_partitions(cursor, partition)
+        if children and partitioning_strategy(cursor, partition) == 'hash':
+            return len(children)
+    return settings.TENANT_PARTITION_MODULUS
+
+
+def drop_months_before(table, before, connection=None):
+    """
+    Drop the month partitions of a monthly table that end on or before
+    `before` (a date), with their rows. Returns the dropped partition names.
+    """
+    connection = connection or default_connection
+    qn = connection.ops.quote_name
+    dropped = []
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for partition in _child_partitions(cursor, table):
+            match = _MONTH_SUFFIX_RE.search(partition)
+            if not match or _next_month(date(int(match.group(1)), int(match.group(2)), 1)) > before:
+                continue
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(partition)}")
+            cursor.execute(f"DROP TABLE {qn(partition)}")
+            dropped.append(partition)
+
+    if dropped:
+        logger.info(f"Dropped {len(dropped)} month partitions of {table} before {before}")
+    return dropped
@@ -1,11 +1,13 @@
 """
 Tenant-specific signals for handling tenant lifecycle events.
 """
+from django.conf import settings
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 import logging
 
 from apps.tenants.models import Tenant
+from apps.tenants.partitioning import PARTITIONED_TABLES, ensure_partitions
 from apps.users.models import CustomUser
 
 logger = logging.getLogger(__name__)
@@ -35,6 +37,11 @@ def handle_tenant_created(sender, instance, created, **kwargs):
             }
         )
         logger.info(f"Created system user for tenant {instance.name}")
+        
+        # Give the tenant its own partitions under list partitioning
+        if settings.TENANT_PARTITIONING == 'list':
+            for table in PARTITIONED_TABLES:
+                ensure_partitions(table, tenant_ids=[instance.id])
 
 
 @receiver(pre_delete, sender=Tenant)
@@ -2,23 +2,37 @@
 Tenant-aware Celery tasks and utilities.
 """
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 
-from celery import Task, shared_task
+from celery import Task, chord, current_app, group, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.utils import uuid
+from django.conf import settings
 from django.db import transaction
 
 from apps.tenants.context import tenant_context
 from apps.tenants.models import Tenant
+from apps.tenants.partitioning import PARTITIONED_TABLES, ensure_partitions
 
 logger = logging.getLogger(__name__)
 
 
+# Seconds a tenant run may overrun its soft time limit before the worker
+# process running it is killed
+HARD_TIME_LIMIT_GRACE = 30
+
+
 class TenantAwareTask(Task):
     """
     Base class for tenant-aware Celery tasks.
     
     Provides utilities for running tasks in tenant context.
+    
+    Subclasses may set fan_out_queue and fan_out_timeout to override
+    TENANT_TASK_QUEUE and TENANT_TASK_TIMEOUT for their fan-outs.
     """
+    fan_out_queue: str | None = None
+    fan_out_timeout: int | None = None
     
     def run_for_tenant(self, tenant_id: int, *args, **kwargs) -> Any:
         """
@@ -58,6 +72,124 @@ class TenantAwareTask(Task):
                 results[tenant.id] = {"error": str(e)}
                 
         return results
+    
+    def fan_out_to_all_tenants(self, tenant_task, *args, **kwargs) -> Any:
+        """
+        Run the task for all active tenants in parallel across workers.
+        
+        Each tenant runs as its own Celery task through `tenant_task`, the
+        registered `*_for_tenant` task taking the tenant ID first, on the
+        fan_out_queue with a soft time limit of fan_out_timeout seconds. The
+        results are collected into a dictionary shaped like the one
+        run_for_all_tenants returns.
+        
+        Falls back to run_for_all_tenants when settings.TENANT_TASK_FAN_OUT
+        is off.
+        
+        Returns:
+            ID of the collecting task, or the results of the serial run
+        """
+        if not getattr(settings, 'TENANT_TASK_FAN_OUT', True):
+            return self.run_for_all_tenants(*args, **kwargs)
+        
+        tenant_ids = list(
+            Tenant.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+        )
+        if not tenant_ids:
+            return None
+        
+        canvas = tenant_fan_out(
+            tenant_task,
+            tenant_ids,
+            args=args,
+            kwargs=kwargs,
+            queue=self.fan_out_queue or settings.TENANT_TASK_QUEUE,
+            timeout=self.fan_out_timeout or settings.TENANT_TASK_TIMEOUT,
+        )
+        result = canvas.apply_async()
+        logger.info(f"Fanned out {tenant_task.name} to {len(tenant_ids)} tenants")
+        return result.id
+
+
+def tenant_fan_out(tenant_task, tenant_ids: list[int], args=(), kwargs=None,
+                   queue: str | None = None, timeout: int | None = None):
+    """
+    Build the canvas running `tenant_task` once per tenant.
+    
+    Every tenant is a separate step of a chord whose body merges the results.
+    How many tenants run at once is up to the workers consuming `queue`
+    (the default queue if not given). A tenant that fails or hits its soft
+    time limit is recorded with an error by its step. A step that is killed
+    at the hard time limit, or whose worker is lost, fails the chord; the
+    body's errback then collects the results from the result backend, with
+    an error for the steps that failed.
+    """
+    options = {}
+    if timeout:
+        options = {'soft_time_limit': timeout, 'time_limit': timeout + HARD_TIME_LIMIT_GRACE}
+    if queue:
+        options['queue'] = queue
+    
+    args, kwargs = list(args), kwargs or {}
+    steps = [
+        run_tenant_step.s(tenant_task.name, tenant_id, args, kwargs).set(task_id=uuid(), **options)
+        for tenant_id in tenant_ids
+    ]
+    step_ids = [[tenant_id, step.id] for tenant_id, step in zip(tenant_ids, steps, strict=True)]
+    body = collect_tenant_results.s(tenant_ids, tenant_task.name).on_error(
+        collect_failed_tenant_results.s(step_ids, tenant_task.name)
+    )
+    return chord(group(steps), body)
+
+
+@shared_task
+def run_tenant_step(task_name: str, tenant_id: int, args: list, kwargs: dict):
+    """
+    Run one tenant of a fan-out in this worker, returning the task's result
+    or the error it failed with.
+    """
+    task = current_app.tasks[task_name]
+    try:
+        return task(tenant_id, *args, **kwargs)
+    except SoftTimeLimitExceeded:
+        logger.error(f"Timed out running {task_name} for tenant {tenant_id}")
+        return {"error": "Timed out"}
+    except Exception as e:
+        logger.error(f"Error running {task_name} for tenant {tenant_id}: {e}")
+        return {"error": str(e)}
+
+
+def _log_tenant_results(task_name: str, results: dict[int, Any]) -> dict[int, Any]:
+    failed = sum(1 for result in results.values() if isinstance(result, dict) and "error" in result)
+    logger.info(f"Ran {task_name} for {len(results)} tenants, {failed} failed")
+    return results
+
+
+@shared_task
+def collect_tenant_results(results: list, tenant_ids: list[int], task_name: str) -> dict[int, Any]:
+    """
+    Merge the results of a fan-out's steps into a dictionary mapping tenant
+    ID to task result, as returned by run_for_all_tenants.
+    """
+    return _log_tenant_results(task_name, dict(zip(tenant_ids, results, strict=True)))
+
+
+@shared_task
+def collect_failed_tenant_results(request, exc, traceback, step_ids: list, task_name: str) -> dict[int, Any]:
+    """
+    Errback of a fan-out whose steps did not all succeed, e.g. because one
+    was killed at its hard time limit. Reads each step's result from the
+    result backend and records the failed ones with their error.
+    """
+    results = {}
+    for tenant_id, step_id in step_ids:
+        step = collect_failed_tenant_results.AsyncResult(step_id)
+        if step.successful():
+            results[tenant_id] = step.result
+        else:
+            logger.error(f"Running {task_name} for tenant {tenant_id} ended in {step.state}: {step.result!r}")
+            results[tenant_id] = {"error": repr(step.result) if step.failed() else step.state}
+    return _log_tenant_results(task_name, results)
 
 
 @shared_task
@@ -101,3 +233,17 @@ def cleanup_inactive_tenants():
         # For now, just log
         
     return f"Processed {inactive_tenants.count()} inactive tenants"
+
+
+@shared_task
+def ensure_tenant_partitions():
+    """
+    Periodic task creating the coming months' partitions of the partitioned
+    tables, and the partitions of new tenants under list partitioning.
+    This is a system-level task that doesn't need tenant context.
+    """
+    if not settings.TENANT_PARTITIONING:
+        return "Tenant partitioning is off"
+    
+    created = sum(ensure_partitions(table) for table in PARTITIONED_TABLES)
+    return f"Created {created} partitions"
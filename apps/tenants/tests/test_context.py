@@ -0,0 +1,94 @@
+"""
+Tests for the tenant and request context.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from apps.audit_logs.middleware import AuditLogRequestMiddleware, get_current_request, set_current_request
+from apps.tenants.context import (
+    ContextThreadPoolExecutor,
+    copy_context_to,
+    get_current_tenant,
+    set_current_tenant,
+    tenant_context,
+)
+from apps.tenants.models import Tenant
+
+
+class TenantContextTests(SimpleTestCase):
+    """Test that the tenant context follows work across threads and tasks."""
+
+    def setUp(self):
+        self.tenant = Tenant(id=1, name='Context ISP 1')
+        self.other_tenant = Tenant(id=2, name='Context ISP 2')
+
+    def test_nested_contexts_restore_tenant(self):
+        with tenant_context(self.tenant):
+            with tenant_context(self.other_tenant):
+                self.assertEqual(get_current_tenant(), self.other_tenant)
+            self.assertEqual(get_current_tenant(), self.tenant)
+        self.assertIsNone(get_current_tenant())
+
+    def test_thread_pool_copies_context(self):
+        """Plain pool threads start without a tenant; ContextThreadPoolExecutor carries it."""
+        with tenant_context(self.tenant):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                self.assertIsNone(executor.submit(get_current_tenant).result())
+                self.assertEqual(executor.submit(copy_context_to(get_current_tenant)).result(), self.tenant)
+            with ContextThreadPoolExecutor(max_workers=2) as executor:
+                self.assertEqual(list(executor.map(lambda _: get_current_tenant(), range(3))), [self.tenant] * 3)
+
+    def test_pool_threads_do_not_leak_tenant(self):
+        """A tenant set inside submitted work stays in that work."""
+        def switch_tenant():
+            set_current_tenant(self.other_tenant)
+            return get_current_tenant()
+
+        with tenant_context(self.tenant):
+            with ContextThreadPoolExecutor(max_workers=1) as executor:
+                self.assertEqual(executor.submit(switch_tenant).result(), self.other_tenant)
+                self.assertEqual(executor.submit(get_current_tenant).result(), self.tenant)
+            self.assertEqual(get_current_tenant(), self.tenant)
+
+    def test_async_tasks_keep_their_own_tenant(self):
+        async def work(tenant):
+            with tenant_context(tenant):
+                await asyncio.sleep(0)
+                return get_current_tenant(), await asyncio.to_thread(get_current_tenant)
+
+        async def main():
+            return await asyncio.gather(work(self.tenant), work(self.other_tenant))
+
+        self.assertEqual(
+            asyncio.run(main()),
+            [(self.tenant, self.tenant), (self.other_tenant, self.other_tenant)]
+        )
+
+    def test_current_request_follows_copied_context(self):
+        request = object()
+
+        def audited():
+            set_current_request(request)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                return (
+                    executor.submit(get_current_request).result(),
+                    executor.submit(copy_context_to(get_current_request)).result(),
+                )
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(executor.submit(audited).result(), (None, request))
+        self.assertIsNone(get_current_request())
+
+    def test_request_middleware_resets_request(self):
+        """The request is cleared once it is handled, even when the view raises."""
+        request = object()
+
+        def view(handled):
+            self.assertIs(get_current_request(), handled)
+            raise ValueError('View failed')
+
+        with self.assertRaises(ValueError):
+            AuditLogRequestMiddleware(view)(request)
+        self.assertIsNone(get_current_request())
@@ -0,0 +1,90 @@
+"""
+Tests for the tenant index advisor.
+"""
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.customers.models import Customer
+from apps.tenants.index_advisor import advise, query_shapes, serves, statements_from_log
+from apps.utils.test_base import TenantTestCase
+
+
+class IndexAdvisorTests(TenantTestCase):
+    """Test index suggestions for tenant-filtered queries."""
+
+    def capture(self, queryset):
+        with CaptureQueriesContext(connection) as queries:
+            list(queryset)
+        return queries[-1]['sql']
+
+    def expiring_subscriptions_sql(self):
+        return self.capture(
+            CustomerSubscription.objects.filter(
+                tenant=self.tenant, status='ACTIVE', end_date__lte=timezone.now()
+            ).order_by('end_date')
+        )
+
+    def customers_by_barangay_sql(self):
+        return self.capture(
+            Customer.objects.filter(tenant=self.tenant, barangay_id=1).order_by('last_name')
+        )
+
+    def test_query_shapes(self):
+        self.assertEqual(
+            query_shapes(self.expiring_subscriptions_sql()),
+            [(CustomerSubscription._meta.db_table, ('tenant_id', 'status'), 'end_date')]
+        )
+        self.assertEqual(query_shapes('UPDATE "customers_customer" SET "status" = 1'), [])
+
+    def test_serves(self):
+        self.assertTrue(serves(['tenant_id', 'status', 'end_date'], ('status', 'tenant_id'), 'end_date'))
+        self.assertTrue(serves(['tenant_id', 'status', 'end_date'], ('tenant_id', 'status'), None))
+        self.assertFalse(serves(['status', 'end_date'], ('tenant_id', 'status'), 'end_date'))
+        self.assertFalse(serves(['tenant_id', 'status'], ('tenant_id', 'status'), 'end_date'))
+
+    def test_advise_skips_served_queries(self):
+        """The expiry scan is served by the (tenant, status, end_date) index."""
+        self.assertEqual(advise([(self.expiring_subscriptions_sql(), 10, 5.0)]), [])
+
+    def test_advise_suggests_missing_index(self):
+        sql = self.customers_by_barangay_sql()
+
+        suggestions = advise([(sql, 3, 2.0), (sql, 2, 4.0)])
+
+        self.assertEqual(len(suggestions), 1)
+        suggestion = suggestions[0]
+        self.assertEqual(suggestion.model, Customer)
+        self.assertEqual(suggestion.columns, ('tenant_id', 'barangay_id', 'last_name'))
+        self.assertEqual(suggestion.as_index(), "models.Index(fields=['tenant', 'barangay', 'last_name'])")
+        self.assertEqual((suggestion.calls, suggestion.total_time), (5, 6.0))
+        self.assertEqual(advise([(sql, 3, 2.0)], min_calls=4), [])
+
+    def test_statements_from_log(self):
+        sql = 'SELECT "t"."id" FROM "t" WHERE "t"."tenant_id" = 1'
+        statements = statements_from_log([
+            f'2025-01-01 10:00:00 UTC [12] LOG:  duration: 12.5 ms  statement: {sql}',
+            f'({0.002:.3f}) {sql}; args=(1,); alias=default',
+            f'{sql};',
+            'LOG:  checkpoint starting: time',
+        ])
+        self.assertEqual(statements, [(sql, 1, 12.5), (sql, 1, 2.0), (sql, 1, 0.0)])
+
+    def test_command_reads_logs(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as log:
+            log.write(self.customers_by_barangay_sql() + '\n')
+            log.write(self.expiring_subscriptions_sql() + '\n')
+        self.addCleanup(os.remove, log.name)
+        out = StringIO()
+
+        call_command('index_advisor', log=[log.name], stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("customers.Customer: (tenant_id, barangay_id, last_name)", output)
+        self.assertNotIn('customer_subscriptions', output)
@@ -0,0 +1,100 @@
+"""
+Tests for the tenant-scoped default manager.
+"""
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+
+from apps.audit_logs.models import AuditLogEntry
+from apps.barangays.models import Barangay
+from apps.routers.models import Router
+from apps.tenants.context import tenant_context
+from apps.utils.test_base import TenantTestCase
+
+
+class TenantManagerTests(TenantTestCase):
+    """Test that queries are scoped to the tenant in context."""
+
+    def setUp(self):
+        super().setUp()
+        self.barangay = Barangay.objects.create(name='Scoped Barangay', tenant=self.tenant)
+        self.other_barangay = Barangay.objects.create(name='Other Barangay', tenant=self.other_tenant)
+
+    def test_queries_scoped_to_tenant_in_context(self):
+        with tenant_context(self.tenant):
+            self.assertEqual(list(Barangay.objects.all()), [self.barangay])
+            self.assertFalse(Barangay.objects.filter(pk=self.other_barangay.pk).exists())
+            self.assertEqual(self.tenant.barangay_set.count(), 1)
+        with tenant_context(self.other_tenant):
+            self.assertEqual(list(Barangay.objects.all()), [self.other_barangay])
+
+    def test_all_tenants_escapes_scope(self):
+        with tenant_context(self.tenant):
+            self.assertEqual(
+                set(Barangay.objects.all_tenants().filter(name__endswith='Barangay')),
+                {self.barangay, self.other_barangay}
+            )
+
+    def test_unscoped_without_tenant_in_context(self):
+        self.assertEqual(
+            set(Barangay.objects.filter(name__endswith='Barangay')),
+            {self.barangay, self.other_barangay}
+        )
+
+    def test_for_tenant(self):
+        self.assertEqual(list(Barangay.objects.for_tenant(self.other_tenant)), [self.other_barangay])
+
+
+class TenantScopedViewTests(TenantTestCase):
+    """Test views that used to read across tenants."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def grant(self, app_label, codename):
+        self.user.user_permissions.add(
+            Permission.objects.get(content_type__app_label=app_label, codename=codename)
+        )
+
+    def test_router_quick_stats_counts_own_routers(self):
+        self.grant('routers', 'view_router_list')
+        Router.objects.create(
+            tenant=self.tenant, brand='TP-Link', model='C6', serial_number='SN-OWN',
+            mac_address='00:11:22:33:44:55'
+        )
+        Router.objects.create(
+            tenant=self.other_tenant, brand='TP-Link', model='C6', serial_number='SN-OTHER',
+            mac_address='00:11:22:33:44:56'
+        )
+
+        response = self.client.get(reverse('routers:stats'))
+
+        self.assertEqual(response.context['stats']['total'], 1)
+
+    def test_audit_log_list_shows_own_entries(self):
+        self.grant('admin', 'view_logentry')
+        content_type = ContentType.objects.get_for_model(Barangay)
+        for tenant, user, name in ((self.tenant, self.user, 'Own'), (self.other_tenant, self.other_user, 'Other')):
+            log_entry = LogEntry.objects.create(
+                user=user, content_type=content_type, object_id='1',
+                object_repr=f'{name} entry', action_flag=ADDITION
+            )
+            AuditLogEntry.objects.create(log_entry=log_entry, tenant=tenant)
+
+        response = self.client.get(reverse('audit_logs:list'), {'search': 'entry'})
+
+        self.assertEqual(
+            [log.object_repr for log in response.context['page_obj']],
+            ['Own entry']
+        )
+        self.assertNotIn(self.other_user, response.context['users'])
+
+    def test_area_performance_rejects_other_tenant_barangay(self):
+        self.grant('reports', 'view_area_performance_dashboard')
+        other_barangay = Barangay.objects.create(name='Other Area', tenant=self.other_tenant)
+
+        response = self.client.get(reverse('reports:area_performance'), {'barangay': other_barangay.pk})
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,139 @@
+"""
+Tests for partitioning tenant-aware tables.
+
+The conversions run inside each test's transaction and are rolled back
+with it.
+"""
+from datetime import UTC, date, datetime
+from io import StringIO
+from unittest import skipIf
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+
+from apps.audit_logs.models import AuditLogEntry
+from apps.barangays.models import Barangay
+from apps.customer_installations.models import CustomerInstallation
+from apps.customer_subscriptions.models import CustomerSubscription
+from apps.customers.models import Customer
+from apps.tenants.models import Tenant
+from apps.tenants.partitioning import (
+    PARTITIONED_TABLES,
+    drop_months_before,
+    ensure_partitions,
+    partition_table,
+    partitioning_strategy,
+)
+from apps.tickets.models import Ticket
+from apps.utils.test_base import TenantTestCase
+
+AUDIT_TABLE = AuditLogEntry._meta.db_table
+SUBSCRIPTION_TABLE = CustomerSubscription._meta.db_table
+TICKET_TABLE = Ticket._meta.db_table
+
+
+@skipIf(settings.TENANT_PARTITIONING, 'Tables are already partitioned by the migrations')
+class PartitioningTests(TenantTestCase):
+    """Test converting tables to partitioned tables and maintaining them."""
+
+    def partition_of(self, table, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT tableoid::regclass::text FROM "{table}" WHERE id = %s', [pk])
+            return cursor.fetchone()[0]
+
+    def partitions(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relid::text FROM pg_partition_tree(%s::regclass) WHERE isleaf", [table]
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def create_ticket(self, tenant, user):
+        barangay = Barangay.objects.create(name=f'{tenant.name} Barangay', tenant=tenant)
+        customer = Customer.objects.create(
+            first_name='Partitioned', last_name='Customer', email=f'{tenant.id}@example.com',
+            phone_primary='09123456789', street_address='1 Partition St', barangay=barangay, tenant=tenant
+        )
+        installation = CustomerInstallation.objects.create(
+            customer=customer, installation_date=date.today(), installation_technician=user,
+            status='ACTIVE', tenant=tenant
+        )
+        return Ticket.objects.create(
+            customer=customer, customer_installation=installation, title='No connection',
+            description='No connection', category='no_connection', priority='high',
+            source='phone', reported_by=user, tenant=tenant
+        )
+
+    def test_monthly_hash_partitioning_keeps_rows(self):
+        """Existing rows move to their month and tenant partitions; the ORM keeps working."""
+        old_entry = AuditLogEntry.objects.create(tenant=self.tenant, request_method='GET')
+        AuditLogEntry.objects.filter(pk=old_entry.pk).update(
+            created_at=datetime(2024, 1, 15, tzinfo=UTC)
+        )
+
+        partition_table(AUDIT_TABLE, monthly=True, strategy='hash', modulus=2, months_ahead=1)
+
+        self.assertTrue(self.partition_of(AUDIT_TABLE, old_entry.pk).startswith(f'{AUDIT_TABLE}_y2024m01_p'))
+        new_entry = AuditLogEntry.objects.create(tenant=self.other_tenant, request_method='POST')
+        self.assertGreater(new_entry.pk, old_entry.pk)
+        self.assertEqual(
+            set(AuditLogEntry.objects.filter(pk__in=[old_entry.pk, new_entry.pk]).values_list('tenant_id', flat=True)),
+            {self.tenant.id, self.other_tenant.id}
+        )
+
+        self.assertEqual(drop_months_before(AUDIT_TABLE, date(2024, 2, 1)), [f'{AUDIT_TABLE}_y2024m01'])
+        self.assertFalse(AuditLogEntry.objects.filter(pk=old_entry.pk).exists())
+        self.assertTrue(AuditLogEntry.objects.filter(pk=new_entry.pk).exists())
+
+    def test_ensure_partitions_adds_months(self):
+        partition_table(AUDIT_TABLE, monthly=True, strategy='hash', modulus=2, months_ahead=0)
+
+        # Two more months of one range partition and two hash partitions each
+        self.assertEqual(ensure_partitions(AUDIT_TABLE, months_ahead=2), 6)
+        self.assertEqual(ensure_partitions(AUDIT_TABLE, months_ahead=2), 0)
+
+    def test_list_partitioning_gives_tenants_own_partitions(self):
+        ticket = self.create_ticket(self.tenant, self.user)
+
+        dropped = partition_table(TICKET_TABLE, monthly=False, strategy='list')
+
+        self.assertEqual(dropped, ['tickets_ticketcomment_ticket_id_ef1ee786_fk_tickets_ticket_id'])
+        self.assertEqual(self.partition_of(TICKET_TABLE, ticket.pk), f'{TICKET_TABLE}_tenant_{self.tenant.id}')
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).ticket_number, ticket.ticket_number)
+
+        with override_settings(TENANT_PARTITIONING='list'):
+            tenant = Tenant.objects.create(name='Partitioned ISP', is_active=True)
+        self.assertIn(f'{TICKET_TABLE}_tenant_{tenant.id}', self.partitions(TICKET_TABLE))
+
+        other_ticket = self.create_ticket(self.other_tenant, self.other_user)
+        self.assertEqual(
+            self.partition_of(TICKET_TABLE, other_ticket.pk), f'{TICKET_TABLE}_tenant_{self.other_tenant.id}'
+        )
+
+    def test_refuses_to_weaken_unique_constraints(self):
+        """Month partitions would make receipt numbers unique per tenant and month only."""
+        with self.assertLogs('apps.tenants.partitioning', 'ERROR') as logs, self.assertRaises(ValueError):
+            partition_table(SUBSCRIPTION_TABLE, monthly=True, strategy='hash', modulus=2)
+
+        self.assertIn('unique_receipt_number_per_tenant (tenant_id, receipt_number)', logs.output[0])
+        with connection.cursor() as cursor:
+            self.assertIsNone(partitioning_strategy(cursor, SUBSCRIPTION_TABLE))
+
+    def test_tenant_partitioning_keeps_unique_constraints(self):
+        partition_table(SUBSCRIPTION_TABLE, PARTITIONED_TABLES[SUBSCRIPTION_TABLE], strategy='hash', modulus=2)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE indexname = 'unique_receipt_number_per_tenant'"
+            )
+            self.assertIn('(tenant_id, receipt_number) WHERE', cursor.fetchone()[0])
+
+    def test_command(self):
+        out = StringIO()
+
+        call_command('partition_tables', strategy='hash', table=[TICKET_TABLE], stdout=out)
+
+        self.assertEqual(len(self.partitions(TICKET_TABLE)), settings.TENANT_PARTITION_MODULUS)
+        self.assertIn('Dropped foreign key', out.getvalue())
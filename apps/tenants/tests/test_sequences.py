@@ -0,0 +1,56 @@
+"""
+Tests for per-tenant number sequences.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from apps.tenants.models import Tenant, TenantSequence
+from apps.tenants.sequences import next_value
+from apps.utils.test_base import TenantTestCase
+
+
+class NextValueTests(TenantTestCase):
+    """Test sequence increments."""
+
+    def test_sequences_count_per_tenant_name_and_period(self):
+        """Each tenant, sequence name and period has its own counter."""
+        self.assertEqual(next_value(self.tenant.id, 'ticket', 2025), 1)
+        self.assertEqual(next_value(self.tenant.id, 'ticket', 2025), 2)
+        self.assertEqual(next_value(self.tenant.id, 'ticket', 2026), 1)
+        self.assertEqual(next_value(self.tenant.id, 'receipt', '2025-06-30'), 1)
+        self.assertEqual(next_value(self.other_tenant.id, 'ticket', 2025), 1)
+
+        sequence = TenantSequence.objects.get(tenant=self.tenant, name='ticket', period='2025')
+        self.assertEqual(sequence.last_value, 2)
+
+    def test_increment_is_constant_time(self):
+        """Taking a number costs the same queries however many were taken."""
+        next_value(self.tenant.id, 'ticket', 2025)
+        with self.assertNumQueries(4):
+            next_value(self.tenant.id, 'ticket', 2025)
+        for _ in range(20):
+            next_value(self.tenant.id, 'ticket', 2025)
+        with self.assertNumQueries(4):
+            self.assertEqual(next_value(self.tenant.id, 'ticket', 2025), 23)
+
+
+class ConcurrentNextValueTests(TransactionTestCase):
+    """Test sequences under parallel writers."""
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Sequence ISP", is_active=True)
+
+    def test_parallel_increments_never_repeat(self):
+        """Numbers taken from several connections at once are all distinct."""
+        def take_numbers(_):
+            try:
+                return [next_value(self.tenant.id, 'receipt', '2025-06-30') for _ in range(5)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            values = [value for batch in executor.map(take_numbers, range(4)) for value in batch]
+
+        self.assertEqual(sorted(values), list(range(1, 21)))
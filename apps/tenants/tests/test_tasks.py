@@ -2,9 +2,12 @@
 Tests for tenant-aware Celery tasks.
 """
 from datetime import timedelta
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
 
-from django.test import TestCase, TransactionTestCase
+from celery import current_app
+from celery.backends.cache import CacheBackend
+from celery.exceptions import ChordError, SoftTimeLimitExceeded, TimeLimitExceeded
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 
 from apps.customer_installations.models import CustomerInstallation
@@ -20,7 +23,13 @@ from apps.barangays.models import Barangay
 from apps.subscriptions.models import SubscriptionPlan
 from apps.tenants.models import Tenant
 from apps.tenants.context import tenant_context
-from apps.tenants.tasks import run_tenant_task
+from apps.tenants.tasks import (
+    _log_tenant_results,
+    collect_failed_tenant_results,
+    collect_tenant_results,
+    run_tenant_task,
+    tenant_fan_out,
+)
 from apps.users.models import CustomUser
 from apps.utils.test_base import TenantTestCase
 
@@ -276,3 +285,112 @@ class TenantAwareTaskTests(TenantTestCase):
         # Check that tenant2 is not in results
         self.assertIn(self.tenant.id, results)
         self.assertNotIn(self.tenant2.id, results)
+
+    def test_fan_out_runs_tenants_as_separate_steps(self):
+        """Every tenant is its own step on the fan-out queue, with the tenant time limit."""
+        canvas = tenant_fan_out(
+            update_expired_subscriptions_for_tenant, [1, 2, 3], queue='tenant_tasks', timeout=60
+        )
+        
+        steps = canvas.tasks
+        self.assertEqual([step.args[1] for step in steps], [1, 2, 3])
+        for step in steps:
+            self.assertEqual(step.options['queue'], 'tenant_tasks')
+            self.assertEqual(step.options['soft_time_limit'], 60)
+            self.assertGreater(step.options['time_limit'], 60)
+        self.assertEqual(canvas.body.task, collect_tenant_results.name)
+        errback, = canvas.body.options['link_error']
+        self.assertEqual(errback['task'], collect_failed_tenant_results.name)
+        self.assertEqual(errback['args'][0], [[1, steps[0].id], [2, steps[1].id], [3, steps[2].id]])
+        
+    def test_fan_out_runs_every_tenant(self):
+        """The fan-out collects one result per tenant, shaped like run_for_all_tenants."""
+        self.create_expired_subscription(
+            self.tenant, self.installation1, self.plan1, self.tech1
+        )
+        self.create_expired_subscription(
+            self.tenant2, self.installation2, self.plan2, self.tech2
+        )
+        
+        results = tenant_fan_out(
+            update_expired_subscriptions_for_tenant, [self.tenant.id, self.tenant2.id],
+            kwargs={'schedule_upcoming': False}
+        ).apply().get()
+        
+        self.assertEqual(set(results), {self.tenant.id, self.tenant2.id})
+        self.assertIn(self.tenant2.name, results[self.tenant2.id])
+        self.assertEqual(
+            CustomerSubscription.objects.filter(
+                tenant__in=[self.tenant, self.tenant2],
+                status='EXPIRED'
+            ).count(),
+            2
+        )
+        
+    def test_fan_out_records_failing_tenants(self):
+        """A tenant that times out is recorded as an error and the others still run."""
+        run_for_tenant = update_expired_subscriptions.run_for_tenant
+        
+        def time_out_first_tenant(tenant_id, *args, **kwargs):
+            if tenant_id == self.tenant.id:
+                raise SoftTimeLimitExceeded()
+            return run_for_tenant(tenant_id, *args, **kwargs)
+        
+        with patch.object(update_expired_subscriptions, 'run_for_tenant', side_effect=time_out_first_tenant):
+            results = tenant_fan_out(
+                update_expired_subscriptions_for_tenant, [self.tenant.id, self.tenant2.id]
+            ).apply().get()
+        
+        self.assertEqual(results[self.tenant.id], {"error": "Timed out"})
+        self.assertIn(self.tenant2.name, results[self.tenant2.id])
+        
+    def test_fan_out_collects_results_when_a_step_is_killed(self):
+        """A step killed at its hard time limit fails the chord; the errback still collects every tenant."""
+        canvas = tenant_fan_out(
+            update_expired_subscriptions_for_tenant, [self.tenant.id, self.tenant2.id], timeout=60
+        )
+        finished, killed = canvas.tasks
+        app = current_app._get_current_object()
+        backend = CacheBackend(app=app, url='memory://')
+        
+        with patch.object(type(app), 'backend', new_callable=PropertyMock, return_value=backend), \
+                patch('apps.tenants.tasks._log_tenant_results', wraps=_log_tenant_results) as collected:
+            canvas.freeze()
+            # What the worker records when it kills the process running a
+            # step, and what the result backend does once every step is in
+            backend.mark_as_done(finished.id, 'Updated 0 subscriptions')
+            backend.mark_as_failure(killed.id, TimeLimitExceeded(90))
+            try:
+                raise ChordError(f'Dependency {killed.id} raised')
+            except ChordError as e:
+                backend.chord_error_from_stack(canvas.body, e)
+        
+        collected.assert_called_once()
+        task_name, results = collected.call_args.args
+        self.assertEqual(task_name, update_expired_subscriptions_for_tenant.name)
+        self.assertEqual(results[self.tenant.id], 'Updated 0 subscriptions')
+        self.assertIn('TimeLimitExceeded', results[self.tenant2.id]['error'])
+        
+    @patch('apps.tenants.tasks.tenant_fan_out')
+    def test_all_tenants_task_fans_out(self, fan_out):
+        """The periodic task dispatches the active tenants with the configured limits."""
+        self.tenant2.is_active = False
+        self.tenant2.save()
+        
+        with override_settings(TENANT_TASK_QUEUE='tenant_tasks', TENANT_TASK_TIMEOUT=120):
+            result = update_expired_subscriptions_all_tenants()
+        
+        self.assertEqual(result, fan_out.return_value.apply_async.return_value.id)
+        task, tenant_ids = fan_out.call_args.args
+        self.assertEqual(task, update_expired_subscriptions_for_tenant)
+        self.assertIn(self.tenant.id, tenant_ids)
+        self.assertNotIn(self.tenant2.id, tenant_ids)
+        self.assertEqual(fan_out.call_args.kwargs['queue'], 'tenant_tasks')
+        self.assertEqual(fan_out.call_args.kwargs['timeout'], 120)
+        
+    @override_settings(TENANT_TASK_FAN_OUT=False)
+    def test_all_tenants_task_runs_serially_without_fan_out(self):
+        results = update_expired_subscriptions_all_tenants()
+        
+        self.assertIn(self.tenant.id, results)
+        self.assertIn(self.tenant2.id, results)
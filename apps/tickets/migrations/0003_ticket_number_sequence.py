@@ -0,0 +1,51 @@
+# Generated by Django 5.2.2 on 2026-10-17 00:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_ticket_sequences(apps, schema_editor):
+    """Start each tenant's yearly ticket sequence after its highest existing number."""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TenantSequence = apps.get_model('tenants', 'TenantSequence')
+
+    last_values = {}
+    for tenant_id, ticket_number in Ticket.objects.values_list('tenant_id', 'ticket_number').iterator():
+        # TKT-YYYY-NNNN
+        parts = ticket_number.split('-')
+        if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+            continue
+        key = (tenant_id, parts[1])
+        last_values[key] = max(last_values.get(key, 0), int(parts[2]))
+
+    TenantSequence.objects.bulk_create(
+        [
+            TenantSequence(tenant_id=tenant_id, name='ticket', period=year, last_value=last_value)
+            for (tenant_id, year), last_value in last_values.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_installations', '0004_installation_paid_status'),
+        ('customers', '0003_initial'),
+        ('tenants', '0004_tenantsequence'),
+        ('tickets', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='ticket_number',
+            field=models.CharField(editable=False, help_text='Auto-generated ticket number, unique per tenant', max_length=20),
+        ),
+        migrations.RunPython(seed_ticket_sequences, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ticket',
+            constraint=models.UniqueConstraint(fields=('tenant', 'ticket_number'), name='unique_ticket_number_per_tenant'),
+        ),
+    ]
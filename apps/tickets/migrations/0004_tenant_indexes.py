@@ -0,0 +1,37 @@
+# Generated by Django 5.2.2 on 2026-10-17 01:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built and dropped without locking writes to the table;
+    # the tenant-leading replacements are in place before the old ones go
+    atomic = False
+
+    dependencies = [
+        ('tickets', '0003_ticket_number_sequence'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['tenant', 'status', 'priority'], name='tickets_tic_tenant__3a2916_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['tenant', 'assigned_to', 'status'], name='tickets_tic_tenant__7362c9_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['tenant', 'created_at'], name='tickets_tic_tenant__ebb48d_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='ticket',
+            name='tickets_tic_status_b256f6_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='ticket',
+            name='tickets_tic_assigne_e36302_idx',
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from apps.utils.models import TenantAwareModel, BaseModel
+from apps.tenants.sequences import next_value
 from apps.customers.models import Customer
 from apps.customer_installations.models import CustomerInstallation
 from apps.users.models import CustomUser
@@ -45,12 +46,20 @@ class Ticket(TenantAwareModel):
         ('other', 'Other'),
     ]
     
+    # Hours allowed before an unresolved ticket is overdue, by priority
+    SLA_HOURS = {
+        'urgent': 4,
+        'high': 8,
+        'medium': 24,
+        'low': 48,
+    }
+    DEFAULT_SLA_HOURS = 48
+    
     # Required fields
     ticket_number = models.CharField(
         max_length=20, 
-        unique=True, 
         editable=False,
-        help_text="Auto-generated ticket number"
+        help_text="Auto-generated ticket number, unique per tenant"
     )
     customer = models.ForeignKey(
         Customer, 
@@ -124,9 +133,16 @@ class Ticket(TenantAwareModel):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status', 'priority']),
+            models.Index(fields=['tenant', 'status', 'priority']),
             models.Index(fields=['customer', '-created_at']),
-            models.Index(fields=['assigned_to', 'status']),
+            models.Index(fields=['tenant', 'assigned_to', 'status']),
+            models.Index(fields=['tenant', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'ticket_number'],
+                name='unique_ticket_number_per_tenant'
+            ),
         ]
         permissions = [
             ("view_ticket_list", "Can view ticket list"),
@@ -145,34 +161,25 @@ class Ticket(TenantAwareModel):
         return f"{self.ticket_number} - {self.title}"
     
     def save(self, *args, **kwargs):
-        # Generate ticket number if not set
-        if not self.ticket_number:
-            self.ticket_number = self.generate_ticket_number()
-        
         # Set resolved_at when status changes to resolved
         if self.status == 'resolved' and not self.resolved_at:
             self.resolved_at = timezone.now()
         elif self.status != 'resolved':
             self.resolved_at = None
         
-        super().save(*args, **kwargs)
+        # The number is taken in the same transaction as the insert so a
+        # failed save does not use it up
+        with transaction.atomic():
+            # Generate ticket number if not set
+            if not self.ticket_number:
+                self.ticket_number = self.generate_ticket_number()
+            
+            super().save(*args, **kwargs)
     
     def generate_ticket_number(self):
         """Generate a unique ticket number in format TKT-YYYY-NNNN."""
-        year = timezone.now().year
-        
-        # Get the last ticket of the current year
-        last_ticket = Ticket.objects.filter(
-            ticket_number__startswith=f'TKT-{year}-'
-        ).order_by('ticket_number').last()
-        
-        if last_ticket:
-            # Extract the number part and increment
-            last_number = int(last_ticket.ticket_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-        
+        year = timezone.localdate().year
+        new_number = next_value(self.tenant_id, 'ticket', year)
         return f'TKT-{year}-{new_number:04d}'
     
     @property
@@ -181,16 +188,8 @@ class Ticket(TenantAwareModel):
         if self.status in ['resolved', 'cancelled']:
             return False
         
-        # Define SLA in hours
-        sla_hours = {
-            'urgent': 4,
-            'high': 8,
-            'medium': 24,
-            'low': 48,
-        }
-        
         hours_passed = (timezone.now() - self.created_at).total_seconds() / 3600
-        return hours_passed > sla_hours.get(self.priority, 48)
+        return hours_passed > self.SLA_HOURS.get(self.priority, self.DEFAULT_SLA_HOURS)
     
     @property
     def response_time(self):
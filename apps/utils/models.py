@@ -100,6 +100,39 @@ class GeoLocatedModel(models.Model):
         return round(distance, 2)
 
 
+class TenantQuerySet(models.QuerySet):
+    """QuerySet of a TenantAwareModel."""
+
+    def for_tenant(self, tenant):
+        return self.filter(tenant=tenant)
+
+
+class TenantManager(models.Manager.from_queryset(TenantQuerySet)):
+    """
+    Default manager of tenant-aware models.
+
+    While a tenant is set in the context (during requests by TenantMiddleware,
+    in tasks by tenant_context) queries are scoped to it, so they use the
+    tenant index and cannot return another tenant's rows. Without a tenant
+    in context, as in management commands, all rows are returned.
+
+    Use all_tenants() for the rare query that must cross tenants.
+    """
+
+    def get_queryset(self):
+        from apps.tenants.context import get_current_tenant
+
+        queryset = super().get_queryset()
+        tenant = get_current_tenant()
+        if tenant is not None:
+            queryset = queryset.filter(tenant_id=tenant.pk)
+        return queryset
+
+    def all_tenants(self):
+        """Rows of every tenant, regardless of the tenant in context."""
+        return super().get_queryset()
+
+
 class TenantAwareModel(BaseModel):
     """
     Abstract base model that adds tenant awareness to any model.
@@ -111,6 +144,8 @@ class TenantAwareModel(BaseModel):
         related_name='%(class)s_set'
     )
     
+    objects = TenantManager()
+    
     class Meta:
         abstract = True
         indexes = [
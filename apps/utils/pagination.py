@@ -0,0 +1,127 @@
+"""
+Keyset (seek) pagination.
+
+Unlike Paginator, which counts the whole queryset and skips rows with
+OFFSET, keyset pagination remembers the ordering values of the last row
+shown and asks the database for the rows that sort after it. Every page
+costs the same however deep it is and however many rows the table holds,
+as long as the ordering is backed by an index.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class KeysetPage:
+    """A page of results with cursors for the neighbouring pages."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping full microsecond precision, which seeking needs."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime | datetime.time):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """Encode ordering values as an opaque URL-safe cursor."""
+    data = json.dumps(values, cls=CursorEncoder).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_cursor(cursor, fields):
+    """Decode a cursor into values for `fields`, or None when it is invalid."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(values, list):
+            return None
+        return [field.to_python(value) for field, value in zip(fields, values, strict=True)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _seek(names, descending, values, forward):
+    """Q matching rows that sort after (forward) or before the given values."""
+    condition = Q()
+    for index, name in enumerate(names):
+        # Rows tie on every earlier key and move past this one
+        lookup = 'lt' if descending[index] == forward else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        for previous_name, previous_value in zip(names[:index], values[:index], strict=True):
+            step &= Q(**{previous_name: previous_value})
+        condition |= step
+    return condition
+
+
+def keyset_paginate(queryset, ordering, after=None, before=None, per_page=25):
+    """
+    Return a KeysetPage of `queryset` ordered by `ordering`, a sequence of
+    model field names optionally prefixed with '-'. The last field must be
+    unique (usually 'id') so the ordering is total.
+
+    `after` and `before` are cursors taken from a previous page's
+    next_cursor and previous_cursor. Invalid cursors show the first page.
+    """
+    names = [name.lstrip('-') for name in ordering]
+    descending = [name.startswith('-') for name in ordering]
+    fields = [queryset.model._meta.get_field(name) for name in names]
+    reversed_ordering = [name if desc else f'-{name}' for name, desc in zip(names, descending, strict=True)]
+
+    after_values = decode_cursor(after, fields) if after else None
+    before_values = decode_cursor(before, fields) if before else None
+
+    if before_values is not None:
+        # Walk backwards from the cursor, then restore the display order
+        rows = list(
+            queryset.filter(_seek(names, descending, before_values, forward=False))
+            .order_by(*reversed_ordering)[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        rows = queryset.order_by(*ordering)
+        if after_values is not None:
+            rows = rows.filter(_seek(names, descending, after_values, forward=True))
+        rows = list(rows[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after_values is not None
+
+    def cursor(row):
+        return encode_cursor([getattr(row, field.attname) for field in fields])
+
+    return KeysetPage(
+        rows,
+        next_cursor=cursor(rows[-1]) if rows and has_next else None,
+        previous_cursor=cursor(rows[0]) if rows and has_previous else None,
+    )
@@ -88,6 +88,7 @@ PROJECT_APPS = [
     "apps.network.apps.NetworkConfig",
     "apps.audit_logs.apps.AuditLogsConfig",
     "apps.customer_portal.apps.CustomerPortalConfig",
+    "apps.notifications.apps.NotificationsConfig",
     "apps.web",
 ]
 
@@ -376,6 +377,22 @@ EMAIL_BACKEND = env("EMAIL_BACKEND", default="django.core.mail.backends.console.
 
 EMAIL_SUBJECT_PREFIX = "[ISP Billing System] "
 
+# Customer notifications (see apps/notifications). Each channel is sent through
+# the backend class named here; point "sms" at a gateway backend in production.
+# apps.notifications.backends.FileBackend writes to NOTIFICATION_FILE_PATH.
+NOTIFICATION_BACKENDS = {
+    "sms": env("SMS_NOTIFICATION_BACKEND", default="apps.notifications.backends.ConsoleBackend"),
+    "email": env("EMAIL_NOTIFICATION_BACKEND", default="apps.notifications.backends.EmailBackend"),
+}
+NOTIFICATION_FILE_PATH = env("NOTIFICATION_FILE_PATH", default=str(BASE_DIR / "notifications.log"))
+NOTIFICATION_BATCH_SIZE = env.int("NOTIFICATION_BATCH_SIZE", default=500)
+NOTIFICATION_MAX_ATTEMPTS = env.int("NOTIFICATION_MAX_ATTEMPTS", default=3)
+# Seconds before a message left sending by a dispatcher that died is sent again
+NOTIFICATION_LEASE_SECONDS = env.int("NOTIFICATION_LEASE_SECONDS", default=900)
+
+# Customers are reminded this many days before their subscription ends
+EXPIRATION_REMINDER_DAYS = env.int("EXPIRATION_REMINDER_DAYS", default=3)
+
 # Django sites
 
 SITE_ID = 1
@@ -427,14 +444,43 @@ CACHES = {
     "default": DUMMY_CACHE if DEBUG else REDIS_CACHE,
 }
 
+# Seconds a cached report stays valid. Writes to the underlying data invalidate
+# a tenant's cached reports sooner (see apps/reports/cache.py)
+REPORT_CACHE_TIMEOUT = env.int("REPORT_CACHE_TIMEOUT", default=60 * 60)
+
+# Partition the largest tenant-aware tables by tenant: "hash" spreads tenants
+# over TENANT_PARTITION_MODULUS partitions, "list" gives each tenant its own.
+# Leave empty for regular tables. Index migrations on partitioned tables must
+# use AddIndex, not AddIndexConcurrently. See apps/tenants/partitioning.py
+TENANT_PARTITIONING = env("TENANT_PARTITIONING", default="")
+TENANT_PARTITION_MODULUS = env.int("TENANT_PARTITION_MODULUS", default=8)
+# Months of created_at partitions kept ready ahead of time
+TENANT_PARTITION_MONTHS_AHEAD = env.int("TENANT_PARTITION_MONTHS_AHEAD", default=3)
+
 CELERY_BROKER_URL = CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
 # Add tasks to this dict and run `python manage.py bootstrap_celery_tasks` to create them
 from celery import schedules
 
+# Subscriptions are expired by runs queued at their end date; runs are queued
+# this many seconds ahead, so keep it longer than the expiry scan interval below
+SUBSCRIPTION_EXPIRY_SCHEDULE_HORIZON = env.int("SUBSCRIPTION_EXPIRY_SCHEDULE_HORIZON", default=35 * 60)
+
+# Periodic tasks run each active tenant as its own Celery task so tenants are
+# processed in parallel across workers; set TENANT_TASK_FAN_OUT=False to run
+# them one after another in a single task instead
+TENANT_TASK_FAN_OUT = env.bool("TENANT_TASK_FAN_OUT", default=True)
+# Queue the tenants of a fan-out are sent to; run a worker consuming it with
+# `-Q <queue> -c <n>` to process at most n tenants at a time. Empty uses the
+# default queue
+TENANT_TASK_QUEUE = env("TENANT_TASK_QUEUE", default="")
+# Seconds one tenant's run may take before it is stopped and recorded as an error
+TENANT_TASK_TIMEOUT = env.int("TENANT_TASK_TIMEOUT", default=5 * 60)
+
 SCHEDULED_TASKS = {
-    # Update expired subscriptions every 30 minutes for all tenants
+    # Safety net scan every 30 minutes for all tenants: expires anything a
+    # scheduled run missed and queues runs for the next 30 minutes
     "update-expired-subscriptions-all-tenants": {
         "task": "apps.customer_subscriptions.tasks.update_expired_subscriptions_all_tenants",
         "schedule": schedules.crontab(minute="*/30"),  # Every 30 minutes
@@ -444,6 +490,16 @@ SCHEDULED_TASKS = {
         "task": "apps.customer_subscriptions.tasks.send_expiration_reminders_all_tenants",
         "schedule": schedules.crontab(minute=0, hour=9),  # Daily at 9 AM
     },
+    # Send queued notifications and retry failed ones every 5 minutes
+    "dispatch-notifications-all-tenants": {
+        "task": "apps.notifications.tasks.dispatch_notifications_all_tenants",
+        "schedule": schedules.crontab(minute="*/5"),  # Every 5 minutes
+    },
+    # Create the coming months' table partitions daily when partitioning is on
+    "ensure-tenant-partitions": {
+        "task": "apps.tenants.tasks.ensure_tenant_partitions",
+        "schedule": schedules.crontab(minute=30, hour=1),  # Daily at 1:30 AM
+    },
     # Cleanup inactive tenants weekly on Sunday at 2 AM
     "cleanup-inactive-tenants": {
         "task": "apps.tenants.tasks.cleanup_inactive_tenants",